@@ -0,0 +1,45 @@
+# backend/app/cache.py
+import os
+import threading
+from collections import OrderedDict
+
+class ResponseCache:
+    """
+    In-process LRU cache of encoded response bodies, bounded by total body size in bytes.
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, body, headers=None):
+        if len(body) > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.size -= len(self.entries.pop(key)[0])
+            self.entries[key] = (body, headers or {})
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, (evicted, _) = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+response_cache = ResponseCache(int(os.getenv('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024)))
@@ -0,0 +1,62 @@
+# backend/app/compression.py
+import os
+import gzip
+from flask import request
+from app.cache import response_cache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MIN_BYTES = int(os.getenv('COMPRESSION_MIN_BYTES', 1024))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+def choose_encoding(accept_encodings):
+    """
+    Pick the best content encoding the client accepts: brotli when available, then gzip.
+    """
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+def compress_response(response):
+    """
+    after_request hook: compress large, fully buffered responses according to Accept-Encoding.
+
+    Responses carrying an ETag reuse their compressed variant from the response cache.
+    """
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers):
+        return response
+    response.vary.add('Accept-Encoding')
+    if response.content_length is not None and response.content_length < COMPRESSION_MIN_BYTES:
+        return response
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    etag, _ = response.get_etag()
+    key = f"{etag}|{encoding}" if etag else None
+    entry = response_cache.get(key) if key else None
+    if entry is None:
+        body = compress(response.get_data(), encoding)
+        if key:
+            response_cache.put(key, body)
+    else:
+        body = entry[0]
+
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    if etag:
+        # the representation differs per encoding, so only weak comparison stays valid
+        response.set_etag(etag, weak=True)
+    return response
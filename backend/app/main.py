@@ -1,13 +1,14 @@
 # backend/app/main.py
 import sys
 import os
-from flask import Flask, send_from_directory
+from flask import Flask, request
 from flask_cors import CORS
 from dotenv import load_dotenv
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app.routes import main_routes
+from app.static_assets import AssetManifest
 
 load_dotenv()
 
@@ -18,13 +19,12 @@ app.config["MONGO_URI"] = os.getenv("MONGO_FULL_URI")
 
 app.register_blueprint(main_routes)
 
+asset_manifest = AssetManifest(app.static_folder)
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
-    if path != "" and os.path.exists(app.static_folder + '/' + path):
-        return send_from_directory(app.static_folder, path)
-    else:
-        return send_from_directory(app.static_folder, 'index.html')
+    return asset_manifest.send(path, request.accept_encodings)
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 8080)), debug=os.getenv('FLASK_DEBUG', 'False').lower() == 'true')
@@ -0,0 +1,114 @@
+# backend/app/metrics.py
+import time
+import threading
+from flask import g, request
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(label_names, label_values, extra=()):
+    pairs = list(zip(label_names, label_values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+class Counter:
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, label_values=(), amount=1):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for label_values, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, label_values)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, label_values=()):
+        with self.lock:
+            series = self.series.setdefault(label_values, [0] * (len(self.buckets) + 1) + [0.0])
+            for i, upper in enumerate(self.buckets):
+                if value <= upper:
+                    series[i] += 1
+            series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for label_values, series in sorted(self.series.items()):
+                for upper, count in zip(self.buckets, series):
+                    labels = _format_labels(self.label_names, label_values, [('le', upper)])
+                    lines.append(f"{self.name}_bucket{labels} {count}")
+                count = series[len(self.buckets)]
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, label_values, [('le', '+Inf')])} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.label_names, label_values)} {series[-1]}")
+                lines.append(f"{self.name}_count{_format_labels(self.label_names, label_values)} {count}")
+        return lines
+
+request_latency = Histogram(
+    'http_request_duration_seconds', 'Time to produce a response, by route.', ('route', 'method', 'status'))
+mongo_command_latency = Histogram(
+    'mongodb_command_duration_seconds', 'MongoDB command round trip time.', ('command',))
+mongo_documents_returned = Counter(
+    'mongodb_documents_returned_total', 'Documents returned by MongoDB cursors.', ('command',))
+mongo_command_failures = Counter(
+    'mongodb_command_failures_total', 'MongoDB commands that failed.', ('command',))
+
+ALL_METRICS = (request_latency, mongo_command_latency, mongo_documents_returned, mongo_command_failures)
+
+def render_metrics():
+    lines = []
+    for metric in ALL_METRICS:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+def record_request_latency(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        request_latency.observe(time.perf_counter() - started, (route, request.method, str(response.status_code)))
+    return response
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """
+    pymongo command listener recording per-command latency and how many documents cursors returned.
+    """
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        mongo_command_latency.observe(event.duration_micros / 1e6, (event.command_name,))
+        cursor = event.reply.get('cursor') if hasattr(event.reply, 'get') else None
+        if cursor:
+            batch = cursor.get('firstBatch', cursor.get('nextBatch', []))
+            mongo_documents_returned.inc((event.command_name,), len(batch))
+
+    def failed(self, event):
+        mongo_command_latency.observe(event.duration_micros / 1e6, (event.command_name,))
+        mongo_command_failures.inc((event.command_name,))
+
+command_listener = CommandMetricsListener()
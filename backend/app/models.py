@@ -1,9 +1,56 @@
 # backend/app/models.py
 import os
+import threading
 from pymongo import MongoClient
 from dotenv import load_dotenv
+from app.metrics import command_listener
 load_dotenv()
 mongo_uri = os.getenv('MONGO_FULL_URI')
 mongo_db_name = os.getenv('MONGO_DB_NAME')
-client = MongoClient(mongo_uri)
-db = client[mongo_db_name]
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+def client_options():
+    """
+    Connection pool and timeout settings for the API's MongoClient, tunable per deployment.
+    """
+    return {
+        'maxPoolSize': int(os.getenv('MONGO_MAX_POOL_SIZE', 10)),
+        'minPoolSize': int(os.getenv('MONGO_MIN_POOL_SIZE', 0)),
+        'maxIdleTimeMS': int(os.getenv('MONGO_MAX_IDLE_TIME_MS', 60000)),
+        'waitQueueTimeoutMS': int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', 5000)),
+        'serverSelectionTimeoutMS': int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000)),
+        'connectTimeoutMS': int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', 5000)),
+        'socketTimeoutMS': int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', 20000)),
+        'event_listeners': [command_listener],
+    }
+
+def get_client():
+    """
+    Return the MongoClient of the current process, creating it on first use.
+
+    MongoClient is not fork-safe, so a client created before a gunicorn fork is never reused in the
+    worker: each process lazily opens its own client, which is then shared by all of its threads.
+    """
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                # an inherited client belongs to the parent; drop it without closing the parent's sockets
+                _client = MongoClient(mongo_uri, **client_options())
+                _client_pid = pid
+    return _client
+
+def get_db():
+    return get_client()[mongo_db_name]
+
+def close_client():
+    global _client, _client_pid
+    with _client_lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client = None
+        _client_pid = None
@@ -1,25 +1,62 @@
 # backend/app/routes.py
-from flask import Blueprint, jsonify, request
-from app.models import db
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from app.models import get_db
+from app.cache import response_cache
+from app.compression import compress_response
+from app.metrics import start_request_timer, record_request_latency, render_metrics
+from app.serializers import dumps
+from util.score_stats import collection_stats, DEFAULT_BIN_SIZE, MAX_SCORE
+from util.collection_versions import collection_fingerprint
+from util.internal_collections import INTERNAL_COLLECTIONS, TRENDS_COLLECTION
+from util.trend_rollup import fetch_trends
+from util.text_store import text_resolver, expand_projection
 import logging
+import hashlib
 from bson import ObjectId
-import json
+from bson.errors import InvalidId
+from urllib.parse import urlencode
 
 main_routes = Blueprint('main', __name__)
+main_routes.before_app_request(start_request_timer)
+# after_request hooks run in reverse order, so latency is recorded after compression
+main_routes.after_app_request(record_request_latency)
+main_routes.after_app_request(compress_response)
 
-class JSONEncoder(json.JSONEncoder):
-    def default(self, o):
-        if isinstance(o, ObjectId):
-            return str(o)
-        if isinstance(o, datetime.datetime):
-            return o.isoformat()
-        return super(JSONEncoder, self).default(o)
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 200
+
+def next_page_query(args, next_after):
+    params = args.to_dict()
+    params['after'] = next_after
+    return urlencode(params)
+
+def conditional_response(collection_name, build_body):
+    """
+    Serve a read of a collection through the ETag check and the in-process response cache.
+
+    :param collection_name: The collection the response is derived from.
+    :param build_body: Callable returning (body, headers); only invoked on a cache miss.
+    :return: A 304 if the client already has this version, otherwise the (possibly cached) body.
+    """
+    fingerprint = collection_fingerprint(get_db(), collection_name)
+    etag = hashlib.sha1(f"{request.full_path}|{fingerprint}".encode()).hexdigest()
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        entry = response_cache.get(etag)
+        if entry is None:
+            entry = build_body()
+            response_cache.put(etag, *entry)
+        response = Response(entry[0], status=200, mimetype='application/json', headers=entry[1])
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @main_routes.route('/data', methods=['GET'])
 def get_collections():
     try:
-        collections = db.list_collection_names()
-        logging.info(f"Collections found: {collections}")
+        collections = [name for name in get_db().list_collection_names() if name not in INTERNAL_COLLECTIONS]
+        logging.info(f"Collections found: {len(collections)}")
         if not collections:
             return jsonify({"message": "No collections found in the database."}), 404
         else:
@@ -28,16 +65,129 @@ def get_collections():
         logging.error(f"An error occurred: {str(e)}")
         return jsonify({"message": f"An error occurred: {str(e)}"}), 500
 
+def parse_read_options():
+    """
+    Parse the keyset pagination, projection and format query parameters of a collection read.
+
+    :return: A dict with 'query', 'projection', 'limit' and 'ndjson' keys.
+    :raises ValueError: If a parameter is malformed.
+    """
+    args = request.args
+    query = {}
+    after = args.get('after')
+    if after:
+        try:
+            query['_id'] = {'$gt': ObjectId(after)}
+        except (InvalidId, TypeError):
+            raise ValueError(f"'after' must be a document id, got '{after}'.")
+
+    limit = args.get('limit')
+    if limit is not None:
+        if not limit.isdigit() or not 1 <= int(limit) <= MAX_PAGE_SIZE:
+            raise ValueError(f"'limit' must be an integer between 1 and {MAX_PAGE_SIZE}.")
+        limit = int(limit)
+
+    projection = None
+    fields = args.get('fields')
+    if fields:
+        # _id always comes back so the client can page with ?after=
+        projection = expand_projection({field.strip(): 1 for field in fields.split(',') if field.strip()})
+
+    ndjson = args.get('format') == 'ndjson' or request.accept_mimetypes.best == 'application/x-ndjson'
+    return {'query': query, 'projection': projection, 'limit': limit, 'ndjson': ndjson}
+
+def open_cursor(collection, options):
+    cursor = collection.find(options['query'], options['projection']).sort('_id', 1).batch_size(STREAM_BATCH_SIZE)
+    if options['limit']:
+        cursor = cursor.limit(options['limit'])
+    return cursor
+
+def resolved_batches(cursor, db):
+    # resolve text references one cursor batch at a time, so each batch costs a single texts query
+    batch = []
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) == STREAM_BATCH_SIZE:
+            yield text_resolver.resolve_documents(db, batch)
+            batch = []
+    if batch:
+        yield text_resolver.resolve_documents(db, batch)
+
+def stream_ndjson(cursor, collection_name, db):
+    count = 0
+    size = 0
+    try:
+        for batch in resolved_batches(cursor, db):
+            for doc in batch:
+                line = dumps(doc) + b'\n'
+                count += 1
+                size += len(line)
+                yield line
+    except Exception as e:
+        logging.error(f"Stream from {collection_name} aborted after {count} documents: {str(e)}")
+    finally:
+        cursor.close()
+        logging.info(f"Streamed {count} documents ({size} bytes) from {collection_name}")
+
+@main_routes.route('/data/trends', methods=['GET'])
+def get_trends():
+    try:
+        def build_body():
+            trends = fetch_trends(get_db())
+            logging.info(f"Trend series has {len(trends['series'])} collections")
+            return dumps(trends), {}
+
+        return conditional_response(TRENDS_COLLECTION, build_body)
+    except Exception as e:
+        logging.error(f"An error occurred while fetching trends: {str(e)}")
+        return jsonify({"message": f"An error occurred: {str(e)}"}), 500
+
 @main_routes.route('/data/<collection_name>', methods=['GET'])
 def get_collection_data(collection_name):
     try:
-        collection = db[collection_name]
-        documents = list(collection.find())
-        for doc in documents:
-            if 'created_at' in doc:
-                doc['created_at'] = doc['created_at'].isoformat()
-        logging.info(f"Documents found in {collection_name}: {documents}")
-        return JSONEncoder().encode(documents), 200
+        options = parse_read_options()
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    try:
+        collection = get_db()[collection_name]
+        if options['ndjson']:
+            cursor = open_cursor(collection, options)
+            return Response(stream_with_context(stream_ndjson(cursor, collection_name, get_db())), mimetype='application/x-ndjson')
+
+        def build_body():
+            documents = text_resolver.resolve_documents(get_db(), list(open_cursor(collection, options)))
+            headers = {}
+            if options['limit'] and len(documents) == options['limit']:
+                next_after = str(documents[-1]['_id'])
+                headers['X-Next-After'] = next_after
+                headers['Link'] = f'<{request.path}?{next_page_query(request.args, next_after)}>; rel="next"'
+            body = dumps(documents)
+            logging.info(f"Encoded {len(documents)} documents from {collection_name} into {len(body)} bytes")
+            return body, headers
+
+        return conditional_response(collection_name, build_body)
     except Exception as e:
         logging.error(f"An error occurred while fetching data from {collection_name}: {str(e)}")
         return jsonify({"message": f"An error occurred: {str(e)}"}), 500
+
+@main_routes.route('/data/<collection_name>/stats', methods=['GET'])
+def get_collection_stats(collection_name):
+    bin_size = request.args.get('bin_size', str(DEFAULT_BIN_SIZE))
+    if not bin_size.isdigit() or not 1 <= int(bin_size) <= MAX_SCORE:
+        return jsonify({"message": f"bin_size must be an integer between 1 and {MAX_SCORE}."}), 400
+    bin_size = int(bin_size)
+    try:
+        def build_body():
+            stats = collection_stats(get_db()[collection_name], bin_size)
+            stats['collection'] = collection_name
+            logging.info(f"Computed stats for {collection_name}: {stats['count']} documents, {stats['labeled']} labeled")
+            return dumps(stats), {}
+
+        return conditional_response(collection_name, build_body)
+    except Exception as e:
+        logging.error(f"An error occurred while computing stats for {collection_name}: {str(e)}")
+        return jsonify({"message": f"An error occurred: {str(e)}"}), 500
+
+@main_routes.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
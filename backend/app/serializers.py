@@ -0,0 +1,60 @@
+# backend/app/serializers.py
+import os
+import json
+import datetime
+from bson import ObjectId
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class JSONEncoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, ObjectId):
+            return str(o)
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super(JSONEncoder, self).default(o)
+
+def _orjson_default(o):
+    # orjson handles datetime natively; ObjectId is the only BSON type our documents need on top
+    if isinstance(o, ObjectId):
+        return str(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+class StdlibSerializer:
+    name = 'json'
+
+    def dumps(self, obj):
+        return JSONEncoder().encode(obj).encode('utf-8')
+
+class OrjsonSerializer:
+    name = 'orjson'
+
+    def dumps(self, obj):
+        return orjson.dumps(obj, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+SERIALIZERS = {
+    StdlibSerializer.name: StdlibSerializer,
+    OrjsonSerializer.name: OrjsonSerializer,
+}
+
+def get_serializer(name=None):
+    """
+    Pick the JSON serializer for API responses.
+
+    :param name: 'orjson' or 'json'; defaults to JSON_SERIALIZER, falling back to the fastest one installed.
+    :return: A serializer exposing dumps(obj) -> bytes.
+    """
+    name = name or os.getenv('JSON_SERIALIZER') or ('orjson' if orjson else 'json')
+    if name not in SERIALIZERS:
+        raise ValueError(f"Unknown JSON serializer '{name}'. Expected one of {sorted(SERIALIZERS)}.")
+    if name == 'orjson' and orjson is None:
+        raise ValueError("JSON_SERIALIZER is 'orjson' but orjson is not installed.")
+    return SERIALIZERS[name]()
+
+serializer = get_serializer()
+
+def dumps(obj):
+    return serializer.dumps(obj)
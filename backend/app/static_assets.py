@@ -0,0 +1,96 @@
+# backend/app/static_assets.py
+import os
+import re
+import sys
+import gzip
+import mimetypes
+from flask import send_from_directory
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# CRA emits content-hashed names such as main.3f2a1b4c.js and 787.2e3c4a1b.chunk.css
+HASHED_FILENAME = re.compile(r'\.[0-9a-f]{8,}\.(?:chunk\.)?[a-z0-9]+$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+# preferred order when the client accepts several encodings
+PRECOMPRESSED_SUFFIXES = [('br', '.br'), ('gzip', '.gz')]
+PRECOMPRESS_EXTENSIONS = ('.html', '.js', '.css', '.json', '.svg', '.txt', '.map', '.ico')
+
+class AssetManifest:
+    """
+    In-memory index of the frontend build, built once at startup.
+
+    Maps each servable path to the precompressed variants that exist next to it, so serving a
+    request needs no filesystem lookups beyond opening the chosen file.
+    """
+    def __init__(self, root, index='index.html'):
+        self.root = root
+        self.index = index
+        self.assets = {}
+        if os.path.isdir(root):
+            self.scan()
+
+    def scan(self):
+        files = set()
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                files.add(os.path.relpath(os.path.join(directory, name), self.root).replace(os.sep, '/'))
+        suffixes = tuple(suffix for _, suffix in PRECOMPRESSED_SUFFIXES)
+        self.assets = {
+            path: {encoding: path + suffix for encoding, suffix in PRECOMPRESSED_SUFFIXES if path + suffix in files}
+            for path in files if not path.endswith(suffixes)
+        }
+
+    def resolve(self, path):
+        # unknown paths fall back to the SPA entry point so client-side routes keep working
+        return path if path in self.assets else self.index
+
+    def send(self, path, accept_encodings):
+        """
+        Send an asset, preferring a precompressed variant the client accepts, with cache headers
+        that let browsers keep hashed files forever and revalidate everything else.
+        """
+        path = self.resolve(path)
+        variants = self.assets.get(path, {})
+        encoding = next((enc for enc, _ in PRECOMPRESSED_SUFFIXES if enc in variants and accept_encodings[enc]), None)
+        mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+        response = send_from_directory(self.root, variants[encoding] if encoding else path, mimetype=mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        if variants:
+            response.vary.add('Accept-Encoding')
+        if HASHED_FILENAME.search(path):
+            response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response.headers['Cache-Control'] = REVALIDATE_CACHE_CONTROL
+        return response
+
+def precompress_directory(root):
+    """
+    Write .gz (and .br, when brotli is installed) variants next to every compressible build file.
+    """
+    written = 0
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if not name.endswith(PRECOMPRESS_EXTENSIONS):
+                continue
+            path = os.path.join(directory, name)
+            with open(path, 'rb') as f:
+                data = f.read()
+            with open(path + '.gz', 'wb') as f:
+                f.write(gzip.compress(data, compresslevel=9))
+            written += 1
+            if brotli is not None:
+                with open(path + '.br', 'wb') as f:
+                    f.write(brotli.compress(data, quality=11))
+                written += 1
+    return written
+
+if __name__ == "__main__":
+    build_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), '..', '..', 'frontend', 'build')
+    print(f"Precompressed {precompress_directory(build_dir)} files in {build_dir}")
@@ -0,0 +1,28 @@
+# backend/gunicorn.conf.py
+# Production serving config, used by both Procfiles: gunicorn -c gunicorn.conf.py app.main:app
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+
+# gthread (default) runs WEB_CONCURRENCY processes with GUNICORN_THREADS threads each, so one slow
+# Mongo query only ties up a thread. Set GUNICORN_WORKER_CLASS=gevent (requires `pip install gevent`)
+# to multiplex many dashboard clients per worker instead.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 100))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# The app is imported once in the master and forked; app.models opens the MongoClient lazily in each
+# worker after the fork, so no connections are inherited or opened until a worker serves a request
+# (get_client() also discards a client created in another process, so no fork hooks are needed).
+# gevent workers monkey-patch the stdlib only after the fork, which is too late for modules the master
+# already imported (pymongo would keep real threads and sockets), so they import the app themselves.
+preload_app = worker_class != 'gevent'
+
+# recycle workers now and then, jittered so they don't all reconnect to Atlas at once
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
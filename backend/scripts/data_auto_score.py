@@ -0,0 +1,69 @@
+# scripts/data_auto_score.py
+
+import os
+import sys
+import time
+import argparse
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pandas as pd
+from pymongo import UpdateOne
+from util.mongo_util import MongoUtil
+from util.ats_scorer import score_resumes
+from util.text_store import text_resolver
+from util.trend_rollup import is_daily_collection
+from util.collection_versions import bump_collection_version
+
+WRITE_BATCH_SIZE = 500
+
+def score_collection(db, collection_name, only_unscored=False):
+    """
+    Auto-score every generated resume of a collection and flag the ones a human should review.
+
+    :return: (documents scored, documents flagged for review)
+    """
+    collection = db[collection_name]
+    query = {'generated_resume': {'$exists': True}}
+    if only_unscored:
+        query['auto_score'] = {'$exists': False}
+    projection = {'generated_resume': 1, 'job_description': 1, 'job_description_ref': 1}
+    documents = text_resolver.resolve_documents(db, list(collection.find(query, projection)))
+    if not documents:
+        return 0, 0
+
+    frame = pd.DataFrame(documents)
+    scores = score_resumes(frame['generated_resume'], frame['job_description'])
+    updates = [
+        UpdateOne({'_id': _id}, {'$set': {
+            'auto_score': int(row.auto_score),
+            'auto_score_details': {'coverage': float(row.coverage), 'sections': float(row.sections), 'format': float(row.format)},
+            'needs_review': bool(row.needs_review),
+        }})
+        for _id, row in zip(frame['_id'], scores.itertuples(index=False))
+    ]
+    for start in range(0, len(updates), WRITE_BATCH_SIZE):
+        collection.bulk_write(updates[start:start + WRITE_BATCH_SIZE], ordered=False)
+    bump_collection_version(db, collection_name)
+    return len(documents), int(scores['needs_review'].sum())
+
+def main(collection_name=None, score_all=False, only_unscored=False):
+    mongo_util = MongoUtil()
+    db = mongo_util.db
+    if score_all:
+        names = sorted(name for name in db.list_collection_names() if is_daily_collection(name))
+    else:
+        names = [collection_name or mongo_util.get_previous_day_collection().name]
+
+    for name in names:
+        start_time = time.time()
+        scored, flagged = score_collection(db, name, only_unscored)
+        print(f"{name}: scored {scored} documents in {time.time() - start_time:.2f} seconds, {flagged} flagged for review")
+    mongo_util.close_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score generated resumes locally and flag borderline ones for human review")
+    parser.add_argument("--collection", help="Collection to score (default: yesterday's)")
+    parser.add_argument("--all", action="store_true", help="Score every daily collection")
+    parser.add_argument("--only_unscored", action="store_true", help="Skip documents that already have an auto_score")
+    args = parser.parse_args()
+
+    main(collection_name=args.collection, score_all=args.all, only_unscored=args.only_unscored)
@@ -1,85 +1,164 @@
 # scripts/data_cleanup.py
-import boto3
 import pandas as pd
 import os
-import re
+import sys
+import argparse
 from dotenv import load_dotenv
-from tqdm import tqdm
 import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from util import s3_access
+from util.table_io import DATA_FORMAT, EXTENSIONS, stage_path, write_table
+from util.reservoir import ReservoirSampler
+from util.keyword_matcher import KeywordMatcher
+from util.near_duplicates import NearDuplicateFilter
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
 
 load_dotenv()
 
-def get_s3_client():
-    print("Initializing S3 client...")
-    return boto3.client('s3',
-                        aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-                        aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'))
+SAMPLE_SIZE = 1000
+SAMPLE_SEED = 1
+DEFAULT_CHUNK_ROWS = 50000
+# estimated Jaccard similarity of description shingles above which postings are reposts of one job
+NEAR_DUPLICATE_THRESHOLD = 0.8
+# representatives the streaming filter keeps indexed (about 4 KB each), so its memory stays bounded
+NEAR_DUPLICATE_WINDOW = int(os.getenv('NEAR_DUPLICATE_WINDOW', 100000))
+# Arrow-backed strings run strip/replace in compiled kernels instead of per-row Python calls
+TEXT_DTYPE = "string[pyarrow]" if pyarrow is not None else "string"
+# only these columns are parsed in streaming mode
+SOURCE_COLUMNS = {
+    "resumes": ['Text'],
+    "job_postings": ['title', 'description'],
+}
 
-def read_csv_from_s3(bucket, key):
+def read_csv_from_s3(bucket, key, s3_client=None):
     print(f"Reading {key} from S3 bucket {bucket}...")
-    s3_client = get_s3_client()
-    response = s3_client.get_object(Bucket=bucket, Key=key)
-    df = pd.read_csv(response['Body'])
+    with s3_access.open_object(bucket, key, s3_client) as body:
+        df = pd.read_csv(body)
     print(f"Successfully read {key}. Shape: {df.shape}")
     return df
 
+def read_csv_chunks_from_s3(bucket, key, chunksize=DEFAULT_CHUNK_ROWS, usecols=None, s3_client=None):
+    """
+    Yield DataFrames of chunksize rows parsed from the cached copy of the object (or the S3 body when S3_CACHE=off).
+    """
+    print(f"Streaming {key} from S3 bucket {bucket} in chunks of {chunksize} rows...")
+    with s3_access.open_object(bucket, key, s3_client) as body:
+        yield from pd.read_csv(body, chunksize=chunksize, usecols=usecols)
+
 def filter_by_keywords(df, column_name, keywords):
-    print(f"Filtering {column_name} by keywords: {keywords}")
-    keywords_lower = [keyword.lower() for keyword in keywords]
-    filtered_df = df[df[column_name].str.lower().str.contains('|'.join(keywords_lower), case=False, na=False)]
+    matcher = keywords if isinstance(keywords, KeywordMatcher) else KeywordMatcher(keywords)
+    print(f"Filtering {column_name} by {len(matcher.canonical)} keywords")
+    matched = matcher.first_match(df[column_name])
+    filtered_df = df.assign(matched_keyword=matched)[matched.notna()]
     print(f"Filtered shape: {filtered_df.shape}")
+    print(f"Matches per keyword: {filtered_df['matched_keyword'].value_counts().to_dict()}")
     return filtered_df
 
-def clean_text(text):
-    if pd.isna(text):
-        return text
-    text = text.strip()
-    text = re.sub(r'\s+', ' ', text)
-    return text
+def clean_text_column(series):
+    """
+    Strip and collapse whitespace for the whole column at once.
+    """
+    return series.astype(TEXT_DTYPE).str.strip().str.replace(r'\s+', ' ', regex=True)
+
+def clean_resumes(df):
+    df = df.dropna(subset=['Text'])
+    return df[['Text']].rename(columns={'Text': 'resume_text'})
+
+def clean_job_postings(df, keywords, dedupe=None):
+    """
+    :param keywords: A list of title keywords or a prebuilt KeywordMatcher (reused across chunks).
+    :param dedupe: A NearDuplicateFilter (reused across chunks) to drop reposts of earlier postings, or None.
+    """
+    df = filter_by_keywords(df, 'title', keywords)
+    df = df.dropna(subset=['description'])
+    df = df.assign(description=clean_text_column(df['description']))
+    df = df[df['description'].str.len() > 10]
+    if dedupe is not None:
+        before = len(df)
+        df = dedupe.filter(df, 'description')
+        print(f"Dropped {before - len(df)} near-duplicate postings ({dedupe.duplicates} so far)")
+    return df[['description']].rename(columns={'description': 'job_description'})
 
-def clean_and_save_data(file_paths, keywords, input_dir, output_dir):
+def clean_and_save_data(file_paths, keywords, input_dir, output_dir, fmt=DATA_FORMAT, dedupe=True, s3_client=None):
     for key, path in file_paths.items():
         print(f"\nProcessing {key} data...")
         start_time = time.time()
         
-        df = read_csv_from_s3(os.getenv('S3_BUCKET'), path)
+        df = read_csv_from_s3(os.getenv('S3_BUCKET'), path, s3_client)
         
-        # Save raw data
-        raw_path = os.path.join(input_dir, f"{key}.csv")
-        df.to_csv(raw_path, index=False)
+        # Save raw data; kept as CSV, since raw columns can hold mixed types (e.g. zip codes) a columnar file rejects
+        raw_path = write_table(df, stage_path(input_dir, key, 'csv'))
         print(f"Saved raw {key} data to {raw_path}")
         
         if key == "resumes":
             print("Cleaning resumes data...")
-            df = df.dropna(subset=['Text'])
+            df = clean_resumes(df)
             print(f"Shape after dropping NA: {df.shape}")
-            df = df.sample(n=min(1000, len(df)), random_state=1)
-            print(f"Shape after sampling: {df.shape}")
-            df = df[['Text']]
-            df = df.rename(columns={'Text': 'resume_text'})
         elif key == "job_postings":
             print("Cleaning job postings data...")
-            df = filter_by_keywords(df, 'title', keywords)
-            df = df.dropna(subset=['description'])
-            print(f"Shape after dropping NA: {df.shape}")
-            print("Cleaning description text...")
-            tqdm.pandas(desc="Cleaning text")
-            df['description'] = df['description'].progress_apply(clean_text)
-            df = df[df['description'].str.len() > 10]
+            df = clean_job_postings(df, keywords, NearDuplicateFilter(NEAR_DUPLICATE_THRESHOLD) if dedupe else None)
             print(f"Shape after filtering short descriptions: {df.shape}")
-            df = df.sample(n=min(1000, len(df)), random_state=1)
-            print(f"Shape after sampling: {df.shape}")
-            df = df[['description']]
-            df = df.rename(columns={'description': 'job_description'})
+        df = df.sample(n=min(SAMPLE_SIZE, len(df)), random_state=SAMPLE_SEED)
+        print(f"Shape after sampling: {df.shape}")
         
-        cleaned_path = os.path.join(output_dir, f"cleaned_{key}.csv")
-        df.to_csv(cleaned_path, index=False)
+        cleaned_path = write_table(df, stage_path(output_dir, f"cleaned_{key}", fmt))
         print(f"Saved cleaned {key} data to {cleaned_path}")
         
         end_time = time.time()
         print(f"Time taken to process {key}: {end_time - start_time:.2f} seconds")
 
+def clean_and_save_data_streaming(file_paths, keywords, output_dir, chunksize=DEFAULT_CHUNK_ROWS,
+                                  sample_size=SAMPLE_SIZE, seed=SAMPLE_SEED, s3_client=None, fmt=DATA_FORMAT, dedupe=True,
+                                  dedupe_window=NEAR_DUPLICATE_WINDOW):
+    """
+    Clean each source chunk by chunk and keep a seeded reservoir sample, so memory is bounded by
+    the chunk size, the sample and the deduplication window, not the source file. No raw copy is
+    written in this mode.
+
+    :param dedupe_window: Most recently seen or matched posting clusters checked for reposts (None: all of them).
+
+    :return: A dict of key -> number of cleaned rows seen.
+    """
+    matcher = KeywordMatcher(keywords)
+    # representatives are first occurrences, so only postings that survive deduplication reach the sampler
+    duplicates = NearDuplicateFilter(NEAR_DUPLICATE_THRESHOLD, max_representatives=dedupe_window) if dedupe else None
+    cleaned_counts = {}
+    for key, path in file_paths.items():
+        print(f"\nProcessing {key} data (streaming)...")
+        start_time = time.time()
+        sampler = ReservoirSampler(sample_size, seed)
+        rows = 0
+        for chunk in read_csv_chunks_from_s3(os.getenv('S3_BUCKET'), path, chunksize, SOURCE_COLUMNS.get(key), s3_client):
+            rows += len(chunk)
+            if key == "resumes":
+                sampler.add(clean_resumes(chunk))
+            elif key == "job_postings":
+                sampler.add(clean_job_postings(chunk, matcher, duplicates))
+            print(f"Read {rows} rows of {key}; {sampler.seen} kept after cleaning")
+        
+        df = sampler.to_frame()
+        cleaned_path = write_table(df, stage_path(output_dir, f"cleaned_{key}", fmt))
+        print(f"Saved {len(df)} sampled rows of {key} to {cleaned_path}")
+        cleaned_counts[key] = sampler.seen
+        
+        end_time = time.time()
+        print(f"Time taken to process {key}: {end_time - start_time:.2f} seconds")
+    return cleaned_counts
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download, clean and sample the resume and job posting datasets")
+    parser.add_argument("--stream", action="store_true", help="Process the S3 objects chunk by chunk with a reservoir sample")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNK_ROWS, help="Rows per chunk in streaming mode")
+    parser.add_argument("--keep_duplicates", action="store_true", help="Skip near-duplicate job posting removal")
+    parser.add_argument("--dedupe_window", type=int, default=NEAR_DUPLICATE_WINDOW,
+                        help="Posting clusters kept indexed for deduplication in streaming mode, about 4 KB each (default: NEAR_DUPLICATE_WINDOW or 100000)")
+    parser.add_argument("--format", choices=list(EXTENSIONS), default=DATA_FORMAT, help="Output file format (default: DATA_FORMAT or parquet)")
+    args = parser.parse_args()
+
     print("Starting data cleanup process...")
     start_time = time.time()
     
@@ -95,7 +174,11 @@ if __name__ == "__main__":
     os.makedirs(input_dir, exist_ok=True)
     os.makedirs(output_dir, exist_ok=True)
     
-    clean_and_save_data(file_paths, keywords, input_dir, output_dir)
+    if args.stream:
+        clean_and_save_data_streaming(file_paths, keywords, output_dir, chunksize=args.chunksize, fmt=args.format,
+                                      dedupe=not args.keep_duplicates, dedupe_window=args.dedupe_window)
+    else:
+        clean_and_save_data(file_paths, keywords, input_dir, output_dir, fmt=args.format, dedupe=not args.keep_duplicates)
     
     end_time = time.time()
     print(f"Data cleanup process completed in {end_time - start_time:.2f} seconds.")
\ No newline at end of file
@@ -1,84 +1,144 @@
-import pandas as pd
 import os
-from openai import OpenAI
+import sys
+from openai import OpenAI, APIConnectionError, APIError, RateLimitError
 from dotenv import load_dotenv
 import argparse
 from tqdm import tqdm
 import time
+from tenacity import (
+    retry,
+    stop_after_attempt,
+    wait_random_exponential,
+    retry_if_exception_type
+)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from util.generation_engine import GenerationEngine, estimate_request_tokens, openai_client_options
+from util.completion_cache import get_completion_cache, cached_completion
+from util.csv_stream import iter_pairs, open_table_writer, DEFAULT_CHUNK_ROWS
+from util.table_io import DATA_FORMAT, stage_path, resolve_path
+from util.pairing import iter_similar_pairs
+from util.prompt_templates import render_prompt
+from util.prompt_budget import budget_inputs, count_tokens, token_usage, DEFAULT_INPUT_TOKEN_BUDGET
 
 load_dotenv()
 
-def generate_optimized_resume(client, resume, job_description):
-    prompt = (
-        f"Given the following resume:\n\n{resume}\n\n"
-        f"and the job description:\n\n{job_description}\n\n"
-        "Generate an optimized resume to better fit the job description."
-    )
+MODEL = "gpt-3.5-turbo-0125"
+# no max_tokens is sent, so budget the model's whole default completion for rate limiting
+EXPECTED_COMPLETION_TOKENS = 1000
+SYSTEM_PROMPT = "You are a helpful assistant skilled in optimizing resumes."
+PROMPT_TEMPLATE = "optimized_resume_v1"
+
+engine = GenerationEngine.from_env()
+
+def build_prompt(resume, job_description):
+    return render_prompt(PROMPT_TEMPLATE, {"resume_text": resume, "job_description": job_description})
+
+def build_request_body(prompt):
+    return {
+        "model": MODEL,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+    }
+
+@retry(
+    wait=wait_random_exponential(min=1, max=60),
+    stop=stop_after_attempt(6),
+    retry=retry_if_exception_type((APIConnectionError, APIError, RateLimitError)),
+    before_sleep=engine.before_retry_sleep
+)
+def request_completion(client, body, prompt_tokens=None):
+    engine.throttle(prompt_tokens + EXPECTED_COMPLETION_TOKENS if prompt_tokens
+                    else estimate_request_tokens(body["messages"][-1]["content"], EXPECTED_COMPLETION_TOKENS))
+    return client.chat.completions.create(**body)
+
+def generate_optimized_resume(client, resume, job_description, input_token_budget=DEFAULT_INPUT_TOKEN_BUDGET):
+    """
+    :return: (generated resume, prompt, token usage), or (None, None, None) on failure.
+    """
+    resume, job_description, budget_stats = budget_inputs(resume, job_description, MODEL, input_token_budget)
+    prompt = build_prompt(resume, job_description)
+    prompt_tokens = count_tokens(SYSTEM_PROMPT, MODEL) + count_tokens(prompt, MODEL)
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo-0125",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant skilled in optimizing resumes."},
-                {"role": "user", "content": prompt}
-            ]
-        )
-        return response.choices[0].message.content, prompt
+        entry = cached_completion(get_completion_cache(), build_request_body(prompt),
+                                  lambda body: request_completion(client, body, prompt_tokens))
+        return entry["content"], prompt, token_usage(entry, prompt_tokens, MODEL, budget_stats)
     except Exception as e:
         print(f"An error occurred while generating the optimized resume: {e}")
-        return None, None
+        return None, None, None
+
+OUTPUT_COLUMNS = ['resume_text', 'job_description', 'generated_resume', 'prompt', 'input_tokens', 'output_tokens']
 
-def main(num_resumes=None):
+def main(num_resumes=None, concurrency=None, input_token_budget=DEFAULT_INPUT_TOKEN_BUDGET, chunksize=DEFAULT_CHUNK_ROWS, fmt=DATA_FORMAT,
+         pairing='positional', top_k=1):
     print("Initializing OpenAI client...")
-    client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-    
-    print("Reading processed data...")
-    resumes_df = pd.read_csv('data/processed/cleaned_resumes.csv')
-    job_postings_df = pd.read_csv('data/processed/cleaned_job_postings.csv')
+    client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'), **openai_client_options())
+    if concurrency:
+        engine.set_max_concurrency(concurrency)
     
-    print(f"Resume count: {len(resumes_df)}")
-    print(f"Job posting count: {len(job_postings_df)}")
+    resumes_path = resolve_path('data/processed', 'cleaned_resumes')
+    job_postings_path = resolve_path('data/processed', 'cleaned_job_postings')
+    if pairing == 'similarity':
+        print(f"Pairing each resume with its {top_k} most similar job(s), scoring {chunksize} resumes at a time...")
+        pairs = iter_similar_pairs(resumes_path, job_postings_path, top_k=top_k, limit=num_resumes, chunksize=chunksize)
+        total_pairs = num_resumes * top_k if num_resumes else None
+    else:
+        print(f"Streaming resume-job pairs from {resumes_path} and {job_postings_path} in chunks of {chunksize} rows...")
+        pairs = iter_pairs(resumes_path, job_postings_path, limit=num_resumes, chunksize=chunksize)
+        total_pairs = num_resumes
+    # pairs are read lazily; engine.run only pulls a bounded window of them ahead of the workers
     
-    # Ensure we have an equal number of resumes and job postings
-    min_count = min(len(resumes_df), len(job_postings_df))
-    if num_resumes:
-        min_count = min(min_count, num_resumes)
-    
-    resumes_df = resumes_df.head(min_count)
-    job_postings_df = job_postings_df.head(min_count)
-    
-    print(f"Processing {min_count} resume-job pairs...")
-    
-    results = []
+    def generate(pair):
+        return generate_optimized_resume(client, *pair, input_token_budget=input_token_budget)
+
+    output_path = stage_path('data/output', 'resumes_post_edit', fmt)
+    generated = processed = input_tokens = output_tokens = 0
     start_time = time.time()
-    
-    with tqdm(total=min_count, desc="Generating Resumes", unit="pair") as pbar:
-        for (_, resume_row), (_, job_row) in zip(resumes_df.iterrows(), job_postings_df.iterrows()):
-            generated_resume, prompt = generate_optimized_resume(client, resume_row['resume_text'], job_row['job_description'])
+
+    with open_table_writer(output_path, OUTPUT_COLUMNS) as writer, \
+            tqdm(total=total_pairs, desc="Generating Resumes", unit="pair") as pbar:
+        for (resume_text, job_description), outcome, error in engine.run(pairs, generate):
+            processed += 1
+            generated_resume, prompt, usage = outcome if not error else (None, None, None)
             if generated_resume:
-                results.append({
-                    'resume_text': resume_row['resume_text'],
-                    'job_description': job_row['job_description'],
+                writer.write({
+                    'resume_text': resume_text,
+                    'job_description': job_description,
                     'generated_resume': generated_resume,
-                    'prompt': prompt
+                    'prompt': prompt,
+                    'input_tokens': usage['input_tokens'],
+                    'output_tokens': usage['output_tokens']
                 })
+                generated += 1
+                input_tokens += usage['input_tokens']
+                output_tokens += usage['output_tokens']
             pbar.update(1)
     
     end_time = time.time()
     elapsed_time = end_time - start_time
     
-    print(f"\nGenerated {len(results)} optimized resumes.")
+    print(f"\nGenerated {generated} optimized resumes from {processed} pairs.")
     print(f"Total time taken: {elapsed_time:.2f} seconds")
-    print(f"Average time per resume: {elapsed_time/len(results):.2f} seconds")
-    
-    output_df = pd.DataFrame(results)
-    os.makedirs('data/output', exist_ok=True)
-    output_path = 'data/output/resumes_post_edit.csv'
-    output_df.to_csv(output_path, index=False)
+    print(f"Average time per resume: {elapsed_time/max(generated, 1):.2f} seconds")
+    print(f"Input tokens: {input_tokens}, output tokens: {output_tokens}")
+    cache = get_completion_cache()
+    if cache:
+        print(f"Completion cache: {cache.stats()}")
     print(f"Results saved to {output_path}")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Generate optimized resumes")
     parser.add_argument("--num_resumes", type=int, help="Number of resumes to process (default: all)")
+    parser.add_argument("--concurrency", type=int, help="Maximum concurrent API requests (default: OPENAI_MAX_CONCURRENCY or 8)")
+    parser.add_argument("--input_token_budget", type=int, default=DEFAULT_INPUT_TOKEN_BUDGET,
+                        help="Token budget for resume plus job description (default: PROMPT_INPUT_TOKEN_BUDGET or 3000)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNK_ROWS, help="Rows read per chunk (default: CSV_CHUNK_ROWS or 500)")
+    parser.add_argument("--pairing", choices=["positional", "similarity"], default="positional",
+                        help="Pair resume i with job i, or each resume with its most similar jobs by TF-IDF (default: positional)")
+    parser.add_argument("--top_k", type=int, default=1, help="Jobs paired with each resume in similarity pairing (default: 1)")
+    parser.add_argument("--format", choices=["parquet", "csv"], default=DATA_FORMAT, help="Output file format (default: DATA_FORMAT or parquet)")
     args = parser.parse_args()
     
-    main(num_resumes=args.num_resumes)
\ No newline at end of file
+    main(num_resumes=args.num_resumes, concurrency=args.concurrency, input_token_budget=args.input_token_budget, chunksize=args.chunksize, fmt=args.format,
+         pairing=args.pairing, top_k=args.top_k)
\ No newline at end of file
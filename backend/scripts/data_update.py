@@ -3,12 +3,16 @@ import time
 import sys
 import signal
 from datetime import datetime, timedelta
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from dotenv import load_dotenv
 from pymongo import MongoClient, ReturnDocument
 from bson.objectid import ObjectId
 from colorama import init, Fore, Style
 import certifi
 import pytz
+from util.collection_versions import bump_collection_version
+from util.trend_rollup import record_document_change
+from util.text_store import text_resolver
 
 init()
 
@@ -51,13 +55,16 @@ def find_and_claim_document(collection):
         document = collection.find_one_and_update(
             {
                 "claiming": {"$exists": False},
-                "didBy": {"$exists": False}
+                "didBy": {"$exists": False},
+                # documents the auto-scorer was confident about are left out; unscored ones still come up
+                "needs_review": {"$ne": False}
             },
             {"$set": {"claiming": True}},
             sort=[('_id', 1)],
             return_document=ReturnDocument.AFTER
         )
         if document:
+            text_resolver.resolve_documents(collection.database, [document])
             current_document_id = document['_id']
             print_colored(f"Found and claimed document with ID: {current_document_id}", Fore.GREEN)
         else:
@@ -81,14 +88,18 @@ def reset_claiming_status(collection, document_id):
 def update_documents(collection, document_id, update_data):
     print_colored("Updating document...", Fore.CYAN)
     try:
-        result = collection.update_one(
+        # the previous values let the trend summary be updated by difference instead of re-aggregated
+        before = collection.find_one_and_update(
             {"_id": ObjectId(document_id)},
             {
                 "$set": update_data,
                 "$unset": {"claiming": ""}
-            }
+            },
+            return_document=ReturnDocument.BEFORE
         )
-        if result.modified_count > 0:
+        if before is not None and any(before.get(field) != value for field, value in update_data.items()):
+            bump_collection_version(collection.database, collection.name)
+            record_document_change(collection.database, collection.name, before, {**before, **update_data})
             print_colored(f"Successfully updated document with ID: {document_id}.", Fore.GREEN)
         else:
             print_colored("No document was updated. The document may already have the same values.", Fore.YELLOW)
@@ -138,6 +149,8 @@ def display_document(document):
     display_paginated_text(document.get('resume_text', 'N/A'), "Resume Text")
     display_paginated_text(document.get('job_description', 'N/A'), "Job Description")
     display_paginated_text(document.get('generated_resume', 'N/A'), "Generated Resume")
+    if 'auto_score' in document:
+        print_colored(f"Auto score: {document['auto_score']} (details: {document.get('auto_score_details')})", Fore.MAGENTA)
     print_colored("="*50 + "\n", Fore.CYAN)
 
 def edit_document(collection, document):
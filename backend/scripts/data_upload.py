@@ -1,11 +1,14 @@
-import pandas as pd
 from pymongo import MongoClient
 import os
+import sys
+import argparse
 from dotenv import load_dotenv
-from tqdm import tqdm
 import time
 import urllib.parse
 import certifi
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from util.mongo_util import bulk_upsert, DEFAULT_WRITE_BATCH_SIZE
+from util.table_io import resolve_path, read_table
 
 load_dotenv()
 
@@ -21,22 +24,20 @@ def get_mongo_client():
     return MongoClient(mongo_uri, tlsCAFile=certifi.where())
 
 
-def upload_to_mongodb(collection, records):
-    print(f"Uploading {len(records)} records to MongoDB...")
+def upload_to_mongodb(collection, records, batch_size=DEFAULT_WRITE_BATCH_SIZE):
+    print(f"Uploading {len(records)} records to MongoDB in batches of {batch_size}...")
     start_time = time.time()
     
-    for record in tqdm(records, desc="Uploading", unit="record"):
-        try:
-            collection.insert_one(record)
-        except Exception as e:
-            print(f"Error uploading record: {e}")
+    stats = bulk_upsert(collection, records, batch_size)
     
     end_time = time.time()
     elapsed_time = end_time - start_time
     print(f"Upload completed in {elapsed_time:.2f} seconds")
-    print(f"Average time per record: {elapsed_time/len(records):.4f} seconds")
+    print(f"Inserted {stats['inserted']} new records, {stats['existing']} already present, {stats['failed']} failed")
+    print(f"Average time per record: {elapsed_time/max(len(records), 1):.4f} seconds")
+    return stats
 
-def main():
+def main(batch_size=DEFAULT_WRITE_BATCH_SIZE):
     print("Starting data upload process...")
     
     client = get_mongo_client()
@@ -51,16 +52,16 @@ def main():
         print(f"Accessing collection: {collection_name}")
         collection = db[collection_name]
         
-        input_file = 'data/output/resumes_post_edit.csv'
+        input_file = resolve_path('data/output', 'resumes_post_edit')
         print(f"Reading data from {input_file}...")
         
-        df = pd.read_csv(input_file)
+        df = read_table(input_file)
         print(f"Successfully read {len(df)} records from {input_file}")
         
         print("Converting DataFrame to list of dictionaries...")
         records = df.to_dict('records')
         
-        upload_to_mongodb(collection, records)
+        upload_to_mongodb(collection, records, batch_size)
         
         print("Checking total documents in the collection...")
         total_docs = collection.count_documents({})
@@ -77,4 +78,9 @@ def main():
     print("Data upload process completed.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Upload generated resumes to MongoDB")
+    parser.add_argument("--batch_size", type=int, default=DEFAULT_WRITE_BATCH_SIZE,
+                        help="Documents per bulk write (default: MONGO_WRITE_BATCH_SIZE or 500)")
+    args = parser.parse_args()
+
+    main(batch_size=args.batch_size)
\ No newline at end of file
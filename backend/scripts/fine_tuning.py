@@ -2,19 +2,29 @@
 
 import os
 import sys
-import time
 import json
+import argparse
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from openai import OpenAI
 from tqdm import tqdm
 from dotenv import load_dotenv
 from util.mongo_util import MongoUtil
+from util.trend_rollup import refresh_collection_summary
+from util.generation_engine import GenerationEngine, estimate_request_tokens, openai_client_options
+from util.batch_client import OpenAIBatchService, BatchFailedError, build_batch_request, write_batch_file, run_batch
+from util.completion_cache import get_completion_cache, cached_completion
+from util.prompt_budget import budget_inputs, count_tokens, token_usage, DEFAULT_INPUT_TOKEN_BUDGET
+from util.prompt_templates import render_prompt
+from util.text_store import text_id, store_texts, text_resolver
+from util.pipeline_runs import run_id, start_run, record_progress, clear_fields, finish_run
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from datetime import datetime, timedelta
 from tenacity import (
     retry,
     stop_after_attempt,
     wait_random_exponential,
-    retry_if_exception_type
+    retry_if_exception_type,
+    RetryError
 )
 from openai import APIConnectionError, APIError, RateLimitError
 
@@ -24,62 +34,284 @@ api_key = os.getenv('OPENAI_API_KEY')
 if not api_key:
     raise ValueError("OPENAI_API_KEY is not set in the environment variables")
 
-client = OpenAI(api_key=api_key)
+client = OpenAI(api_key=api_key, **openai_client_options())
+engine = GenerationEngine.from_env()
+
+MODEL = "gpt-3.5-turbo"
+MAX_TOKENS = int(os.getenv('FINE_TUNING_MAX_TOKENS', 1500))
+INPUT_TOKEN_BUDGET = DEFAULT_INPUT_TOKEN_BUDGET
+TEMPERATURE = 0.7
+SYSTEM_PROMPT = "You are a LaTeX resume generator. Output only LaTeX code."
+PROMPT_TEMPLATE = "latex_resume_v1"
+INSERT_BATCH_SIZE = 500
+CHECKPOINT_EVERY = 25
+DUPLICATE_KEY_ERROR = 11000
+
+def build_prompt(resume_text, job_description):
+    return render_prompt(PROMPT_TEMPLATE, {"resume_text": resume_text, "job_description": job_description})
+
+def prepare_prompt(resume_text, job_description):
+    """
+    Compact and budget the inputs, then render the prompt.
+
+    :return: (prompt, locally counted prompt tokens, budget stats, prompt params) where the params are
+             the budgeted texts the prompt was rendered from.
+    """
+    resume_text, job_description, budget_stats = budget_inputs(resume_text, job_description, MODEL, INPUT_TOKEN_BUDGET)
+    prompt = build_prompt(resume_text, job_description)
+    prompt_params = {"resume_text": resume_text, "job_description": job_description}
+    return prompt, count_tokens(SYSTEM_PROMPT, MODEL) + count_tokens(prompt, MODEL), budget_stats, prompt_params
+
+def build_request_body(prompt):
+    return {
+        "model": MODEL,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        "max_tokens": MAX_TOKENS,
+        "temperature": TEMPERATURE
+    }
 
 @retry(
     wait=wait_random_exponential(min=1, max=60),
     stop=stop_after_attempt(6),
-    retry=retry_if_exception_type((APIConnectionError, APIError, RateLimitError))
+    retry=retry_if_exception_type((APIConnectionError, APIError, RateLimitError)),
+    before_sleep=engine.before_retry_sleep
 )
-def generate_optimized_resume(resume_text, job_description):
-    prompt = (
-        "You are an AI resume optimizer. Your task is to create a highly optimized, ATS-friendly resume in LaTeX format based on the given original resume and job description. "
-        "Follow these strict guidelines:\n\n"
-        "1. Output ONLY the LaTeX code for the resume. Do not include any explanations, comments, or additional text.\n"
-        "2. Use the following LaTeX structure:\n"
-        "   \\documentclass[11pt,a4paper]{article}\n"
-        "   \\usepackage[margin=1in]{geometry}\n"
-        "   \\usepackage{titlesec}\n"
-        "   \\usepackage{enumitem}\n"
-        "   \\begin{document}\n"
-        "   ... (resume content) ...\n"
-        "   \\end{document}\n"
-        "3. Include these sections in order: Education, Work Experience, Skills, and Certifications (if applicable).\n"
-        "4. Use \\section{} for main headings and \\subsection{} for subheadings.\n"
-        "5. Use itemize environments for bullet points.\n"
-        "6. Incorporate relevant keywords from the job description naturally throughout the resume.\n"
-        "7. Quantify achievements and responsibilities where possible.\n"
-        "8. Ensure all information is truthful and accurately represents the original resume.\n"
-        "9. Optimize the content for high ATS scores while maintaining readability.\n"
-        "10. Do not include any personal contact information.\n\n"
-        "Original Resume:\n"
-        f"{resume_text}\n\n"
-        "Job Description:\n"
-        f"{job_description}\n\n"
-        "Generate the LaTeX resume now, starting with \\documentclass and ending with \\end{document}. Include ONLY the LaTeX code."
-    )
-    
+def request_completion(body, prompt_tokens=None):
+    engine.throttle(prompt_tokens + MAX_TOKENS if prompt_tokens else estimate_request_tokens(body["messages"][-1]["content"], MAX_TOKENS))
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a LaTeX resume generator. Output only LaTeX code."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=1500,
-            temperature=0.7
-        )
-        generated_resume = response.choices[0].message.content.strip()
-        return generated_resume, prompt
+        return client.chat.completions.create(**body)
     except (APIConnectionError, APIError, RateLimitError) as e:
         print(f"An error occurred while generating the optimized resume: {e}")
         raise
+
+def generate_optimized_resume(resume_text, job_description, cache_scope=None):
+    """
+    :param cache_scope: Completion cache namespace; see run_cache_scope.
+    :return: (generated resume, prompt params, token usage), or (None, None, None) on unexpected errors.
+    """
+    prompt, prompt_tokens, budget_stats, prompt_params = prepare_prompt(resume_text, job_description)
+    try:
+        entry = cached_completion(get_completion_cache(), build_request_body(prompt),
+                                  lambda body: request_completion(body, prompt_tokens), cache_scope)
+        return entry["content"].strip(), prompt_params, token_usage(entry, prompt_tokens, MODEL, budget_stats)
+    except (APIConnectionError, APIError, RateLimitError, RetryError):
+        raise
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
-        return None, None
+        return None, None, None
+
+def run_cache_scope(today_collection_name):
+    """
+    Completion cache namespace for one day's run. The previous day's inputs are copied forward, so the
+    prompts repeat every night; scoping by target collection lets a restarted run reuse its own
+    completions while each new day still generates fresh ones.
+    """
+    return run_id('fine_tuning', today_collection_name)
+
+def document_texts(doc, prompt_params):
+    return [doc.get('resume_text', ''), doc.get('job_description', ''), *prompt_params.values()]
+
+def build_generated_document(doc, generated_resume, prompt_params, tz, usage=None):
+    """
+    The stored form of a generated resume: texts are referenced by id (see util/text_store.py) and the
+    prompt is kept as its template id plus parameters, so nothing is copied from the previous day.
+    The texts themselves must be written with store_texts(db, document_texts(doc, prompt_params)).
+    """
+    new_doc = {
+        "resume_text_ref": text_id(doc.get('resume_text', '')),
+        "job_description_ref": text_id(doc.get('job_description', '')),
+        "generated_resume": generated_resume,
+        "prompt_template": PROMPT_TEMPLATE,
+        "prompt_params": {name: text_id(text) for name, text in prompt_params.items()},
+        "original_id": doc['_id'],
+        "created_at": datetime.now(tz)
+    }
+    if usage:
+        new_doc["token_usage"] = usage
+    return new_doc
+
+def generate_and_store_sync(documents, today_collection, tz, on_progress=None):
+    """
+    Generate and insert one document at a time, reporting progress every CHECKPOINT_EVERY documents.
+
+    :param on_progress: Called with (stored, failed) counts since the previous call.
+    :return: The number of documents stored.
+    """
+    print(f"Processing {len(documents)} documents with up to {engine.max_concurrency} concurrent requests...")
+    def generate(doc):
+        return generate_optimized_resume(doc.get('resume_text', ''), doc.get('job_description', ''), run_cache_scope(today_collection.name))
+
+    stored = failed = total_stored = 0
+    tokens = {"input_tokens": 0, "output_tokens": 0, "truncated": 0}
+    for doc, outcome, error in tqdm(engine.run(documents, generate), total=len(documents), desc="Fine-tuning resumes", unit="resume"):
+        generated_resume, prompt_params, usage = outcome if not error else (None, None, None)
+        if error:
+            print(f"Error processing document with ID: {doc['_id']}. Error: {error}")
+            failed += 1
+        elif generated_resume:
+            for key in tokens:
+                tokens[key] += usage[key]
+            new_doc = build_generated_document(doc, generated_resume, prompt_params, tz, usage)
+            try:
+                store_texts(today_collection.database, document_texts(doc, prompt_params))
+                today_collection.insert_one(new_doc)
+                stored += 1
+                print(f"Stored new document in '{today_collection.name}' with original ID: {doc['_id']}")
+            except DuplicateKeyError:
+                print(f"Document with original ID {doc['_id']} is already in '{today_collection.name}'. Skipping.")
+        else:
+            print(f"Failed to generate optimized resume for document with ID: {doc['_id']}")
+            failed += 1
+
+        if on_progress and stored + failed >= CHECKPOINT_EVERY:
+            on_progress(stored, failed)
+            total_stored += stored
+            stored = failed = 0
+
+    if on_progress and stored + failed:
+        on_progress(stored, failed)
+    total_stored += stored
+
+    print(f"Rate limited {engine.concurrency.rate_limited} times; final concurrency {engine.concurrency.limit}.")
+    print(f"Used {tokens['input_tokens']} input and {tokens['output_tokens']} output tokens; "
+          f"{tokens['truncated']} completions hit max_tokens ({MAX_TOKENS}).")
+    cache = get_completion_cache()
+    if cache:
+        print(f"Completion cache: {cache.stats()}")
+    return total_stored
+
+def generate_in_batch(documents, service, request_path, poll_interval=60, batch_id=None, on_submit=None, cache_scope=None):
+    """
+    Generate resumes for all documents through one batch job.
+
+    :param documents: Previous day's documents.
+    :param service: A batch service (OpenAIBatchService, or LocalBatchService in tests).
+    :param request_path: Where to write the JSONL request file.
+    :param batch_id: A batch submitted by an earlier, interrupted run to wait for instead of submitting again.
+    :param on_submit: Called with the id of a newly submitted batch.
+    :param cache_scope: Completion cache namespace; see run_cache_scope.
+    :return: A list of (document, generated_resume or None, prompt params, error or None, token usage or None).
+    """
+    cache = get_completion_cache()
+    prompts = {str(doc['_id']): prepare_prompt(doc.get('resume_text', ''), doc.get('job_description', '')) for doc in documents}
+    results = {}
+    pending = {}
+    for custom_id, (prompt, _, _, _) in prompts.items():
+        entry = cache.get(build_request_body(prompt), cache_scope) if cache else None
+        if entry:
+            results[custom_id] = (entry, None)
+        else:
+            pending[custom_id] = prompt
+    print(f"{len(results)} of {len(prompts)} completions found in the cache.")
+
+    if pending:
+        if not batch_id:
+            count = write_batch_file(request_path, (build_batch_request(custom_id, build_request_body(prompt)) for custom_id, prompt in pending.items()))
+            print(f"Wrote {count} batch requests to {request_path}")
+        batch_results = run_batch(service, request_path, poll_interval=poll_interval, batch_id=batch_id, on_submit=on_submit)
+        for custom_id, (entry, error) in batch_results.items():
+            if cache and entry and entry["content"] and custom_id in pending:
+                cache.put(build_request_body(pending[custom_id]), entry, cache_scope)
+        results.update(batch_results)
+
+    outcomes = []
+    for doc in documents:
+        custom_id = str(doc['_id'])
+        _, prompt_tokens, budget_stats, prompt_params = prompts[custom_id]
+        entry, error = results.get(custom_id, (None, "missing from batch output"))
+        if entry and entry["content"]:
+            outcomes.append((doc, entry["content"].strip(), prompt_params, error, token_usage(entry, prompt_tokens, MODEL, budget_stats)))
+        else:
+            outcomes.append((doc, None, prompt_params, error, None))
+    return outcomes
+
+def store_batch_outcomes(outcomes, today_collection, tz):
+    new_docs = []
+    texts = []
+    for doc, generated_resume, prompt_params, error, usage in outcomes:
+        if generated_resume:
+            new_docs.append(build_generated_document(doc, generated_resume, prompt_params, tz, usage))
+            texts.extend(document_texts(doc, prompt_params))
+        else:
+            print(f"Failed to generate optimized resume for document with ID: {doc['_id']}. Error: {error}")
+    if texts:
+        store_texts(today_collection.database, texts)
+    stored = 0
+    for start in range(0, len(new_docs), INSERT_BATCH_SIZE):
+        chunk = new_docs[start:start + INSERT_BATCH_SIZE]
+        try:
+            stored += len(today_collection.insert_many(chunk, ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            # documents already stored by an interrupted run are rejected by the unique original_id index
+            if any(error["code"] != DUPLICATE_KEY_ERROR for error in e.details["writeErrors"]):
+                raise
+            stored += e.details["nInserted"]
+            print(f"Skipped {len(e.details['writeErrors'])} documents already in '{today_collection.name}'")
+    print(f"Stored {stored} new documents in '{today_collection.name}'")
+    return stored
 
-def fine_tune_and_store():
-    result = {}
+def run_fine_tuning(db, prev_collection_name, today_collection_name, tz, mode='sync', batch_service=None, poll_interval=60):
+    """
+    Generate today's collection from the previous day's, resuming wherever an earlier run stopped.
+
+    Documents whose _id already appears as an original_id in today's collection are skipped, and a
+    unique index on original_id keeps concurrent or repeated runs from storing duplicates. Progress
+    (and the id of an in-flight batch) is checkpointed in the pipeline_runs collection.
+
+    :return: The result dict written to /tmp/fine_tuning_result.json.
+    """
+    prev_collection = db[prev_collection_name]
+    today_collection = db[today_collection_name]
+    today_collection.create_index('original_id', unique=True)
+
+    done_ids = today_collection.distinct('original_id')
+    print(f"Fetching documents from previous day's collection: {prev_collection.name}")
+    documents = text_resolver.resolve_documents(db, list(prev_collection.find({'_id': {'$nin': done_ids}})))
+    print(f"{len(done_ids)} documents already stored in '{today_collection_name}', {len(documents)} remaining.")
+
+    previous_run, run = start_run(db, 'fine_tuning', prev_collection_name, today_collection_name, mode=mode, remaining=len(documents))
+    if not documents:
+        status = 'completed' if done_ids else 'no_documents'
+        if not done_ids:
+            print(f"No documents found in the previous day's collection.")
+        finish_run(db, run, status=status)
+        return {'status': status, 'collection': today_collection_name}
+
+    if mode == 'batch':
+        request_path = f"/tmp/fine_tuning_batch_{today_collection_name}.jsonl"
+        try:
+            outcomes = generate_in_batch(
+                documents, batch_service or OpenAIBatchService(client), request_path, poll_interval,
+                batch_id=previous_run.get('batch_id'),
+                on_submit=lambda batch_id: record_progress(db, run, batch_id=batch_id),
+                cache_scope=run_cache_scope(today_collection_name)
+            )
+        except BatchFailedError as e:
+            # the batch is dead; forget it so the next run submits a new one instead of waiting on it again
+            clear_fields(db, run, 'batch_id')
+            finish_run(db, run, status='failed', error=str(e))
+            raise
+        except Exception as e:
+            # e.g. a polling timeout: the batch may still finish, so keep its id for the next run to reattach
+            finish_run(db, run, status='failed', error=str(e))
+            raise
+        stored = store_batch_outcomes(outcomes, today_collection, tz)
+        record_progress(db, run, stored=stored, failed=len(outcomes) - stored)
+        clear_fields(db, run, 'batch_id')
+    else:
+        generate_and_store_sync(documents, today_collection, tz,
+                                on_progress=lambda stored, failed: record_progress(db, run, stored=stored, failed=failed))
+
+    print(f"Completed fine-tuning and storing in the collection '{today_collection_name}'.")
+    refresh_collection_summary(db, today_collection_name)
+    print(f"Updated score trend summary for '{today_collection_name}'.")
+    finish_run(db, run)
+    return {'status': 'completed', 'collection': today_collection_name}
+
+def fine_tune_and_store(mode='sync', batch_service=None, poll_interval=60):
     print("Starting fine-tuning and storing process...")
     mongo_util = MongoUtil()
     
@@ -93,67 +325,24 @@ def fine_tune_and_store():
         prev_day -= timedelta(days=1)
 
     today_collection_name = today.strftime('%B-%d-resumes').lower()
+    result = run_fine_tuning(mongo_util.db, prev_collection_name, today_collection_name, mongo_util.pst,
+                             mode=mode, batch_service=batch_service, poll_interval=poll_interval)
 
-    
-    if today_collection_name in mongo_util.db.list_collection_names():
-        print(f"Collection '{today_collection_name}' already exists. Stopping script execution.")
-        result['status'] = 'stopped'
-        result['reason'] = f"Collection '{today_collection_name}' already exists."
-        with open('/tmp/fine_tuning_result.json', 'w') as f:
-            json.dump(result, f)
-        return
-
-    prev_collection = mongo_util.db[prev_collection_name]
-    today_collection = mongo_util.get_or_create_collection(today_collection_name)
-
-    print(f"Fetching documents from previous day's collection: {prev_collection.name}")
-    documents = mongo_util.fetch_documents(prev_collection)
-    if not documents:
-        print(f"No documents found in the previous day's collection.")
-        result['status'] = 'no_documents'
-        with open('/tmp/fine_tuning_result.json', 'w') as f:
-            json.dump(result, f)
-        return
-
-    print(f"Processing {len(documents)} documents...")
-    for doc in tqdm(documents, desc="Fine-tuning resumes", unit="resume"):
-        resume_text = doc.get('resume_text', '')
-        job_description = doc.get('job_description', '')
-        try:
-            generated_resume, prompt = generate_optimized_resume(resume_text, job_description)
-
-            if generated_resume:
-                new_doc = {
-                    "resume_text": resume_text,
-                    "job_description": job_description,
-                    "generated_resume": generated_resume,
-                    "prompt": prompt,
-                    "original_id": doc['_id'],
-                    "created_at": datetime.now(mongo_util.pst)  
-                }
-                mongo_util.insert_document(today_collection, new_doc)
-                print(f"Stored new document in '{today_collection_name}' with original ID: {doc['_id']}")
-            else:
-                print(f"Failed to generate optimized resume for document with ID: {doc['_id']}")
-        except Exception as e:
-            print(f"Error processing document with ID: {doc['_id']}. Error: {e}")
-            continue
-
-        time.sleep(1)
-
-    print(f"Completed fine-tuning and storing in the collection '{today_collection_name}'.")
     mongo_util.close_connection()
     print("Closed MongoDB connection. Process complete.")
-
-    result['status'] = 'completed'
-    result['collection'] = today_collection_name
     with open('/tmp/fine_tuning_result.json', 'w') as f:
         json.dump(result, f)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Regenerate the previous day's resumes into today's collection")
+    parser.add_argument("--mode", choices=["sync", "batch"], default=os.getenv('FINE_TUNING_MODE', 'sync'),
+                        help="'sync' calls the API per document; 'batch' submits one Batch API job (default: FINE_TUNING_MODE or sync)")
+    parser.add_argument("--poll_interval", type=int, default=60, help="Seconds between batch status checks")
+    args = parser.parse_args()
+
     print("Starting fine_tuning.py script...")
     try:
-        fine_tune_and_store()
+        fine_tune_and_store(mode=args.mode, poll_interval=args.poll_interval)
     except Exception as e:
         print(f"An error occurred during script execution: {e}")
     print("fine_tuning.py script execution completed.")
\ No newline at end of file
@@ -0,0 +1,41 @@
+import unittest
+import sys
+import os
+import pandas as pd
+from colorama import init, Fore
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from util.ats_scorer import score_resumes, plain_text
+init(autoreset=True)
+
+JOB = "Data engineer with Python, SQL, Spark and Airflow experience building ETL pipelines on AWS."
+
+def latex_resume(skills, bullets=45, sections=("Education", "Work Experience", "Skills")):
+    body = "\n".join(f"\\section{{{name}}}\n\\begin{{itemize}}\n" + "\n".join(
+        f"  \\item Delivered project {i} using {skills} for analytics teams" for i in range(bullets // len(sections))
+    ) + "\n\\end{itemize}" for name in sections)
+    return "\\documentclass[11pt]{article}\n\\begin{document}\n" + body + "\n\\end{document}"
+
+class TestATSScorer(unittest.TestCase):
+    def test_plain_text_drops_latex(self):
+        words = plain_text(pd.Series(["\\section{Skills}\\begin{itemize}\\item Python \\& SQL\\end{itemize}"]))
+        self.assertEqual(words[0], "Skills Python SQL")
+
+    def test_ranks_matching_resume_above_poor_one(self):
+        resumes = pd.Series([
+            latex_resume("Python, SQL, Spark, Airflow ETL pipelines on AWS"),
+            latex_resume("watercolor painting", bullets=3, sections=("Hobbies",)),
+            "Plain text resume without any LaTeX. Contact me at jane@example.com",
+        ])
+        scores = score_resumes(resumes, pd.Series([JOB] * 3))
+        print(f"{Fore.GREEN}Scores:\n{scores}")
+        good, poor, plain = scores.to_dict('records')
+        self.assertGreater(good["auto_score"], 75)
+        self.assertLess(poor["auto_score"], 40)
+        self.assertEqual(good["sections"], 1.0)
+        self.assertEqual(poor["sections"], 0.0)
+        self.assertGreater(good["coverage"], poor["coverage"])
+        self.assertFalse(good["needs_review"])
+        self.assertTrue(plain["needs_review"])
+
+if __name__ == "__main__":
+    unittest.main()
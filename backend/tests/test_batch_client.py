@@ -0,0 +1,70 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+import mongomock
+import pytz
+from colorama import init, Fore
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault('OPENAI_API_KEY', 'test-key')
+os.environ.setdefault('COMPLETION_CACHE', 'off')
+from util.batch_client import LocalBatchService, build_batch_request, write_batch_file, run_batch
+from util.text_store import TextResolver
+from scripts import fine_tuning
+init(autoreset=True)
+
+def respond(body):
+    prompt = body["messages"][-1]["content"]
+    if "FAIL" in prompt:
+        raise ValueError("simulated failure")
+    return "  \\documentclass{article}\\begin{document}" + prompt[-12:] + "\\end{document}  "
+
+class TestBatchClient(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "requests.jsonl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_run_batch_maps_results_by_custom_id(self):
+        requests = [build_batch_request(f"doc-{i}", {"messages": [{"role": "user", "content": f"prompt {i}"}]}) for i in range(3)]
+        self.assertEqual(write_batch_file(self.path, requests), 3)
+        with open(self.path) as f:
+            self.assertEqual(json.loads(f.readline())["url"], "/v1/chat/completions")
+
+        sleeps = []
+        results = run_batch(LocalBatchService(respond, polls_until_complete=2), self.path, poll_interval=5, sleep=sleeps.append)
+        print(f"{Fore.GREEN}Results: {sorted(results)}, sleeps: {sleeps}")
+        self.assertEqual(sorted(results), ["doc-0", "doc-1", "doc-2"])
+        self.assertIn("prompt 1", results["doc-1"][0]["content"])
+        self.assertEqual(results["doc-1"][0]["finish_reason"], "stop")
+        self.assertEqual(sleeps, [5, 5])
+
+    def test_failed_requests_are_reported(self):
+        write_batch_file(self.path, [build_batch_request("bad", {"messages": [{"role": "user", "content": "FAIL"}]})])
+        results = run_batch(LocalBatchService(respond, polls_until_complete=0), self.path, poll_interval=0)
+        content, error = results["bad"]
+        self.assertIsNone(content)
+        self.assertIn("simulated failure", error)
+
+    def test_fine_tuning_batch_mode(self):
+        documents = [
+            {"_id": i, "resume_text": f"Resume {i}", "job_description": "FAIL" if i == 2 else f"Job {i}"}
+            for i in range(4)
+        ]
+        outcomes = fine_tuning.generate_in_batch(documents, LocalBatchService(respond), self.path, poll_interval=0)
+        collection = mongomock.MongoClient().db["august-01-resumes"]
+        stored = fine_tuning.store_batch_outcomes(outcomes, collection, pytz.timezone('US/Pacific'))
+        print(f"{Fore.BLUE}Expected: 3 stored, Actual: {stored}")
+        self.assertEqual(stored, 3)
+        self.assertEqual(sorted(doc["original_id"] for doc in collection.find()), [0, 1, 3])
+        generated = collection.find_one({"original_id": 1})["generated_resume"]
+        self.assertTrue(generated.startswith("\\documentclass"))
+        stored_doc = TextResolver().resolve_documents(collection.database, [collection.find_one({"original_id": 1})])[0]
+        self.assertIn("Job 1", stored_doc["prompt"])
+        self.assertEqual(stored_doc["resume_text"], "Resume 1")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import sys
+import os
+import tempfile
+from types import SimpleNamespace
+from colorama import init, Fore
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from util.completion_cache import CompletionCache, cached_completion
+init(autoreset=True)
+
+def make_body(prompt, temperature=0.7):
+    return {"model": "gpt-3.5-turbo", "messages": [{"role": "user", "content": prompt}], "temperature": temperature}
+
+def make_response(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+class TestCompletionCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "completions.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hit_skips_api_call_and_survives_reopen(self):
+        calls = []
+        def create(body):
+            calls.append(body)
+            return make_response("generated " + body["messages"][0]["content"])
+
+        cache = CompletionCache(self.path)
+        self.assertEqual(cached_completion(cache, make_body("a"), create)["content"], "generated a")
+        self.assertEqual(cached_completion(cache, make_body("a"), create)["content"], "generated a")
+        cached_completion(cache, make_body("a", temperature=0.2), create)
+        print(f"{Fore.GREEN}Expected: 2 API calls, Actual: {len(calls)}, stats: {cache.stats()}")
+        self.assertEqual(len(calls), 2)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+        cache.close()
+
+        reopened = CompletionCache(self.path)
+        self.assertEqual(reopened.get(make_body("a"))["content"], "generated a")
+        self.assertEqual(reopened.size, cache.size)
+        reopened.close()
+
+    def test_scopes_do_not_share_entries(self):
+        cache = CompletionCache(self.path)
+        cache.put(make_body("a"), {"content": "day one"}, scope="fine_tuning:august-01-resumes")
+        print(f"{Fore.GREEN}Expected: miss in another scope, Actual: {cache.get(make_body('a'), 'fine_tuning:august-02-resumes')}")
+        self.assertIsNone(cache.get(make_body("a"), scope="fine_tuning:august-02-resumes"))
+        self.assertIsNone(cache.get(make_body("a")))
+        self.assertEqual(cache.get(make_body("a"), scope="fine_tuning:august-01-resumes")["content"], "day one")
+        cache.close()
+
+    def test_evicts_least_recently_used(self):
+        cache = CompletionCache(self.path, max_bytes=300)
+        for prompt in ("a", "b", "c"):
+            cache.put(make_body(prompt), {"content": prompt * 80})
+        cache.get(make_body("a"))
+        cache.put(make_body("d"), {"content": "d" * 80})
+        print(f"{Fore.BLUE}Cache bytes after eviction: {cache.size}")
+        self.assertLessEqual(cache.size, 300)
+        self.assertIsNotNone(cache.get(make_body("a")))
+        self.assertIsNone(cache.get(make_body("b")))
+        cache.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+import sys
+import os
+import tempfile
+import pandas as pd
+from colorama import init, Fore
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from util.csv_stream import iter_pairs, IncrementalCSVWriter
+init(autoreset=True)
+
+class TestCSVStream(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.resumes = os.path.join(self.tmp.name, "resumes.csv")
+        self.jobs = os.path.join(self.tmp.name, "jobs.csv")
+        pd.DataFrame({"id": range(25), "resume_text": [f"Resume, {i}\nline two" for i in range(25)]}).to_csv(self.resumes, index=False)
+        pd.DataFrame({"job_description": [f"Job {i}" for i in range(10)]}).to_csv(self.jobs, index=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_pairs_stop_at_shorter_file_and_limit(self):
+        pairs = list(iter_pairs(self.resumes, self.jobs, chunksize=3))
+        print(f"{Fore.GREEN}Expected: 10 pairs, Actual: {len(pairs)}")
+        self.assertEqual(len(pairs), 10)
+        self.assertEqual(pairs[7], ("Resume, 7\nline two", "Job 7"))
+        self.assertEqual(len(list(iter_pairs(self.resumes, self.jobs, limit=4, chunksize=3))), 4)
+
+    def test_incremental_writer_round_trips_through_pandas(self):
+        path = os.path.join(self.tmp.name, "out", "results.csv")
+        with IncrementalCSVWriter(path, ["resume_text", "job_description"], flush_every=2) as writer:
+            for resume_text, job_description in iter_pairs(self.resumes, self.jobs, chunksize=4):
+                writer.write({"resume_text": resume_text, "job_description": job_description})
+        written = pd.read_csv(path)
+        print(f"{Fore.BLUE}Rows written: {len(written)}")
+        self.assertEqual(len(written), 10)
+        self.assertEqual(written["resume_text"][3], "Resume, 3\nline two")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+import sys
+import os
+import tempfile
+import pandas as pd
+from colorama import init, Fore
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from util.local_s3 import LocalS3Client
+from util.table_io import read_table, write_table
+from util.keyword_matcher import KeywordMatcher, trie_pattern
+from scripts import data_cleanup
+init(autoreset=True)
+
+KEYWORDS = ["python", "developer"]
+
+class TestStreamingCleanup(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        os.environ['S3_BUCKET'] = 'test-bucket'
+        os.environ['S3_CACHE_DIR'] = os.path.join(self.tmp.name, 'cache')
+        self.s3 = LocalS3Client(os.path.join(self.tmp.name, 's3'))
+        resumes = pd.DataFrame({
+            "ID": range(500),
+            "Text": [None if i % 10 == 0 else f"Resume   {i}\n with  spaces" for i in range(500)],
+        })
+        postings = pd.DataFrame({
+            "title": ["Python Developer" if i % 3 else "Accountant" for i in range(600)],
+            "description": [f"  Build   services number {i} in Python  " if i % 7 else None for i in range(600)],
+            "salary": range(600),
+        })
+        self.s3.put_object(Bucket='test-bucket', Key='resumes.csv', Body=resumes.to_csv(index=False))
+        self.s3.put_object(Bucket='test-bucket', Key='postings.csv', Body=postings.to_csv(index=False))
+        self.files = {"resumes": "resumes.csv", "job_postings": "postings.csv"}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_streaming(self, chunksize, sample_size=50):
+        output_dir = os.path.join(self.tmp.name, f"out-{chunksize}-{sample_size}")
+        os.makedirs(output_dir)
+        counts = data_cleanup.clean_and_save_data_streaming(self.files, KEYWORDS, output_dir, chunksize=chunksize,
+                                                            sample_size=sample_size, s3_client=self.s3, fmt='parquet')
+        return counts, {key: read_table(os.path.join(output_dir, f"cleaned_{key}.parquet")) for key in self.files}
+
+    def test_sample_is_deterministic_across_chunk_sizes(self):
+        counts, small = self.run_streaming(chunksize=37)
+        _, large = self.run_streaming(chunksize=1000)
+        print(f"{Fore.GREEN}Cleaned rows: {counts}")
+        self.assertEqual(counts, {"resumes": 450, "job_postings": 343})
+        self.assertEqual(len(small["resumes"]), 50)
+        pd.testing.assert_frame_equal(small["job_postings"], large["job_postings"])
+        pd.testing.assert_frame_equal(small["resumes"], large["resumes"])
+
+    def test_streaming_matches_full_cleaning(self):
+        _, streamed = self.run_streaming(chunksize=64, sample_size=10000)
+        body = self.s3.get_object(Bucket='test-bucket', Key='postings.csv')['Body']
+        full = data_cleanup.clean_job_postings(pd.read_csv(body), KEYWORDS)
+        self.assertEqual(sorted(streamed["job_postings"]["job_description"]), sorted(full["job_description"]))
+        self.assertTrue(streamed["job_postings"]["job_description"].str.startswith("Build services number").all())
+
+    def test_full_mode_keeps_raw_copy_of_mixed_type_columns(self):
+        postings = pd.DataFrame({
+            "title": ["Python Developer"] * 4,
+            "description": [f"Build services number {i} in Python" for i in range(4)],
+            "zip_code": [262144, "02139", 98101, "K1A 0B1"],
+        })
+        self.s3.put_object(Bucket='test-bucket', Key='postings.csv', Body=postings.to_csv(index=False))
+        # force the object column with ints and strings that a large low_memory read produces
+        original = data_cleanup.read_csv_from_s3
+        data_cleanup.read_csv_from_s3 = lambda *args: original(*args).astype({"zip_code": object}).assign(zip_code=postings["zip_code"])
+        try:
+            input_dir, output_dir = os.path.join(self.tmp.name, "input"), os.path.join(self.tmp.name, "processed")
+            data_cleanup.clean_and_save_data({"job_postings": "postings.csv"}, KEYWORDS, input_dir, output_dir, fmt='parquet', s3_client=self.s3)
+        finally:
+            data_cleanup.read_csv_from_s3 = original
+        raw = pd.read_csv(os.path.join(input_dir, "job_postings.csv"), dtype=str)
+        self.assertEqual(raw["zip_code"].tolist(), ["262144", "02139", "98101", "K1A 0B1"])
+        self.assertEqual(len(read_table(os.path.join(output_dir, "cleaned_job_postings.parquet"))), 4)
+        mixed = pd.DataFrame({"zip_code": postings["zip_code"].astype(object)})
+        self.assertEqual(read_table(write_table(mixed, os.path.join(self.tmp.name, "mixed.parquet")))["zip_code"].tolist(),
+                         ["262144", "02139", "98101", "K1A 0B1"])
+
+class TestKeywordMatcher(unittest.TestCase):
+    def test_reports_earliest_longest_keyword(self):
+        matcher = KeywordMatcher(["Java", "JavaScript", "C++", "data scientist", "data engineer"])
+        titles = pd.Series(["Senior JAVASCRIPT dev", "C++ / Java engineer", "Lead Data Engineer", "Accountant", None])
+        matched = matcher.first_match(titles)
+        print(f"{Fore.GREEN}Pattern: {matcher.pattern}, Matches: {matched.tolist()}")
+        self.assertEqual(matched.iloc[:3].tolist(), ["JavaScript", "C++", "data engineer"])
+        self.assertTrue(matched.iloc[3:].isna().all())
+        self.assertEqual(matcher.mask(titles).tolist(), [True, True, True, False, False])
+
+    def test_matches_unescaped_alternation_on_plain_keywords(self):
+        keywords = [f"skill{i}" for i in range(300)] + ["python", "developer", "backend"]
+        titles = pd.Series([f"Title with skill{i * 7} and more" for i in range(200)] + ["Backend role", "none", None])
+        matcher = KeywordMatcher(keywords)
+        expected = titles.str.lower().str.contains('|'.join(keywords), na=False)
+        self.assertEqual(matcher.mask(titles).tolist(), expected.tolist())
+        self.assertNotIn("|skill1|", trie_pattern(keywords))
+
+    def test_clean_text_column_normalizes_whitespace(self):
+        cleaned = data_cleanup.clean_text_column(pd.Series(["  a \t b\n\nc  ", None, "x"]))
+        self.assertEqual(cleaned.iloc[0], "a b c")
+        self.assertTrue(pd.isna(cleaned.iloc[1]))
+        self.assertEqual(cleaned.iloc[2], "x")
+
+if __name__ == "__main__":
+    unittest.main()
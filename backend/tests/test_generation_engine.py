@@ -0,0 +1,136 @@
+import unittest
+import sys
+import os
+import threading
+from openai import OpenAI, RateLimitError
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_fixed
+from colorama import init, Fore
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from util.rate_limiter import TokenBucket
+from util.generation_engine import AdaptiveConcurrency, GenerationEngine, openai_client_options
+from util.batch_client import OpenAIBatchService, SDK_MAX_RETRIES
+init(autoreset=True)
+
+def make_rate_limit_error():
+    # skip APIStatusError.__init__, which needs a full HTTP response object
+    error = RateLimitError.__new__(RateLimitError)
+    Exception.__init__(error, "Rate limit reached")
+    return error
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+class TestTokenBucket(unittest.TestCase):
+    def test_waits_for_refill(self):
+        clock = FakeClock()
+        bucket = TokenBucket(60, clock=clock, sleep=clock.sleep)
+        for _ in range(60):
+            bucket.acquire()
+        self.assertEqual(clock.now, 0.0)
+        bucket.acquire(3)
+        print(f"{Fore.GREEN}Expected wait: 3.0s, Actual: {clock.now}s")
+        self.assertAlmostEqual(clock.now, 3.0)
+
+    def test_oversized_request_goes_into_debt(self):
+        clock = FakeClock()
+        bucket = TokenBucket(600, clock=clock, sleep=clock.sleep)
+        bucket.acquire(1000)
+        self.assertEqual(clock.now, 0.0)
+        bucket.acquire(100)
+        self.assertAlmostEqual(clock.now, 50.0)
+
+class TestAdaptiveConcurrency(unittest.TestCase):
+    def test_halves_on_rate_limit_and_grows_back(self):
+        concurrency = AdaptiveConcurrency(8, increase_after=2)
+        concurrency.on_rate_limited()
+        concurrency.on_rate_limited()
+        self.assertEqual(concurrency.limit, 2)
+        for _ in range(4):
+            concurrency.on_success()
+        print(f"{Fore.BLUE}Expected limit: 4, Actual: {concurrency.limit}")
+        self.assertEqual(concurrency.limit, 4)
+        for _ in range(20):
+            concurrency.on_success()
+        self.assertEqual(concurrency.limit, 8)
+
+class TestGenerationEngine(unittest.TestCase):
+    def test_runs_all_jobs_within_concurrency(self):
+        engine = GenerationEngine(max_concurrency=4, requests_per_minute=60000, tokens_per_minute=10 ** 9)
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+
+        def generate(job):
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            threading.Event().wait(0.01)
+            with lock:
+                state["active"] -= 1
+            return job * 2
+
+        results = {job: result for job, result, error in engine.run(iter(range(20)), generate)}
+        print(f"{Fore.YELLOW}Peak concurrency: {state['peak']}")
+        self.assertEqual(results, {i: i * 2 for i in range(20)})
+        self.assertLessEqual(state["peak"], 4)
+
+    def test_rate_limit_errors_shrink_concurrency(self):
+        engine = GenerationEngine(max_concurrency=4, requests_per_minute=60000, tokens_per_minute=10 ** 9)
+
+        def generate(job):
+            if job == 0:
+                raise make_rate_limit_error()
+            return job
+
+        outcomes = list(engine.run([0, 1, 2], generate))
+        errors = [error for _, _, error in outcomes if error]
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], RateLimitError)
+        self.assertEqual(engine.concurrency.rate_limited, 1)
+        self.assertEqual(engine.concurrency.limit, 2)
+
+    def test_retry_sleep_gives_up_the_slot(self):
+        engine = GenerationEngine(max_concurrency=1, requests_per_minute=60000, tokens_per_minute=10 ** 9)
+        other_done = threading.Event()
+        attempts = []
+
+        def sleep_until_other_job_ran(seconds):
+            # with the slot still held, job 1 could not start until this sleep ended
+            attempts.append(other_done.wait(timeout=2))
+
+        @retry(wait=wait_fixed(0), stop=stop_after_attempt(2), retry=retry_if_exception_type(RateLimitError),
+               before_sleep=engine.before_retry_sleep, sleep=sleep_until_other_job_ran)
+        def request(job):
+            engine.throttle(1)
+            if job == 0 and not attempts:
+                raise make_rate_limit_error()
+            return job
+
+        def generate(job):
+            result = request(job)
+            if job == 1:
+                other_done.set()
+            return result
+
+        results = {job: result for job, result, error in engine.run([0, 1], generate)}
+        print(f"{Fore.MAGENTA}Expected: job 1 ran during job 0's backoff, Actual: {attempts}")
+        self.assertEqual(attempts, [True])
+        self.assertEqual(results, {0: 0, 1: 1})
+        self.assertEqual(engine.concurrency.active, 0)
+
+    def test_client_leaves_retries_to_the_engine(self):
+        options = openai_client_options()
+        print(f"{Fore.GREEN}Expected SDK retries: 0, Actual: {options['max_retries']}")
+        self.assertEqual(options["max_retries"], 0)
+        # batch uploads and polls have no tenacity policy, so they keep the SDK's retries
+        service = OpenAIBatchService(OpenAI(api_key="test", **options))
+        self.assertEqual(service.client.max_retries, SDK_MAX_RETRIES)
+
+if __name__ == "__main__":
+    unittest.main()
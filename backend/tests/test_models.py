@@ -0,0 +1,34 @@
+import unittest
+import sys
+import os
+from unittest import mock
+from colorama import init, Fore
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault('MONGO_DB_NAME', 'test-db')
+from app import models
+init(autoreset=True)
+
+class TestModels(unittest.TestCase):
+    def tearDown(self):
+        models.close_client()
+
+    def test_client_is_shared_within_a_process(self):
+        self.assertIs(models.get_client(), models.get_client())
+
+    def test_client_is_recreated_after_fork(self):
+        parent_client = models.get_client()
+        with mock.patch.object(models.os, 'getpid', return_value=os.getpid() + 1):
+            child_client = models.get_client()
+            print(f"{Fore.GREEN}Parent client: {id(parent_client)}, child client: {id(child_client)}")
+            self.assertIsNot(parent_client, child_client)
+            self.assertIs(child_client, models.get_client())
+        parent_client.close()
+
+    def test_pool_settings_from_environment(self):
+        with mock.patch.dict(os.environ, {'MONGO_MAX_POOL_SIZE': '3', 'MONGO_SERVER_SELECTION_TIMEOUT_MS': '1500'}):
+            options = models.client_options()
+        self.assertEqual(options['maxPoolSize'], 3)
+        self.assertEqual(options['serverSelectionTimeoutMS'], 1500)
+
+if __name__ == "__main__":
+    unittest.main()
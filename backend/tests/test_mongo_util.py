@@ -6,7 +6,10 @@ from colorama import init, Fore, Style
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from util.mongo_util import MongoUtil
+import mongomock
+from types import SimpleNamespace
+from unittest import mock
+from util.mongo_util import MongoUtil, bulk_upsert, content_hash
 init(autoreset=True)
 load_dotenv()
 
@@ -81,8 +84,58 @@ class TestMongoUtil(unittest.TestCase):
     #     print(f"{Fore.LIGHTGREEN_EX}Expected: {expected}, Actual: {actual}")
     #     self.assertEqual(expected, actual)
 
+class RecordedUpdateOne:
+    """
+    Stands in for pymongo's UpdateOne inside bulk_upsert, keeping the arguments it was built with.
+    """
+    def __init__(self, filter, update, upsert=False):
+        self.filter = filter
+        self.update = update
+        self.upsert = upsert
+
+class BulkRecordingCollection:
+    """
+    mongomock's bulk_write does not accept UpdateOne from current pymongo, so apply each recorded
+    upsert to a mongomock collection ourselves and record the batch sizes.
+    """
+    def __init__(self):
+        self.collection = mongomock.MongoClient().db["uploads"]
+        self.batches = []
+
+    def create_index(self, *args, **kwargs):
+        return self.collection.create_index(*args, **kwargs)
+
+    def bulk_write(self, requests, ordered=True):
+        self.batches.append(len(requests))
+        upserted = matched = 0
+        for request in requests:
+            result = self.collection.update_one(request.filter, request.update, upsert=request.upsert)
+            upserted += result.upserted_id is not None
+            matched += result.matched_count
+        return SimpleNamespace(upserted_count=upserted, matched_count=matched)
+
+@mock.patch("util.mongo_util.UpdateOne", RecordedUpdateOne)
+class TestBulkUpsert(unittest.TestCase):
+    def test_repeated_upload_is_idempotent(self):
+        collection = BulkRecordingCollection()
+        records = [{"resume_text": f"Resume {i}", "job_description": "Job", "score": i} for i in range(1000)]
+
+        stats = bulk_upsert(collection, records, batch_size=300)
+        print(f"{Fore.GREEN}Expected batches: [300, 300, 300, 100], Actual: {collection.batches}")
+        self.assertEqual(collection.batches, [300, 300, 300, 100])
+        self.assertEqual((stats["inserted"], stats["existing"]), (1000, 0))
+
+        stats = bulk_upsert(collection, records + [{"resume_text": "New", "job_description": "Job", "score": 0}], batch_size=300)
+        self.assertEqual((stats["inserted"], stats["existing"]), (1, 1000))
+        self.assertEqual(collection.collection.count_documents({}), 1001)
+
+    def test_content_hash_ignores_id_and_key_order(self):
+        self.assertEqual(content_hash({"_id": 1, "a": 1, "b": 2}), content_hash({"b": 2, "a": 1}))
+        self.assertNotEqual(content_hash({"a": 1}), content_hash({"a": 2}))
+
 if __name__ == "__main__":
-    suite = unittest.TestLoader().loadTestsFromTestCase(TestMongoUtil)
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite([loader.loadTestsFromTestCase(TestMongoUtil), loader.loadTestsFromTestCase(TestBulkUpsert)])
     runner = unittest.TextTestRunner(verbosity=2)
     for _ in tqdm(iter(runner.run(suite)), total=suite.countTestCases()):
         pass
@@ -0,0 +1,75 @@
+import unittest
+import sys
+import os
+import random
+import pandas as pd
+from colorama import init, Fore
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from util.near_duplicates import NearDuplicateFilter, shingle_hashes
+init(autoreset=True)
+
+VOCABULARY = [f"word{i}" for i in range(2000)]
+CITIES = ["Austin, TX", "Seattle, WA", "New York, NY", "Denver, CO", "Remote"]
+
+def make_postings(num_jobs=40, reposts=4, seed=7):
+    """
+    :return: (descriptions, job index of each description); each job is posted reposts times at
+        different locations with one word changed.
+    """
+    rng = random.Random(seed)
+    descriptions, jobs = [], []
+    for job in range(num_jobs):
+        words = rng.choices(VOCABULARY, k=250)
+        for repost in range(reposts):
+            edited = list(words)
+            for position in rng.sample(range(len(edited)), 1):
+                edited[position] = rng.choice(VOCABULARY)
+            descriptions.append(f"Located in {CITIES[repost % len(CITIES)]}. " + " ".join(edited))
+            jobs.append(job)
+    order = list(range(len(descriptions)))
+    rng.shuffle(order)
+    return [descriptions[i] for i in order], [jobs[i] for i in order]
+
+class TestNearDuplicateFilter(unittest.TestCase):
+    def test_collapses_each_repost_cluster_to_one_posting(self):
+        descriptions, jobs = make_postings()
+        keep = NearDuplicateFilter().keep_mask(descriptions)
+        kept_jobs = [job for job, kept in zip(jobs, keep) if kept]
+        print(f"{Fore.GREEN}Expected: 40 representatives, Actual: {len(kept_jobs)}")
+        self.assertEqual(sorted(kept_jobs), list(range(40)))
+        # the representative is the first posting of each job
+        first = {}
+        for i, job in enumerate(jobs):
+            first.setdefault(job, i)
+        self.assertEqual([i for i, kept in enumerate(keep) if kept], sorted(first.values()))
+
+    def test_result_does_not_depend_on_chunking(self):
+        descriptions, _ = make_postings(num_jobs=20, reposts=3, seed=3)
+        whole = NearDuplicateFilter(seed=5).keep_mask(descriptions)
+        chunked_filter = NearDuplicateFilter(seed=5)
+        chunked = [kept for start in range(0, len(descriptions), 7) for kept in chunked_filter.keep_mask(descriptions[start:start + 7])]
+        self.assertEqual(list(whole), chunked)
+        self.assertEqual(chunked_filter.duplicates, 40)
+
+    def test_capped_index_evicts_least_recently_matched(self):
+        descriptions, jobs = make_postings(num_jobs=6, reposts=2, seed=11)
+        texts = [descriptions[jobs.index(job)] for job in range(6)]
+        repost = {job: next(d for d, j in zip(descriptions, jobs) if j == job and d != texts[job]) for job in range(6)}
+        dedupe = NearDuplicateFilter(max_representatives=3)
+        # job 0's cluster is matched again before jobs 3-5 arrive, so job 1's cluster is evicted first
+        keep = dedupe.keep_mask(texts[:3] + [repost[0]] + texts[3:5] + [repost[0], repost[1]])
+        print(f"{Fore.CYAN}Kept: {keep.tolist()}, Evicted: {dedupe.evicted}")
+        self.assertEqual(keep.tolist(), [True, True, True, False, True, True, False, True])
+        self.assertLessEqual(len(dedupe.signatures), 3)
+        self.assertLessEqual(sum(len(bucket) for table in dedupe.tables for bucket in table.values()), 3 * dedupe.bands)
+
+    def test_distinct_and_short_texts_are_kept(self):
+        texts = ["Build services number 1 in Python", "Build services number 2 in Python", "Python", "", None]
+        df = pd.DataFrame({"description": texts})
+        kept = NearDuplicateFilter().filter(df, "description")
+        self.assertEqual(len(kept), 4)
+        self.assertEqual([len(h) for h in shingle_hashes(["A b", "one two three four", None])], [1, 2, 1])
+        self.assertEqual(shingle_hashes(["Build the API"])[0].tolist(), shingle_hashes(["build, the  api"])[0].tolist())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import sys
+import os
+from openai import OpenAI, RateLimitError, InternalServerError
+from colorama import init, Fore
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from util.openai_stub_server import StubConfig, start_stub_server
+from util.generation_engine import GenerationEngine
+init(autoreset=True)
+
+def messages(prompt):
+    return [{"role": "system", "content": "You are a LaTeX resume generator."}, {"role": "user", "content": prompt}]
+
+class TestOpenAIStubServer(unittest.TestCase):
+    def start(self, **config):
+        server = start_stub_server(config=StubConfig(latency_sigma=0, seed=7, **config))
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        client = OpenAI(api_key="stub", base_url=f"http://127.0.0.1:{server.server_port}/v1", max_retries=0)
+        return server, client
+
+    def test_returns_canned_latex_with_usage(self):
+        server, client = self.start(latency_ms=5)
+        response = client.chat.completions.create(model="gpt-3.5-turbo", messages=messages("Job: data engineer"))
+        content = response.choices[0].message.content
+        print(f"{Fore.GREEN}Usage: {response.usage}")
+        self.assertTrue(content.startswith("\\documentclass"))
+        self.assertIn("data engineer", content)
+        self.assertGreater(response.usage.completion_tokens, 0)
+        self.assertEqual(server.config.counts["completed"], 1)
+
+    def test_injects_rate_limits_and_errors(self):
+        _, client = self.start(latency_ms=0, rate_limit_rate=1.0)
+        with self.assertRaises(RateLimitError):
+            client.chat.completions.create(model="gpt-3.5-turbo", messages=messages("x"))
+        _, client = self.start(latency_ms=0, error_rate=1.0)
+        with self.assertRaises(InternalServerError):
+            client.chat.completions.create(model="gpt-3.5-turbo", messages=messages("x"))
+
+    def test_engine_throughput_against_stub(self):
+        server, client = self.start(latency_ms=50)
+        engine = GenerationEngine(max_concurrency=8, requests_per_minute=60000, tokens_per_minute=10 ** 9)
+
+        def generate(i):
+            return client.chat.completions.create(model="gpt-3.5-turbo", messages=messages(f"job {i}")).choices[0].message.content
+
+        results = list(engine.run(range(16), generate))
+        print(f"{Fore.BLUE}Stub counts: {server.config.counts}")
+        self.assertEqual(sum(1 for _, result, error in results if result and not error), 16)
+        self.assertEqual(server.config.counts["requests"], 16)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import sys
+import os
+import random
+import tempfile
+import numpy as np
+import pandas as pd
+from colorama import init, Fore
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from util.pairing import JobIndex, iter_similar_pairs
+from util.table_io import write_table
+init(autoreset=True)
+
+DOMAINS = {
+    "chef": "kitchen menu cooking restaurant culinary sous chef food safety plating",
+    "backend": "python django api microservices postgresql kubernetes backend services",
+    "nurse": "patient care nursing clinical hospital medication charting triage",
+    "data": "machine learning pandas statistics models sklearn data science experiments",
+}
+
+def text_for(domain, rng, words=12):
+    vocabulary = DOMAINS[domain].split() + ["team", "experience", "years", "work", "skills"]
+    return " ".join(rng.choices(vocabulary, k=words))
+
+class TestPairing(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(3)
+        self.job_domains = [domain for domain in DOMAINS for _ in range(5)]
+        rng.shuffle(self.job_domains)
+        self.jobs = [text_for(domain, rng, 40) for domain in self.job_domains]
+        self.resume_domains = [rng.choice(list(DOMAINS)) for _ in range(40)]
+        self.resumes = [text_for(domain, rng, 30) for domain in self.resume_domains]
+
+    def test_top_jobs_share_the_resume_domain(self):
+        jobs, scores = JobIndex(self.jobs).top_k(self.resumes, k=3, block_size=16)
+        matched = [[self.job_domains[j] for j in row] for row in jobs]
+        print(f"{Fore.GREEN}First resume: {self.resume_domains[0]}, Top jobs: {matched[0]}, Scores: {scores[0]}")
+        self.assertTrue(all(row == [domain] * 3 for row, domain in zip(matched, self.resume_domains)))
+        self.assertTrue((np.diff(scores, axis=1) <= 0).all())
+
+    def test_blocked_scores_match_dense_cosine(self):
+        index = JobIndex(self.jobs)
+        dense = (index.transform(self.resumes) @ index.jobs_t).toarray()
+        for block_size in (1, 7, 100):
+            jobs, scores = index.top_k(self.resumes, k=2, block_size=block_size)
+            np.testing.assert_allclose(scores[:, 0], dense.max(axis=1), rtol=1e-5)
+            np.testing.assert_allclose(scores[:, 1], np.sort(dense, axis=1)[:, -2], rtol=1e-5)
+            self.assertTrue((dense[np.arange(len(jobs)), jobs[:, 0]] == dense.max(axis=1)).all())
+
+    def test_ties_at_the_kth_score_go_to_the_lower_job_index(self):
+        # eight identical jobs tie for every resume; only the lowest indices may be chosen
+        jobs = ["python django api backend services"] * 8 + ["kitchen menu cooking"]
+        index = JobIndex(jobs)
+        expected = [[0, 1, 2]] * 3
+        for block_size in (1, 2, 3):
+            actual, _ = index.top_k(["python api services"] * 3, k=3, block_size=block_size)
+            print(f"{Fore.CYAN}block_size={block_size}: Expected: {expected[0]}, Actual: {actual.tolist()[0]}")
+            self.assertEqual(actual.tolist(), expected)
+
+    def test_unmatched_resume_gets_no_jobs(self):
+        jobs, scores = JobIndex(self.jobs).top_k(["zzz qqq"], k=2)
+        self.assertEqual(jobs.tolist(), [[-1, -1]])
+        self.assertEqual(scores.tolist(), [[0.0, 0.0]])
+
+    def test_iter_similar_pairs_streams_resume_chunks(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            resume_path = write_table(pd.DataFrame({"resume_text": self.resumes + [None]}), os.path.join(tmp, "cleaned_resumes.parquet"))
+            job_path = write_table(pd.DataFrame({"job_description": self.jobs}), os.path.join(tmp, "cleaned_job_postings.parquet"))
+            pairs = list(iter_similar_pairs(resume_path, job_path, top_k=2, chunksize=9))
+            self.assertEqual(len(pairs), 80)
+            self.assertEqual(pairs[0][0], self.resumes[0])
+            self.assertEqual(self.job_domains[self.jobs.index(pairs[0][1])], self.resume_domains[0])
+
+    def test_limit_counts_resumes_not_pairs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            resume_path = write_table(pd.DataFrame({"resume_text": self.resumes}), os.path.join(tmp, "cleaned_resumes.parquet"))
+            job_path = write_table(pd.DataFrame({"job_description": self.jobs}), os.path.join(tmp, "cleaned_job_postings.parquet"))
+            # the limit crosses a chunk boundary, and every kept resume gets all of its top_k jobs
+            pairs = list(iter_similar_pairs(resume_path, job_path, top_k=2, limit=11, chunksize=9))
+            print(f"{Fore.GREEN}Expected: 22 pairs from 11 resumes, Actual: {len(pairs)} pairs from {len({resume for resume, _ in pairs})} resumes")
+            self.assertEqual(len(pairs), 22)
+            self.assertEqual([resume for resume, _ in pairs[::2]], self.resumes[:11])
+
+if __name__ == "__main__":
+    unittest.main()
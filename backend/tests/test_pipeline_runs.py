@@ -0,0 +1,131 @@
+import unittest
+import sys
+import os
+import tempfile
+import mongomock
+import pytz
+from colorama import init, Fore
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault('OPENAI_API_KEY', 'test-key')
+os.environ.setdefault('COMPLETION_CACHE', 'off')
+from util.batch_client import LocalBatchService, BatchFailedError, build_batch_request, write_batch_file
+from util.internal_collections import RUNS_COLLECTION
+from util.completion_cache import CompletionCache
+from scripts import fine_tuning
+init(autoreset=True)
+
+PREV = "july-31-resumes"
+TODAY = "august-01-resumes"
+
+class CountingResponder:
+    def __init__(self):
+        self.prompts = []
+
+    def __call__(self, body):
+        prompt = body["messages"][-1]["content"]
+        self.prompts.append(prompt)
+        return "\\documentclass{article}\\begin{document}" + prompt[-12:] + "\\end{document}"
+
+class TestResumableFineTuning(unittest.TestCase):
+    def setUp(self):
+        self.db = mongomock.MongoClient().db
+        self.db[PREV].insert_many([{"_id": i, "resume_text": f"Resume {i}", "job_description": f"Job {i}"} for i in range(4)])
+        self.tz = pytz.timezone('US/Pacific')
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_batch_mode(self, service):
+        return fine_tuning.run_fine_tuning(self.db, PREV, TODAY, self.tz, mode='batch', batch_service=service, poll_interval=0)
+
+    def test_rerun_only_processes_remaining_documents(self):
+        # an interrupted run left two documents behind
+        for i in (0, 1):
+            self.db[TODAY].insert_one(fine_tuning.build_generated_document(self.db[PREV].find_one({"_id": i}), "done", {}, self.tz))
+
+        responder = CountingResponder()
+        result = self.run_batch_mode(LocalBatchService(responder, polls_until_complete=0))
+        print(f"{Fore.GREEN}Expected: 2 requests, Actual: {len(responder.prompts)}")
+        self.assertEqual(result["status"], "completed")
+        self.assertEqual(len(responder.prompts), 2)
+        self.assertEqual(sorted(self.db[TODAY].distinct("original_id")), [0, 1, 2, 3])
+
+        run = self.db[RUNS_COLLECTION].find_one({"_id": f"fine_tuning:{TODAY}"})
+        self.assertEqual((run["status"], run["stored"], run["remaining"], run["attempts"]), ("completed", 2, 2, 1))
+        self.assertNotIn("batch_id", run)
+
+        result = self.run_batch_mode(LocalBatchService(responder, polls_until_complete=0))
+        self.assertEqual(len(responder.prompts), 2)
+        self.assertEqual(self.db[RUNS_COLLECTION].find_one({"_id": f"fine_tuning:{TODAY}"})["attempts"], 2)
+
+    def test_resumes_in_flight_batch_without_resubmitting(self):
+        responder = CountingResponder()
+        service = LocalBatchService(responder, polls_until_complete=0)
+        path = os.path.join(self.tmp.name, "requests.jsonl")
+        write_batch_file(path, (
+            build_batch_request(str(doc["_id"]), fine_tuning.build_request_body(fine_tuning.build_prompt(doc["resume_text"], doc["job_description"])))
+            for doc in self.db[PREV].find()
+        ))
+        batch_id = service.submit(path)
+        self.db[RUNS_COLLECTION].insert_one({"_id": f"fine_tuning:{TODAY}", "status": "running", "batch_id": batch_id, "attempts": 1})
+
+        self.run_batch_mode(service)
+        print(f"{Fore.BLUE}Batches submitted: {len(service.batches)}")
+        self.assertEqual(len(service.batches), 1)
+        self.assertEqual(self.db[TODAY].count_documents({}), 4)
+
+    def test_failed_batch_is_dropped_so_the_next_run_resubmits(self):
+        responder = CountingResponder()
+        expired = LocalBatchService(responder, polls_until_complete=0, final_status="expired")
+        with self.assertRaises(BatchFailedError):
+            self.run_batch_mode(expired)
+        run = self.db[RUNS_COLLECTION].find_one({"_id": f"fine_tuning:{TODAY}"})
+        print(f"{Fore.YELLOW}Expected: failed without batch_id, Actual: {run['status']}, batch_id={run.get('batch_id')}")
+        self.assertEqual(run["status"], "failed")
+        self.assertNotIn("batch_id", run)
+        self.assertIn("expired", run["error"])
+
+        service = LocalBatchService(responder, polls_until_complete=0)
+        result = self.run_batch_mode(service)
+        run = self.db[RUNS_COLLECTION].find_one({"_id": f"fine_tuning:{TODAY}"})
+        self.assertEqual(result["status"], "completed")
+        self.assertEqual(len(service.batches), 1)
+        self.assertEqual((run["status"], run["attempts"]), ("completed", 2))
+        self.assertNotIn("error", run)
+        self.assertEqual(self.db[TODAY].count_documents({}), 4)
+
+    def test_completion_cache_does_not_carry_over_to_the_next_day(self):
+        cache = CompletionCache(os.path.join(self.tmp.name, "completions.sqlite"))
+        original = fine_tuning.get_completion_cache
+        fine_tuning.get_completion_cache = lambda: cache
+        try:
+            responder = CountingResponder()
+            self.run_batch_mode(LocalBatchService(responder, polls_until_complete=0))
+            # the next night copies the same inputs forward, so its prompts are identical
+            self.db["august-01-copy"].insert_many(list(self.db[PREV].find()))
+            fine_tuning.run_fine_tuning(self.db, "august-01-copy", "august-02-resumes", self.tz, mode='batch',
+                                        batch_service=LocalBatchService(responder, polls_until_complete=0), poll_interval=0)
+            print(f"{Fore.GREEN}Expected: 8 requests over two days, Actual: {len(responder.prompts)}")
+            self.assertEqual(len(responder.prompts), 8)
+
+            # a rerun of the same day is served from its own cache scope
+            self.db[TODAY].delete_many({})
+            self.run_batch_mode(LocalBatchService(responder, polls_until_complete=0))
+            self.assertEqual(len(responder.prompts), 8)
+            self.assertEqual(self.db[TODAY].count_documents({}), 4)
+        finally:
+            fine_tuning.get_completion_cache = original
+            cache.close()
+
+    def test_duplicate_inserts_are_skipped(self):
+        outcomes = [(doc, "generated", {}, None, None) for doc in self.db[PREV].find()]
+        self.db[TODAY].create_index("original_id", unique=True)
+        self.assertEqual(fine_tuning.store_batch_outcomes(outcomes[:1], self.db[TODAY], self.tz), 1)
+        stored = fine_tuning.store_batch_outcomes(outcomes, self.db[TODAY], self.tz)
+        print(f"{Fore.YELLOW}Expected: 3 stored, Actual: {stored}")
+        self.assertEqual(stored, 3)
+        self.assertEqual(self.db[TODAY].count_documents({}), 4)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+import sys
+import os
+from colorama import init, Fore
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from util.prompt_budget import strip_boilerplate, budget_inputs, count_tokens, token_usage
+init(autoreset=True)
+
+MODEL = "gpt-3.5-turbo"
+
+JOB = (
+    "We are hiring a data engineer. You will build pipelines in Python and SQL.\n"
+    "Experience with Spark is a plus. You will build pipelines in Python and SQL.\n"
+    "Acme is an Equal Opportunity Employer. All qualified applicants will receive consideration "
+    "without regard to race, color, religion, sex, or national origin.\n"
+    "We provide reasonable accommodation to applicants with disabilities."
+)
+
+class TestPromptBudget(unittest.TestCase):
+    def test_strips_boilerplate_and_duplicate_sentences(self):
+        compacted, removed = strip_boilerplate(JOB)
+        print(f"{Fore.GREEN}Compacted job description: {compacted!r}")
+        self.assertEqual(removed, 4)
+        self.assertEqual(compacted, "We are hiring a data engineer. You will build pipelines in Python and SQL.\nExperience with Spark is a plus.")
+
+    def test_trims_inputs_to_budget(self):
+        resume = " ".join(f"Built system {i} with Python." for i in range(400))
+        job = "Looking for a Python developer to build services."
+        budgeted_resume, budgeted_job, stats = budget_inputs(resume, job, MODEL, budget=200)
+        print(f"{Fore.BLUE}Expected: <= 200 tokens, Actual: {stats['input_tokens']}")
+        self.assertTrue(stats["trimmed"])
+        self.assertLessEqual(stats["input_tokens"], 200)
+        self.assertEqual(budgeted_job, job)
+        self.assertTrue(resume.startswith(budgeted_resume))
+        self.assertGreater(count_tokens(budgeted_resume, MODEL), 100)
+
+    def test_inputs_within_budget_are_untouched(self):
+        resume, job, stats = budget_inputs("Short resume.", "Short job.", MODEL, budget=200)
+        self.assertEqual((resume, job, stats["trimmed"]), ("Short resume.", "Short job.", False))
+
+    def test_token_usage_prefers_api_counts(self):
+        entry = {"content": "done", "usage": {"prompt_tokens": 120, "completion_tokens": 30}, "finish_reason": "length"}
+        self.assertEqual(token_usage(entry, 100, MODEL), {"input_tokens": 120, "output_tokens": 30, "truncated": True})
+        local = token_usage({"content": "done"}, 100, MODEL)
+        self.assertEqual((local["input_tokens"], local["truncated"]), (100, False))
+
+if __name__ == "__main__":
+    unittest.main()
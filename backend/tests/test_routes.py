@@ -0,0 +1,195 @@
+import unittest
+import sys
+import os
+import datetime
+import json
+import gzip
+import mongomock
+from types import SimpleNamespace
+from bson import ObjectId
+from colorama import init, Fore
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault('MONGO_DB_NAME', 'test-db')
+from app import create_app
+from app.cache import ResponseCache, response_cache
+from app.serializers import get_serializer
+from app.metrics import Histogram, command_listener, render_metrics
+from util.collection_versions import bump_collection_version
+from util.trend_rollup import refresh_trends
+from util.text_store import dedupe_collection, text_resolver
+import app.routes as routes
+init(autoreset=True)
+
+class TestRoutes(unittest.TestCase):
+    def setUp(self):
+        self.db = mongomock.MongoClient().db
+        self.original_get_db = routes.get_db
+        routes.get_db = lambda: self.db
+        response_cache.clear()
+        self.db["july-23-resumes"].insert_many([
+            {
+                "resume_text": f"Resume {i}",
+                "job_description": f"Job {i}",
+                "score": i * 10,
+                "truthfulness": i % 2 == 0,
+                "created_at": datetime.datetime(2024, 7, 23, 0, 0, i),
+            }
+            for i in range(5)
+        ])
+        self.client = create_app().test_client()
+
+    def tearDown(self):
+        routes.get_db = self.original_get_db
+
+    def test_full_collection_read(self):
+        response = self.client.get('/data/july-23-resumes')
+        documents = response.get_json()
+        print(f"{Fore.GREEN}Expected: 5 documents, Actual: {len(documents)}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(documents), 5)
+        self.assertEqual(documents[0]["created_at"], "2024-07-23T00:00:00")
+
+    def test_keyset_pagination_with_projection(self):
+        first = self.client.get('/data/july-23-resumes?limit=2&fields=score')
+        next_after = first.headers['X-Next-After']
+        second = self.client.get(f'/data/july-23-resumes?limit=2&fields=score&after={next_after}')
+        actual = [doc["score"] for doc in first.get_json() + second.get_json()]
+        print(f"{Fore.BLUE}Expected: [0, 10, 20, 30], Actual: {actual}")
+        self.assertEqual(actual, [0, 10, 20, 30])
+        self.assertEqual(set(second.get_json()[0]), {"_id", "score"})
+
+    def test_ndjson_stream(self):
+        response = self.client.get('/data/july-23-resumes?format=ndjson&fields=score')
+        lines = [json.loads(line) for line in response.data.decode().splitlines()]
+        print(f"{Fore.YELLOW}Streamed {len(lines)} lines")
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        self.assertEqual([doc["score"] for doc in lines], [0, 10, 20, 30, 40])
+
+    def test_text_references_are_resolved(self):
+        dedupe_collection(self.db, "july-23-resumes")
+        self.assertNotIn("resume_text", self.db["july-23-resumes"].find_one())
+        text_resolver.clear()
+        documents = self.client.get('/data/july-23-resumes?fields=resume_text,job_description').get_json()
+        print(f"{Fore.GREEN}Resolved: {documents[1]}")
+        self.assertEqual([doc["resume_text"] for doc in documents], [f"Resume {i}" for i in range(5)])
+        self.assertEqual(set(documents[1]), {"_id", "resume_text", "job_description"})
+        lines = self.client.get('/data/july-23-resumes?format=ndjson').data.decode().splitlines()
+        self.assertEqual(json.loads(lines[4])["job_description"], "Job 4")
+
+    def test_invalid_read_options(self):
+        self.assertEqual(self.client.get('/data/july-23-resumes?after=not-an-id').status_code, 400)
+        self.assertEqual(self.client.get('/data/july-23-resumes?limit=0').status_code, 400)
+
+    def test_collection_stats(self):
+        stats = self.client.get('/data/july-23-resumes/stats').get_json()
+        print(f"{Fore.MAGENTA}Stats: {stats['labeled']} labeled, mean {stats['score']['mean']}")
+        self.assertEqual(stats["collection"], "july-23-resumes")
+        self.assertEqual(stats["labeled"], 5)
+        self.assertAlmostEqual(stats["score"]["mean"], 20.0)
+
+    def test_invalid_bin_size(self):
+        for bin_size in ("abc", "2.5", "", "0", "-5", "101"):
+            response = self.client.get(f'/data/july-23-resumes/stats?bin_size={bin_size}')
+            print(f"{Fore.GREEN}bin_size={bin_size!r}: Expected: 400, Actual: {response.status_code}")
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get('/data/july-23-resumes/stats?bin_size=25').status_code, 200)
+
+    def test_conditional_get(self):
+        first = self.client.get('/data/july-23-resumes/stats')
+        etag = first.headers['ETag']
+        second = self.client.get('/data/july-23-resumes/stats', headers={'If-None-Match': etag})
+        print(f"{Fore.CYAN}Expected: 304, Actual: {second.status_code}")
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.data, b'')
+
+    def test_etag_changes_after_label_update(self):
+        etag = self.client.get('/data/july-23-resumes/stats').headers['ETag']
+        self.db["july-23-resumes"].update_many({}, {"$set": {"score": 100}})
+        bump_collection_version(self.db, "july-23-resumes")
+        response = self.client.get('/data/july-23-resumes/stats', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["score"]["mean"], 100)
+
+    def test_internal_collections_hidden(self):
+        bump_collection_version(self.db, "july-23-resumes")
+        collections = self.client.get('/data').get_json()["collections"]
+        self.assertEqual(collections, ["july-23-resumes"])
+
+    def test_trends(self):
+        refresh_trends(self.db)
+        trends = self.client.get('/data/trends').get_json()
+        print(f"{Fore.MAGENTA}Trend series: {[summary['collection'] for summary in trends['series']]}")
+        self.assertEqual(trends["series"][0]["collection"], "july-23-resumes")
+        self.assertEqual(trends["overall"]["labeled"], 5)
+
+    def test_gzip_negotiation(self):
+        self.db["july-23-resumes"].update_many({}, {"$set": {"resume_text": "Experienced engineer. " * 200}})
+        response = self.client.get('/data/july-23-resumes', headers={'Accept-Encoding': 'gzip'})
+        documents = json.loads(gzip.decompress(response.data))
+        print(f"{Fore.GREEN}Compressed body: {len(response.data)} bytes for {len(documents)} documents")
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(len(documents), 5)
+        revalidated = self.client.get('/data/july-23-resumes', headers={
+            'Accept-Encoding': 'gzip', 'If-None-Match': response.headers['ETag']})
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_small_responses_not_compressed(self):
+        response = self.client.get('/data', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_metrics_endpoint(self):
+        self.client.get('/data/july-23-resumes/stats')
+        body = self.client.get('/metrics').data.decode()
+        print(f"{Fore.CYAN}Metrics body: {len(body)} bytes")
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertIn('http_request_duration_seconds_count{route="/data/<collection_name>/stats",method="GET",status="200"}', body)
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram('test_seconds', 'Test.', ('route',), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value, ('/data',))
+        lines = histogram.render()
+        print(f"{Fore.GREEN}{lines}")
+        self.assertIn('test_seconds_bucket{route="/data",le="0.1"} 1', lines)
+        self.assertIn('test_seconds_bucket{route="/data",le="1.0"} 2', lines)
+        self.assertIn('test_seconds_bucket{route="/data",le="+Inf"} 3', lines)
+        self.assertIn('test_seconds_count{route="/data"} 3', lines)
+
+    def test_command_listener_counts_returned_documents(self):
+        event = SimpleNamespace(command_name='find', duration_micros=1500,
+                                reply={'cursor': {'firstBatch': [{}, {}, {}], 'id': 0}})
+        command_listener.succeeded(event)
+        body = render_metrics()
+        self.assertIn('mongodb_command_duration_seconds_count{command="find"}', body)
+        self.assertRegex(body, r'mongodb_documents_returned_total\{command="find"\} [1-9]')
+
+class TestSerializers(unittest.TestCase):
+    def test_serializers_agree(self):
+        document = {"_id": ObjectId("66a0e5f0c2a4b1a2b3c4d5e6"), "created_at": datetime.datetime(2024, 7, 23, 12, 30)}
+        expected = {"_id": "66a0e5f0c2a4b1a2b3c4d5e6", "created_at": "2024-07-23T12:30:00"}
+        for name in ('json', 'orjson'):
+            actual = json.loads(get_serializer(name).dumps(document))
+            print(f"{Fore.YELLOW}{name} Expected: {expected}, Actual: {actual}")
+            self.assertEqual(expected, actual)
+
+class TestResponseCache(unittest.TestCase):
+    def test_lru_eviction_by_size(self):
+        cache = ResponseCache(max_bytes=10)
+        cache.put("a", b"1234")
+        cache.put("b", b"1234")
+        cache.get("a")
+        cache.put("c", b"1234")
+        print(f"{Fore.GREEN}Cached keys: {list(cache.entries)}")
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertLessEqual(cache.size, 10)
+
+    def test_oversized_body_not_cached(self):
+        cache = ResponseCache(max_bytes=4)
+        cache.put("a", b"12345")
+        self.assertEqual(cache.size, 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import sys
+import os
+import time
+import tempfile
+from colorama import init, Fore
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from util.local_s3 import LocalS3Client
+from util import s3_access
+init(autoreset=True)
+
+class CountingS3Client(LocalS3Client):
+    def __init__(self, root):
+        super().__init__(root)
+        self.ranges = []
+
+    def get_object(self, Bucket, Key, Range=None, IfMatch=None):
+        self.ranges.append(Range)
+        return super().get_object(Bucket, Key, Range=Range, IfMatch=IfMatch)
+
+class TestS3Access(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp.name, 'cache')
+        self.s3 = CountingS3Client(os.path.join(self.tmp.name, 's3'))
+        self.data = os.urandom(10_000)
+        self.s3.put_object(Bucket='bucket', Key='dir/postings.csv', Body=self.data)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def download(self):
+        return s3_access.download('bucket', 'dir/postings.csv', cache_dir=self.cache_dir, client=self.s3, part_size=3000, max_workers=4)
+
+    def test_parallel_ranges_reassemble_the_object(self):
+        path, transferred = self.download()
+        print(f"{Fore.GREEN}Expected 4 ranges of 10000 bytes, Actual: {self.s3.ranges} ({transferred} bytes)")
+        self.assertEqual(transferred, len(self.data))
+        self.assertEqual(sorted(self.s3.ranges), ['bytes=0-2999', 'bytes=3000-5999', 'bytes=6000-8999', 'bytes=9000-9999'])
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), self.data)
+        self.assertFalse(os.path.exists(path + '.part'))
+
+    def test_unchanged_object_is_not_downloaded_again(self):
+        self.download()
+        self.s3.ranges.clear()
+        path, transferred = self.download()
+        print(f"{Fore.GREEN}Expected no transfer, Actual: {transferred} bytes, {len(self.s3.ranges)} GETs")
+        self.assertEqual(transferred, 0)
+        self.assertEqual(self.s3.ranges, [])
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), self.data)
+
+    def test_changed_object_invalidates_cache(self):
+        self.download()
+        time.sleep(0.01)
+        self.s3.put_object(Bucket='bucket', Key='dir/postings.csv', Body=b'new,contents\n1,2\n')
+        path, transferred = self.download()
+        self.assertEqual(transferred, 17)
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'new,contents\n1,2\n')
+
+    def test_missing_sidecar_forces_download(self):
+        path, _ = self.download()
+        os.remove(path + s3_access.META_SUFFIX)
+        _, transferred = self.download()
+        self.assertEqual(transferred, len(self.data))
+
+if __name__ == "__main__":
+    unittest.main()
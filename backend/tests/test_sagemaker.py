@@ -0,0 +1,89 @@
+import unittest
+import sys
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from colorama import init, Fore
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from util.sagemaker import clean_csv_files, infer_kinds, unify_kinds
+from util.table_io import read_table, write_table
+init(autoreset=True)
+
+class TestSchemaAlignment(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.entities = pd.DataFrame({
+            "entity": [f"entity {i}" for i in range(250)],
+            "salary": [float(i) if i % 50 else np.nan for i in range(250)],
+            "views": range(250),
+        })
+        self.postings = pd.DataFrame({
+            "title": [f"Engineer, \"level\" {i}\nremote" for i in range(300)],
+            "salary": [i * 1000 for i in range(300)],
+            "company_id": range(300),
+        })
+        self.entities_path = write_table(self.entities, os.path.join(self.tmp.name, "entities.csv"))
+        self.postings_path = write_table(self.postings, os.path.join(self.tmp.name, "postings.csv"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def test_columns_are_unified_sorted_and_filled(self):
+        rows = clean_csv_files(self.entities_path, self.postings_path, self.path("entities_out.csv"), self.path("postings_out.csv"),
+                               chunksize=64, sample_rows=100)
+        entities, postings = read_table(self.path("entities_out.csv")), read_table(self.path("postings_out.csv"))
+        print(f"{Fore.GREEN}Expected: (250, 300) rows, Actual: {rows}; columns {list(postings.columns)}")
+        self.assertEqual(rows, (250, 300))
+        self.assertEqual(list(entities.columns), ["company_id", "entity", "salary", "title", "views"])
+        self.assertEqual(list(postings.columns), list(entities.columns))
+        self.assertTrue((entities["company_id"] == 0).all())
+        self.assertTrue(entities["title"].isna().all())
+        self.assertTrue((postings["views"] == 0).all())
+        self.assertEqual(postings["title"].tolist(), self.postings["title"].tolist())
+        self.assertEqual(entities["salary"].isna().sum(), 5)
+
+    def test_chunked_parquet_output_matches_csv_output(self):
+        clean_csv_files(self.entities_path, self.postings_path, self.path("entities.parquet"), self.path("postings.parquet"), chunksize=33)
+        clean_csv_files(self.entities_path, self.postings_path, self.path("entities_out.csv"), self.path("postings_out.csv"), chunksize=1000)
+        for name in ("entities", "postings"):
+            # CSV reads an empty text cell back as missing; Parquet keeps the "" fill
+            columnar = read_table(self.path(f"{name}.parquet")).replace("", np.nan)
+            text = read_table(self.path(f"{name}_out.csv"))
+            pd.testing.assert_frame_equal(columnar, text, check_dtype=False)
+
+    def test_schema_is_inferred_from_sample(self):
+        kinds = unify_kinds(infer_kinds(self.entities_path, 100), infer_kinds(self.postings_path, 100))
+        self.assertEqual(kinds, {"company_id": "int", "entity": "text", "salary": "float", "title": "text", "views": "int"})
+
+    def test_fill_values_and_integers_round_trip_as_before(self):
+        self.entities["remote"] = [i % 2 == 0 for i in range(250)]
+        # text in postings, integers in entities with a missing value past the sample
+        self.postings["ref"] = [f"P-{i}" for i in range(300)]
+        self.entities["ref"] = pd.array([3 if i != 200 else None for i in range(250)], dtype="Int64")
+        write_table(self.entities, self.entities_path)
+        write_table(self.postings, self.postings_path)
+        clean_csv_files(self.entities_path, self.postings_path, self.path("entities_out.csv"), self.path("postings_out.csv"),
+                        chunksize=64, sample_rows=100)
+        entities = pd.read_csv(self.path("entities_out.csv"), dtype=str, keep_default_na=False)
+        postings = pd.read_csv(self.path("postings_out.csv"), dtype=str, keep_default_na=False)
+        print(f"{Fore.MAGENTA}Expected: remote filled with 0 and ref as 3, Actual: {set(postings['remote'])}, {entities['ref'][199]}")
+        self.assertEqual(set(postings["remote"]), {"0"})
+        self.assertEqual(set(entities["ref"]), {"3", ""})
+        # an int column unified with a float one keeps its integers
+        self.assertEqual(postings["salary"][1], "1000")
+        self.assertEqual(entities["salary"][1], "1.0")
+
+    def test_values_outside_the_sampled_type_are_reported(self):
+        self.postings["company_id"] = self.postings["company_id"].astype(object)
+        self.postings.loc[250, "company_id"] = "not a number"
+        write_table(self.postings, self.postings_path)
+        with self.assertRaises(ValueError) as context:
+            clean_csv_files(self.entities_path, self.postings_path, self.path("a.csv"), self.path("b.csv"), chunksize=50, sample_rows=100)
+        self.assertIn("company_id", str(context.exception))
+
+if __name__ == "__main__":
+    unittest.main()
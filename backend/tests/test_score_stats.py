@@ -0,0 +1,62 @@
+import unittest
+import sys
+import os
+import mongomock
+from colorama import init, Fore
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from util.score_stats import collection_stats
+init(autoreset=True)
+
+class TestScoreStats(unittest.TestCase):
+    def setUp(self):
+        self.collection = mongomock.MongoClient().db["july-23-resumes"]
+        self.collection.insert_many([
+            {"score": 10, "truthfulness": False, "didBy": "a"},
+            {"score": 55, "truthfulness": True, "didBy": "a"},
+            {"score": 99, "truthfulness": True, "didBy": "b"},
+            {"score": 100, "truthfulness": True, "didBy": "b"},
+            {"resume_text": "unlabeled"},
+        ])
+
+    def test_counts_and_moments(self):
+        stats = collection_stats(self.collection)
+        print(f"{Fore.GREEN}Stats: {stats['count']} total, {stats['labeled']} labeled, mean {stats['score']['mean']}")
+        self.assertEqual(stats["count"], 5)
+        self.assertEqual(stats["labeled"], 4)
+        self.assertAlmostEqual(stats["score"]["mean"], 66.0)
+        self.assertAlmostEqual(stats["score"]["std"], 37.0877, places=3)
+        self.assertEqual((stats["score"]["min"], stats["score"]["max"]), (10, 100))
+
+    def test_histogram_includes_max_score(self):
+        stats = collection_stats(self.collection, bin_size=25)
+        expected = [1, 0, 1, 2]
+        actual = [b["count"] for b in stats["histogram"]]
+        print(f"{Fore.BLUE}Expected: {expected}, Actual: {actual}")
+        self.assertEqual(expected, actual)
+        self.assertEqual(stats["histogram"][-1]["max"], 100)
+
+    def test_truthfulness_counts(self):
+        expected = {"true": 3, "false": 1, "unlabeled": 1}
+        actual = collection_stats(self.collection)["truthfulness"]
+        print(f"{Fore.YELLOW}Expected: {expected}, Actual: {actual}")
+        self.assertEqual(expected, actual)
+
+    def test_auto_score_counts_for_unreviewed_documents(self):
+        # confident auto scores are never offered for review, so they have to count in the summary
+        self.collection.insert_many([
+            {"auto_score": 90, "needs_review": False},
+            {"auto_score": 65, "needs_review": True, "score": 50},
+        ])
+        stats = collection_stats(self.collection)
+        print(f"{Fore.MAGENTA}Scored: {stats['scored']} ({stats['labeled']} labeled, {stats['auto_scored']} auto), mean {stats['score']['mean']}")
+        self.assertEqual((stats["scored"], stats["labeled"], stats["auto_scored"]), (6, 5, 1))
+        self.assertAlmostEqual(stats["score"]["mean"], (10 + 55 + 99 + 100 + 90 + 50) / 6)
+        self.assertEqual(sum(b["count"] for b in stats["histogram"]), 6)
+
+    def test_empty_collection(self):
+        stats = collection_stats(mongomock.MongoClient().db["empty-resumes"])
+        self.assertEqual(stats["count"], 0)
+        self.assertIsNone(stats["score"]["mean"])
+
+if __name__ == "__main__":
+    unittest.main()
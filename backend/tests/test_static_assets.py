@@ -0,0 +1,65 @@
+import unittest
+import sys
+import os
+import gzip
+import tempfile
+from flask import Flask, request
+from colorama import init, Fore
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.static_assets import AssetManifest, precompress_directory, IMMUTABLE_CACHE_CONTROL
+init(autoreset=True)
+
+class TestStaticAssets(unittest.TestCase):
+    def setUp(self):
+        self.build = tempfile.TemporaryDirectory()
+        os.makedirs(os.path.join(self.build.name, 'static', 'js'))
+        with open(os.path.join(self.build.name, 'index.html'), 'w') as f:
+            f.write('<html>' + 'dashboard ' * 100 + '</html>')
+        with open(os.path.join(self.build.name, 'static', 'js', 'main.3f2a1b4c.js'), 'w') as f:
+            f.write('console.log("chart");' * 100)
+        precompress_directory(self.build.name)
+
+        manifest = AssetManifest(self.build.name)
+        app = Flask(__name__, static_folder=None)
+
+        @app.route('/', defaults={'path': ''})
+        @app.route('/<path:path>')
+        def serve(path):
+            return manifest.send(path, request.accept_encodings)
+
+        self.manifest = manifest
+        self.client = app.test_client()
+
+    def tearDown(self):
+        self.build.cleanup()
+
+    def test_manifest_indexes_variants(self):
+        variants = self.manifest.assets['static/js/main.3f2a1b4c.js']
+        print(f"{Fore.GREEN}Variants: {variants}")
+        self.assertEqual(variants['gzip'], 'static/js/main.3f2a1b4c.js.gz')
+        self.assertNotIn('index.html.gz', self.manifest.assets)
+
+    def test_hashed_asset_is_immutable_and_precompressed(self):
+        response = self.client.get('/static/js/main.3f2a1b4c.js', headers={'Accept-Encoding': 'gzip'})
+        print(f"{Fore.BLUE}Cache-Control: {response.headers['Cache-Control']}")
+        self.assertEqual(response.headers['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('javascript', response.mimetype)
+        self.assertTrue(gzip.decompress(response.get_data()).startswith(b'console.log'))
+        response.close()
+
+    def test_index_revalidates_and_serves_identity_when_not_accepted(self):
+        response = self.client.get('/', headers={'Accept-Encoding': 'identity'})
+        self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertTrue(response.get_data().startswith(b'<html>'))
+        response.close()
+
+    def test_unknown_path_falls_back_to_index(self):
+        response = self.client.get('/dashboard/july-23-resumes')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/html')
+        response.close()
+
+if __name__ == "__main__":
+    unittest.main()
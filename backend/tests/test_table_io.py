@@ -0,0 +1,89 @@
+import unittest
+import sys
+import os
+import tempfile
+import pandas as pd
+from colorama import init, Fore
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from util.table_io import read_table, write_table, iter_batches, stage_path, resolve_path
+from util.csv_stream import iter_pairs, open_table_writer
+init(autoreset=True)
+
+LATEX = "\\documentclass{article}\n\\begin{document}\n\"Quoted\", with, commas\n\\end{document}"
+
+class TestTableIO(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.df = pd.DataFrame({
+            "resume_text": [f"Resume {i}\n{LATEX}" for i in range(30)],
+            "job_description": [f"Job {i}" for i in range(30)],
+            "input_tokens": range(30),
+        })
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_and_projection_in_every_format(self):
+        for fmt in ("parquet", "arrow", "csv"):
+            path = write_table(self.df, stage_path(self.tmp.name, "stage", fmt))
+            full = read_table(path)
+            projected = read_table(path, columns=["job_description"])
+            print(f"{Fore.GREEN}{fmt}: {os.path.getsize(path)} bytes, projected columns {list(projected.columns)}")
+            self.assertEqual(full["resume_text"].tolist(), self.df["resume_text"].tolist())
+            self.assertEqual(full["input_tokens"].tolist(), list(range(30)))
+            self.assertEqual(list(projected.columns), ["job_description"])
+
+    def test_iter_batches_and_pairs_read_columnar_files(self):
+        write_table(self.df[["resume_text"]], os.path.join(self.tmp.name, "resumes.parquet"))
+        write_table(self.df[["job_description"]].head(12), os.path.join(self.tmp.name, "jobs.arrow"))
+        sizes = [len(batch) for batch in iter_batches(os.path.join(self.tmp.name, "resumes.parquet"), ["resume_text"], 7)]
+        self.assertEqual(sizes, [7, 7, 7, 7, 2])
+        pairs = list(iter_pairs(os.path.join(self.tmp.name, "resumes.parquet"), os.path.join(self.tmp.name, "jobs.arrow"), chunksize=5))
+        self.assertEqual(len(pairs), 12)
+        self.assertEqual(pairs[11], (f"Resume 11\n{LATEX}", "Job 11"))
+
+    def test_resolve_path_picks_most_recently_written_format(self):
+        csv_path = write_table(self.df, stage_path(self.tmp.name, "cleaned_resumes", "csv"))
+        self.assertTrue(resolve_path(self.tmp.name, "cleaned_resumes").endswith(".csv"))
+        parquet_path = write_table(self.df, stage_path(self.tmp.name, "cleaned_resumes", "parquet"))
+        os.utime(csv_path, ns=(1_000_000_000, 1_000_000_000))
+        self.assertEqual(resolve_path(self.tmp.name, "cleaned_resumes"), parquet_path)
+        # a later --format csv run must not be shadowed by the older parquet file
+        os.utime(parquet_path, ns=(1_000_000_000, 1_000_000_000))
+        os.utime(csv_path, ns=(2_000_000_000, 2_000_000_000))
+        print(f"{Fore.GREEN}Expected: {csv_path}, Actual: {resolve_path(self.tmp.name, 'cleaned_resumes')}")
+        self.assertEqual(resolve_path(self.tmp.name, "cleaned_resumes"), csv_path)
+        with self.assertRaises(FileNotFoundError):
+            resolve_path(self.tmp.name, "missing")
+
+    def test_incremental_parquet_writer_writes_row_groups(self):
+        path = os.path.join(self.tmp.name, "out", "results.parquet")
+        with open_table_writer(path, ["resume_text", "input_tokens"], part_rows=4) as writer:
+            for row in self.df.head(10).to_dict("records"):
+                writer.write(row)
+        written = read_table(path)
+        self.assertEqual(len(written), 10)
+        self.assertEqual(list(written.columns), ["resume_text", "input_tokens"])
+        self.assertEqual(written["resume_text"][3], self.df["resume_text"][3])
+        # a killed run (no close) keeps every flushed part
+        killed = open_table_writer(os.path.join(self.tmp.name, "killed.parquet"), ["resume_text", "input_tokens"], part_rows=4)
+        for row in self.df.head(10).to_dict("records"):
+            killed.write(row)
+        survived = read_table(killed.path)
+        print(f"{Fore.YELLOW}Expected: 8 rows after a kill, Actual: {len(survived)}")
+        self.assertEqual(survived["input_tokens"].tolist(), list(range(8)))
+        self.assertEqual(sum(len(batch) for batch in iter_batches(killed.path, ["resume_text"], 3)), 8)
+        self.assertEqual(resolve_path(self.tmp.name, "killed"), killed.path)
+        # the next run starts clean, including a temporary part the kill left behind
+        open(os.path.join(killed.path, ".part-00002.parquet.tmp"), "wb").close()
+        with open_table_writer(killed.path, ["resume_text", "input_tokens"], part_rows=4) as rerun:
+            rerun.write(self.df.head(1).to_dict("records")[0])
+        self.assertEqual(sorted(os.listdir(killed.path)), ["part-00000.parquet"])
+        self.assertEqual(len(read_table(killed.path)), 1)
+        empty = os.path.join(self.tmp.name, "empty.parquet")
+        with open_table_writer(empty, ["resume_text"]):
+            pass
+        self.assertEqual(len(read_table(empty)), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import sys
+import os
+import mongomock
+from colorama import init, Fore
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from util.internal_collections import TEXTS_COLLECTION
+from util.prompt_templates import render_prompt
+from util.text_store import TextResolver, store_texts, text_id, dedupe_collection
+init(autoreset=True)
+
+class CountingDatabase:
+    """
+    Wraps a mongomock database and counts queries against the texts collection.
+    """
+    def __init__(self, db):
+        self.db = db
+        self.text_queries = 0
+
+    def __getitem__(self, name):
+        collection = self.db[name]
+        if name != TEXTS_COLLECTION:
+            return collection
+        outer = self
+
+        class Counting:
+            def find(self, *args, **kwargs):
+                outer.text_queries += 1
+                return collection.find(*args, **kwargs)
+        return Counting()
+
+class TestTextStore(unittest.TestCase):
+    def setUp(self):
+        self.db = mongomock.MongoClient().db
+
+    def test_store_texts_is_idempotent(self):
+        ids = store_texts(self.db, ["Resume A", "Job A", "Resume A"])
+        store_texts(self.db, ["Resume A", "Job B"])
+        print(f"{Fore.GREEN}Expected: 3 texts, Actual: {self.db[TEXTS_COLLECTION].count_documents({})}")
+        self.assertEqual(ids[0], ids[2])
+        self.assertEqual(ids[0], text_id("Resume A"))
+        self.assertEqual(self.db[TEXTS_COLLECTION].count_documents({}), 3)
+
+    def test_resolver_inlines_texts_and_renders_prompt(self):
+        resume_id, job_id = store_texts(self.db, ["Resume A", "Job A"])
+        docs = [
+            {"_id": i, "resume_text_ref": resume_id, "job_description_ref": job_id, "generated_resume": "...",
+             "prompt_template": "latex_resume_v1", "prompt_params": {"resume_text": resume_id, "job_description": job_id}}
+            for i in range(3)
+        ]
+        db = CountingDatabase(self.db)
+        resolver = TextResolver()
+        resolver.resolve_documents(db, docs)
+        resolver.resolve_documents(db, [{"resume_text_ref": resume_id}])
+        print(f"{Fore.BLUE}Texts queries: {db.text_queries}, hits: {resolver.hits}, misses: {resolver.misses}")
+        self.assertEqual(db.text_queries, 1)
+        self.assertEqual(docs[0]["resume_text"], "Resume A")
+        self.assertEqual(docs[2]["prompt"], render_prompt("latex_resume_v1", {"resume_text": "Resume A", "job_description": "Job A"}))
+        self.assertNotIn("prompt_params", docs[1])
+
+    def test_resolver_evicts_by_size(self):
+        ids = store_texts(self.db, ["a" * 40, "b" * 40, "c" * 40])
+        resolver = TextResolver(max_bytes=100)
+        resolver.resolve(self.db, ids)
+        self.assertLessEqual(resolver.size, 100)
+        self.assertEqual(len(resolver.entries), 2)
+
+    def test_dedupe_collection(self):
+        self.db["july-01-resumes"].insert_many([{"resume_text": "Same resume", "job_description": f"Job {i}", "prompt": "p"} for i in range(4)])
+        self.assertEqual(dedupe_collection(self.db, "july-01-resumes"), 4)
+        self.assertEqual(self.db[TEXTS_COLLECTION].count_documents({}), 6)
+        resolved = TextResolver().resolve_documents(self.db, list(self.db["july-01-resumes"].find()))
+        self.assertEqual([doc["job_description"] for doc in resolved], [f"Job {i}" for i in range(4)])
+        self.assertEqual(resolved[0]["prompt"], "p")
+        self.assertEqual(dedupe_collection(self.db, "july-01-resumes"), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import sys
+import os
+import mongomock
+from colorama import init, Fore
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from util.collection_versions import bump_collection_version
+from util.internal_collections import TRENDS_COLLECTION
+from unittest import mock
+import util.trend_rollup as trend_rollup
+from util.trend_rollup import refresh_collection_summary, refresh_trends, fetch_trends, record_document_change
+init(autoreset=True)
+
+class TestTrendRollup(unittest.TestCase):
+    def setUp(self):
+        self.db = mongomock.MongoClient().db
+        self.db["july-23-resumes"].insert_many([
+            {"score": 40, "truthfulness": True},
+            {"score": 60, "truthfulness": False},
+            {"resume_text": "unlabeled"},
+        ])
+        self.db["july-24-resumes"].insert_many([
+            {"score": 80, "truthfulness": True},
+            {"score": 100, "truthfulness": True},
+            {"auto_score": 70, "needs_review": False},
+        ])
+        self.db["Resumes"].insert_one({"resume_text": "not a daily collection"})
+
+    def test_refresh_builds_one_summary_per_day(self):
+        refreshed = refresh_trends(self.db)
+        print(f"{Fore.GREEN}Refreshed: {refreshed}")
+        self.assertEqual(refreshed, ["july-23-resumes", "july-24-resumes"])
+        summary = self.db[TRENDS_COLLECTION].find_one({"_id": "july-23-resumes"})
+        self.assertEqual((summary["count"], summary["labeled"]), (3, 2))
+        self.assertAlmostEqual(summary["mean"], 50.0)
+        self.assertAlmostEqual(summary["truthful_ratio"], 0.5)
+
+    def test_unchanged_collections_are_skipped(self):
+        refresh_trends(self.db)
+        self.assertEqual(refresh_trends(self.db), [])
+        self.db["july-24-resumes"].update_one({"score": 80}, {"$set": {"score": 90}})
+        bump_collection_version(self.db, "july-24-resumes")
+        expected = ["july-24-resumes"]
+        actual = refresh_trends(self.db)
+        print(f"{Fore.BLUE}Expected: {expected}, Actual: {actual}")
+        self.assertEqual(expected, actual)
+
+    def test_fetch_trends_series_and_overall(self):
+        refresh_trends(self.db)
+        trends = fetch_trends(self.db)
+        actual = [summary["collection"] for summary in trends["series"]]
+        print(f"{Fore.YELLOW}Series: {actual}, overall: {trends['overall']}")
+        self.assertEqual(actual, ["july-23-resumes", "july-24-resumes"])
+        self.assertNotIn("sum", trends["series"][0])
+        self.assertEqual((trends["overall"]["labeled"], trends["overall"]["auto_scored"]), (4, 1))
+        self.assertAlmostEqual(trends["overall"]["mean"], 70.0)
+        self.assertAlmostEqual(trends["overall"]["std"], 20.0)
+
+    def test_single_collection_refresh(self):
+        self.assertTrue(refresh_collection_summary(self.db, "july-23-resumes"))
+        self.assertFalse(refresh_collection_summary(self.db, "july-23-resumes"))
+        self.assertTrue(refresh_collection_summary(self.db, "july-23-resumes", force=True))
+
+    def test_document_change_updates_summary_without_reaggregating(self):
+        refresh_trends(self.db)
+        collection = self.db["july-24-resumes"]
+        edits = [
+            # a label on an auto-scored document, a relabel across histogram bins, a truthfulness flip
+            ({"auto_score": 70}, {"score": 35, "truthfulness": False}),
+            ({"score": 80}, {"score": 100}),
+            ({"score": 100, "truthfulness": True}, {"truthfulness": False}),
+        ]
+        with mock.patch.object(trend_rollup, "collection_stats", side_effect=AssertionError("re-aggregated")):
+            for query, update in edits:
+                before = collection.find_one_and_update(query, {"$set": update})
+                bump_collection_version(self.db, "july-24-resumes")
+                self.assertTrue(record_document_change(self.db, "july-24-resumes", before, {**before, **update}))
+        incremental = self.db[TRENDS_COLLECTION].find_one({"_id": "july-24-resumes"})
+        # the stored fingerprint is current, so the periodic refresh has nothing to redo
+        self.assertEqual(refresh_trends(self.db), [])
+
+        refresh_collection_summary(self.db, "july-24-resumes", force=True)
+        full = self.db[TRENDS_COLLECTION].find_one({"_id": "july-24-resumes"})
+        fields = ["count", "scored", "labeled", "auto_scored", "sum", "sum_sq", "truthfulness", "histogram", "truthful_ratio"]
+        print(f"{Fore.CYAN}Incremental mean: {incremental['mean']}, Recomputed mean: {full['mean']}")
+        self.assertEqual({f: incremental[f] for f in fields}, {f: full[f] for f in fields})
+        self.assertAlmostEqual(incremental["mean"], full["mean"])
+        self.assertAlmostEqual(incremental["std"], full["std"])
+
+    def test_document_change_without_summary_rebuilds_it(self):
+        before = self.db["july-23-resumes"].find_one({"resume_text": "unlabeled"})
+        self.assertTrue(record_document_change(self.db, "july-23-resumes", before, {**before, "score": 90}))
+        self.assertIsNotNone(self.db[TRENDS_COLLECTION].find_one({"_id": "july-23-resumes"}))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+# util/ats_scorer.py
+
+import os
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+REVIEW_THRESHOLD = int(os.getenv('ATS_REVIEW_THRESHOLD', 60))
+REVIEW_MARGIN = int(os.getenv('ATS_REVIEW_MARGIN', 10))
+
+# weights of the three components in auto_score
+COVERAGE_WEIGHT = 0.6
+SECTION_WEIGHT = 0.25
+FORMAT_WEIGHT = 0.15
+
+REQUIRED_SECTIONS = {
+    'education': r'education',
+    'experience': r'(?:work |professional )?experience|employment',
+    'skills': r'skills',
+}
+MIN_WORDS = 250
+MAX_WORDS = 900
+
+LATEX_ENVIRONMENT_RE = r'\\(begin|end)\{[^}]*\}'
+LATEX_COMMAND_RE = r'\\[a-zA-Z]+\*?(\[[^\]]*\])?'
+CONTACT_RE = r'[\w.+-]+@[\w-]+\.[\w.]+|\(?\d{3}\)?[\s.-]\d{3}[\s.-]\d{4}'
+
+def plain_text(latex):
+    """
+    Series of LaTeX sources -> Series of the words a parser would see.
+    """
+    return (latex.fillna('')
+            .str.replace(LATEX_ENVIRONMENT_RE, ' ', regex=True)
+            .str.replace(LATEX_COMMAND_RE, ' ', regex=True)
+            .str.replace(r'[{}\\$&%#_^~]', ' ', regex=True)
+            .str.replace(r'\s+', ' ', regex=True)
+            .str.strip())
+
+def keyword_coverage(resumes, job_descriptions):
+    """
+    IDF-weighted share of each job description's keywords that appear in the matching resume.
+
+    Both sides are vectorized over the shared vocabulary as binary sparse matrices, so the whole batch
+    is one element-wise product and two row sums.
+    """
+    vectorizer = TfidfVectorizer(stop_words='english', binary=True, use_idf=True, norm=None,
+                                 token_pattern=r'(?u)\b[a-zA-Z][a-zA-Z+#.]{1,}\b', min_df=1)
+    vectorizer.fit(pd.concat([job_descriptions, resumes]))
+    jobs = vectorizer.transform(job_descriptions)
+    present = vectorizer.transform(resumes)
+    present.data[:] = 1.0
+    matched = np.asarray(jobs.multiply(present).sum(axis=1)).ravel()
+    total = np.asarray(jobs.sum(axis=1)).ravel()
+    return np.divide(matched, total, out=np.zeros_like(matched), where=total > 0)
+
+def section_scores(latex):
+    """
+    Share of the required sections (education, experience, skills) that have a heading.
+    """
+    headings = latex.fillna('').str.findall(r'\\(?:sub)?section\*?\{([^}]*)\}').str.join('\n').str.lower()
+    found = [headings.str.contains(pattern, regex=True).to_numpy() for pattern in REQUIRED_SECTIONS.values()]
+    return np.mean(found, axis=0)
+
+def format_checks(latex, words):
+    """
+    :return: A DataFrame of boolean checks, one column per check.
+    """
+    latex = latex.fillna('')
+    word_counts = words.str.count(' ') + (words.str.len() > 0)
+    return pd.DataFrame({
+        'document_structure': latex.str.contains(r'\\documentclass', regex=True) & latex.str.contains(r'\\begin\{document\}', regex=True)
+                              & latex.str.contains(r'\\end\{document\}', regex=True),
+        'balanced_braces': latex.str.count(r'\{') == latex.str.count(r'\}'),
+        'bullet_points': latex.str.contains(r'\\item\b', regex=True),
+        'length': word_counts.between(MIN_WORDS, MAX_WORDS),
+        'no_contact_info': ~words.str.contains(CONTACT_RE, regex=True),
+    }, index=latex.index)
+
+def score_resumes(generated_resumes, job_descriptions):
+    """
+    Score a batch of generated LaTeX resumes against their job descriptions.
+
+    :param generated_resumes: Series of LaTeX sources.
+    :param job_descriptions: Series of job descriptions, aligned with generated_resumes.
+    :return: A DataFrame with auto_score (0-100), coverage, sections, format and needs_review.
+    """
+    generated_resumes = generated_resumes.reset_index(drop=True)
+    job_descriptions = job_descriptions.fillna('').reset_index(drop=True)
+    words = plain_text(generated_resumes)
+    coverage = keyword_coverage(words, job_descriptions)
+    sections = section_scores(generated_resumes)
+    checks = format_checks(generated_resumes, words)
+    format_score = checks.mean(axis=1).to_numpy()
+
+    auto_score = np.rint(100 * (COVERAGE_WEIGHT * coverage + SECTION_WEIGHT * sections + FORMAT_WEIGHT * format_score)).astype(int)
+    # humans look at scores near the pass mark and at anything that is not a well-formed document
+    needs_review = (np.abs(auto_score - REVIEW_THRESHOLD) <= REVIEW_MARGIN) | ~checks['document_structure'].to_numpy()
+    return pd.DataFrame({
+        'auto_score': auto_score,
+        'coverage': coverage.round(4),
+        'sections': sections.round(4),
+        'format': format_score.round(4),
+        'needs_review': needs_review,
+    })
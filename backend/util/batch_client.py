@@ -0,0 +1,168 @@
+# util/batch_client.py
+
+import json
+import time
+import uuid
+
+CHAT_COMPLETIONS_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+# the OpenAI SDK's default
+SDK_MAX_RETRIES = 2
+
+class BatchFailedError(RuntimeError):
+    """
+    A batch reached a terminal status other than 'completed'; it will never produce results.
+    """
+    def __init__(self, batch_id, status):
+        super().__init__(f"Batch {batch_id} ended with status '{status}'.")
+        self.batch_id = batch_id
+        self.status = status
+
+def build_batch_request(custom_id, body):
+    return {"custom_id": custom_id, "method": "POST", "url": CHAT_COMPLETIONS_ENDPOINT, "body": body}
+
+def write_batch_file(path, requests):
+    """
+    Write batch requests as JSONL, one request per line.
+
+    :return: The number of requests written.
+    """
+    count = 0
+    with open(path, 'w') as f:
+        for batch_request in requests:
+            f.write(json.dumps(batch_request) + '\n')
+            count += 1
+    return count
+
+def parse_batch_results(lines):
+    """
+    Map batch output lines back to their requests.
+
+    :param lines: JSONL lines from a batch output (or error) file.
+    :return: A dict of custom_id -> (completion entry or None, error message or None), where an entry
+             holds content, usage and finish_reason like util.completion_cache.completion_entry.
+    """
+    results = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            error = record.get("error") or response.get("body", {}).get("error")
+            results[record["custom_id"]] = (None, str(error))
+        else:
+            body = response["body"]
+            usage = body.get("usage")
+            entry = {
+                "content": body["choices"][0]["message"]["content"],
+                "usage": {"prompt_tokens": usage["prompt_tokens"], "completion_tokens": usage["completion_tokens"]} if usage else None,
+                "finish_reason": body["choices"][0].get("finish_reason"),
+            }
+            results[record["custom_id"]] = (entry, None)
+    return results
+
+class OpenAIBatchService:
+    """
+    Batch jobs on the OpenAI Batch API.
+
+    Uploads and polls are not wrapped in tenacity, so they use the SDK's retries (max_retries) even when
+    client has them off for the generation engine.
+    """
+    def __init__(self, client, completion_window="24h", max_retries=SDK_MAX_RETRIES):
+        self.client = client.with_options(max_retries=max_retries)
+        self.completion_window = completion_window
+
+    def submit(self, path):
+        with open(path, 'rb') as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=CHAT_COMPLETIONS_ENDPOINT,
+            completion_window=self.completion_window
+        )
+        return batch.id
+
+    def status(self, batch_id):
+        return self.client.batches.retrieve(batch_id).status
+
+    def result_lines(self, batch_id):
+        batch = self.client.batches.retrieve(batch_id)
+        lines = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                lines.extend(self.client.files.content(file_id).text.splitlines())
+        return lines
+
+class LocalBatchService:
+    """
+    In-process stand-in for the Batch API, for tests and dry runs.
+
+    :param respond: Callable mapping a chat completion request body to the completion text.
+    :param polls_until_complete: How many status() calls report 'in_progress' before the final status.
+    :param final_status: Status reported once polling is done ('completed', or e.g. 'expired' to simulate a failure).
+    """
+    def __init__(self, respond, polls_until_complete=1, final_status="completed"):
+        self.respond = respond
+        self.polls_until_complete = polls_until_complete
+        self.final_status = final_status
+        self.batches = {}
+
+    def submit(self, path):
+        with open(path) as f:
+            requests = [json.loads(line) for line in f if line.strip()]
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        self.batches[batch_id] = {"requests": requests, "polls": 0}
+        return batch_id
+
+    def status(self, batch_id):
+        batch = self.batches[batch_id]
+        batch["polls"] += 1
+        return self.final_status if batch["polls"] > self.polls_until_complete else "in_progress"
+
+    def result_lines(self, batch_id):
+        lines = []
+        for batch_request in self.batches[batch_id]["requests"]:
+            try:
+                content = self.respond(batch_request["body"])
+                response = {"status_code": 200, "body": {
+                    "object": "chat.completion",
+                    "model": batch_request["body"].get("model"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                }}
+                record = {"id": uuid.uuid4().hex, "custom_id": batch_request["custom_id"], "response": response, "error": None}
+            except Exception as e:
+                record = {"id": uuid.uuid4().hex, "custom_id": batch_request["custom_id"], "response": None,
+                          "error": {"code": "local_error", "message": str(e)}}
+            lines.append(json.dumps(record))
+        return lines
+
+def run_batch(service, path, poll_interval=60, timeout=24 * 60 * 60, sleep=time.sleep, batch_id=None, on_submit=None):
+    """
+    Submit a request file, poll until the batch finishes, and return its parsed results.
+
+    :param batch_id: Id of an already submitted batch to poll instead of submitting path again.
+    :param on_submit: Called with the new batch id right after submission, so callers can checkpoint it.
+    :raises BatchFailedError: If the batch ends in a status other than 'completed'.
+    :raises RuntimeError: If the batch does not finish within timeout seconds.
+    """
+    if batch_id:
+        print(f"Resuming batch {batch_id}. Polling every {poll_interval} seconds...")
+    else:
+        batch_id = service.submit(path)
+        if on_submit:
+            on_submit(batch_id)
+        print(f"Submitted batch {batch_id}. Polling every {poll_interval} seconds...")
+    waited = 0
+    while True:
+        status = service.status(batch_id)
+        if status in TERMINAL_STATUSES:
+            break
+        if waited >= timeout:
+            raise RuntimeError(f"Batch {batch_id} did not finish within {timeout} seconds (status: {status}).")
+        sleep(poll_interval)
+        waited += poll_interval
+    if status != "completed":
+        raise BatchFailedError(batch_id, status)
+    print(f"Batch {batch_id} completed.")
+    return parse_batch_results(service.result_lines(batch_id))
@@ -0,0 +1,29 @@
+# util/collection_versions.py
+
+from util.internal_collections import VERSIONS_COLLECTION
+
+def bump_collection_version(db, collection_name):
+    """
+    Record that documents in a collection changed in place (e.g. a label was saved).
+
+    Inserts are already visible through the document count and max _id, but updates are not,
+    so writers that modify existing documents must bump the stored version stamp.
+    """
+    db[VERSIONS_COLLECTION].update_one(
+        {"_id": collection_name},
+        {"$inc": {"version": 1}},
+        upsert=True
+    )
+
+def collection_fingerprint(db, collection_name):
+    """
+    Cheap version fingerprint for a collection: stored version stamp, document count and max _id.
+    """
+    collection = db[collection_name]
+    stamp = db[VERSIONS_COLLECTION].find_one({"_id": collection_name}, {"version": 1})
+    latest = next(collection.find({}, {"_id": 1}).sort("_id", -1).limit(1), None)
+    return "{}:{}:{}".format(
+        stamp["version"] if stamp else 0,
+        collection.estimated_document_count(),
+        latest["_id"] if latest else ""
+    )
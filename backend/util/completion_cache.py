@@ -0,0 +1,152 @@
+# util/completion_cache.py
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+DEFAULT_CACHE_PATH = 'data/cache/completions.sqlite'
+
+class CompletionCache:
+    """
+    Persistent on-disk cache of chat completions, keyed by a hash of the full request body.
+
+    The key covers model, parameters and the rendered messages, so any change that alters the prompt
+    misses the cache, while reruns of identical requests never hit the API again. Least recently used
+    entries are evicted once the stored responses exceed max_bytes.
+    """
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=512 * 1024 * 1024):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS completions_accessed_at ON completions (accessed_at)")
+        self.size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+
+    @classmethod
+    def from_env(cls):
+        if os.getenv('COMPLETION_CACHE', 'on').lower() == 'off':
+            return None
+        return cls(
+            path=os.getenv('COMPLETION_CACHE_PATH', DEFAULT_CACHE_PATH),
+            max_bytes=int(os.getenv('COMPLETION_CACHE_MAX_MB', 512)) * 1024 * 1024
+        )
+
+    @staticmethod
+    def key(request_body, scope=None):
+        """
+        :param scope: Optional namespace (e.g. a run's target collection); the same request in another scope misses.
+        """
+        keyed = request_body if scope is None else {"scope": scope, "body": request_body}
+        return hashlib.sha256(json.dumps(keyed, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def get(self, request_body, scope=None):
+        """
+        :return: The cached entry (a dict with at least 'content') or None.
+        """
+        key = self.key(request_body, scope)
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.connection.execute("UPDATE completions SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+            return json.loads(row[0])
+
+    def put(self, request_body, entry, scope=None):
+        key = self.key(request_body, scope)
+        value = json.dumps(entry)
+        size = len(value.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            previous = self.connection.execute("SELECT size FROM completions WHERE key = ?", (key,)).fetchone()
+            self.connection.execute(
+                "INSERT OR REPLACE INTO completions (key, value, size, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time())
+            )
+            self.size += size - (previous[0] if previous else 0)
+            if self.size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # drop least recently used entries until back under 90% of the budget, so puts don't evict one by one
+        target = int(self.max_bytes * 0.9)
+        rows = self.connection.execute("SELECT key, size FROM completions ORDER BY accessed_at").fetchall()
+        evicted = []
+        for key, size in rows:
+            if self.size <= target:
+                break
+            evicted.append((key,))
+            self.size -= size
+        self.connection.executemany("DELETE FROM completions WHERE key = ?", evicted)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "bytes": self.size,
+        }
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def get_completion_cache():
+    """
+    Process-wide cache configured from the environment, opened on first use.
+
+    :return: A CompletionCache, or None when COMPLETION_CACHE=off.
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = CompletionCache.from_env() or False
+        return _shared_cache or None
+
+def completion_entry(response):
+    """
+    The parts of a chat completion response worth keeping: text, token usage and finish reason.
+    """
+    choice = response.choices[0]
+    usage = getattr(response, "usage", None)
+    return {
+        "content": choice.message.content,
+        "usage": {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens} if usage else None,
+        "finish_reason": getattr(choice, "finish_reason", None),
+    }
+
+def cached_completion(cache, request_body, create, scope=None):
+    """
+    Return the completion entry for request_body, calling create(request_body) only on a cache miss.
+
+    :param cache: A CompletionCache, or None to always call create.
+    :param create: Callable sending the request and returning the chat completion response.
+    :param scope: Cache namespace passed to CompletionCache.get/put.
+    :return: A dict with content, usage and finish_reason (see completion_entry).
+    """
+    if cache is not None:
+        entry = cache.get(request_body, scope)
+        if entry is not None:
+            return entry
+    entry = completion_entry(create(request_body))
+    if cache is not None and entry["content"]:
+        cache.put(request_body, entry, scope)
+    return entry
@@ -0,0 +1,67 @@
+# util/csv_stream.py
+
+import os
+import csv
+from itertools import islice
+from util.table_io import iter_batches, table_format, IncrementalParquetWriter, PARQUET_PART_ROWS
+
+DEFAULT_CHUNK_ROWS = int(os.getenv('CSV_CHUNK_ROWS', 500))
+
+def iter_column(path, column, chunksize=DEFAULT_CHUNK_ROWS):
+    """
+    Yield the values of one column of a CSV, Parquet or Arrow file, reading chunksize rows at a time.
+    """
+    for chunk in iter_batches(path, [column], chunksize):
+        yield from chunk[column].tolist()
+
+def iter_pairs(resume_path, job_path, limit=None, chunksize=DEFAULT_CHUNK_ROWS):
+    """
+    Yield (resume_text, job_description) pairs row by row from the two processed files.
+
+    Pairing stops at the shorter file (or after limit pairs); only one chunk of each file is in memory.
+    """
+    pairs = zip(iter_column(resume_path, 'resume_text', chunksize), iter_column(job_path, 'job_description', chunksize))
+    return islice(pairs, limit) if limit else pairs
+
+class IncrementalCSVWriter:
+    """
+    Append rows to a CSV as they are produced, so memory stays flat and a crash keeps what was written.
+
+    :param flush_every: Rows between flushes to disk.
+    """
+    def __init__(self, path, columns, flush_every=50):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.columns = columns
+        self.flush_every = flush_every
+        self.rows = 0
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.DictWriter(self.file, fieldnames=columns)
+        self.writer.writeheader()
+
+    def write(self, row):
+        self.writer.writerow(row)
+        self.rows += 1
+        if self.rows % self.flush_every == 0:
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def open_table_writer(path, columns, flush_every=50, part_rows=PARQUET_PART_ROWS):
+    """
+    An incremental writer for path's format: .parquet (part files of part_rows rows) or .csv (flushed every flush_every rows).
+    """
+    fmt = table_format(path)
+    if fmt == 'parquet':
+        return IncrementalParquetWriter(path, columns, part_rows)
+    if fmt == 'csv':
+        return IncrementalCSVWriter(path, columns, flush_every)
+    raise ValueError(f"Incremental writes support .parquet and .csv, not {path}")
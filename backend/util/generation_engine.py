@@ -0,0 +1,152 @@
+# util/generation_engine.py
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from openai import RateLimitError
+from util.rate_limiter import RateLimiter
+
+CHARS_PER_TOKEN = 4
+_NO_MORE_JOBS = object()
+
+def openai_client_options():
+    """
+    OpenAI client settings from the environment.
+
+    OPENAI_BASE_URL points the scripts at another endpoint, such as util/openai_stub_server.py. The
+    SDK's own retries are off: they would resend 429s without passing through the engine's throttle and
+    concurrency limit, so the completion calls leave all retrying to tenacity and before_retry_sleep.
+    Calls made outside the engine (e.g. OpenAIBatchService) turn them back on with client.with_options().
+    """
+    options = {"max_retries": 0}
+    if os.getenv('OPENAI_BASE_URL'):
+        options["base_url"] = os.getenv('OPENAI_BASE_URL')
+    return options
+
+def estimate_request_tokens(prompt, max_tokens):
+    # rough count for rate limiting; OpenAI counts prompt tokens plus max_tokens against TPM
+    return len(prompt) // CHARS_PER_TOKEN + max_tokens
+
+class AdaptiveConcurrency:
+    """
+    Concurrency limit that halves on rate limiting and grows by one after a run of successes (AIMD).
+    """
+    def __init__(self, initial, minimum=1, maximum=None, increase_after=10):
+        self.maximum = maximum or initial
+        self.minimum = minimum
+        self.limit = max(minimum, min(initial, self.maximum))
+        self.increase_after = increase_after
+        self.active = 0
+        self.successes = 0
+        self.rate_limited = 0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        with self.condition:
+            while self.active >= self.limit:
+                self.condition.wait()
+            self.active += 1
+
+    def release(self):
+        with self.condition:
+            self.active -= 1
+            self.condition.notify_all()
+
+    def on_success(self):
+        with self.condition:
+            self.successes += 1
+            if self.successes >= self.increase_after and self.limit < self.maximum:
+                self.limit += 1
+                self.successes = 0
+                self.condition.notify_all()
+
+    def on_rate_limited(self):
+        with self.condition:
+            self.limit = max(self.minimum, self.limit // 2)
+            self.successes = 0
+            self.rate_limited += 1
+
+class GenerationEngine:
+    """
+    Runs generation jobs on a thread pool with adaptive concurrency and RPM/TPM rate limiting.
+
+    The function that calls the API must call throttle() before every attempt (including retries),
+    and should pass before_retry_sleep as tenacity's before_sleep so 429s shrink concurrency. A job
+    gives up its concurrency slot while it sleeps before a retry and takes one again in throttle().
+    """
+    def __init__(self, max_concurrency=8, requests_per_minute=500, tokens_per_minute=60000, min_concurrency=1):
+        self.max_concurrency = max_concurrency
+        self.concurrency = AdaptiveConcurrency(max_concurrency, minimum=min_concurrency)
+        self.limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        # per worker thread: in_job while running a job, waiting while its slot is given up for a retry sleep
+        self.local = threading.local()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_concurrency=int(os.getenv('OPENAI_MAX_CONCURRENCY', 8)),
+            requests_per_minute=int(os.getenv('OPENAI_REQUESTS_PER_MINUTE', 500)),
+            tokens_per_minute=int(os.getenv('OPENAI_TOKENS_PER_MINUTE', 60000)),
+        )
+
+    def set_max_concurrency(self, max_concurrency):
+        self.max_concurrency = max_concurrency
+        self.concurrency = AdaptiveConcurrency(max_concurrency, minimum=self.concurrency.minimum)
+
+    def throttle(self, tokens):
+        if getattr(self.local, 'waiting', False):
+            # take back the slot given up before this retry's backoff sleep
+            self.concurrency.acquire()
+            self.local.waiting = False
+        self.limiter.acquire(tokens)
+
+    def before_retry_sleep(self, retry_state):
+        if isinstance(retry_state.outcome.exception(), RateLimitError):
+            self.concurrency.on_rate_limited()
+        # don't hold a slot through the backoff, where it would only keep healthy requests waiting
+        if getattr(self.local, 'in_job', False) and not self.local.waiting:
+            self.concurrency.release()
+            self.local.waiting = True
+
+    def _call(self, generate, job):
+        self.concurrency.acquire()
+        self.local.in_job, self.local.waiting = True, False
+        try:
+            result = generate(job)
+            self.concurrency.on_success()
+            return result
+        except RateLimitError:
+            self.concurrency.on_rate_limited()
+            raise
+        finally:
+            if not self.local.waiting:
+                self.concurrency.release()
+            self.local.in_job = self.local.waiting = False
+
+    def run(self, jobs, generate):
+        """
+        Apply generate to every job concurrently, yielding (job, result, error) as calls complete.
+
+        jobs may be any iterable; at most twice max_concurrency jobs are pulled from it ahead of
+        completion, so a lazy input stream is never fully materialised.
+        """
+        jobs = iter(jobs)
+        in_flight = {}
+        # more threads than slots, so a slot given up during a retry sleep can go to a job waiting to start
+        with ThreadPoolExecutor(max_workers=self.max_concurrency * 2) as executor:
+            def submit_next():
+                job = next(jobs, _NO_MORE_JOBS)
+                if job is _NO_MORE_JOBS:
+                    return False
+                in_flight[executor.submit(self._call, generate, job)] = job
+                return True
+
+            while len(in_flight) < self.max_concurrency * 2 and submit_next():
+                pass
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = in_flight.pop(future)
+                    error = future.exception()
+                    yield job, (None if error else future.result()), error
+                    submit_next()
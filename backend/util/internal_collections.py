@@ -0,0 +1,9 @@
+# util/internal_collections.py
+
+# bookkeeping collections that live next to the daily '<month>-<dd>-resumes' collections
+VERSIONS_COLLECTION = "collection_versions"
+TRENDS_COLLECTION = "score_trends"
+RUNS_COLLECTION = "pipeline_runs"
+TEXTS_COLLECTION = "texts"
+
+INTERNAL_COLLECTIONS = {VERSIONS_COLLECTION, TRENDS_COLLECTION, RUNS_COLLECTION, TEXTS_COLLECTION}
@@ -0,0 +1,56 @@
+# util/keyword_matcher.py
+
+import re
+import pandas as pd
+
+def trie_pattern(words):
+    """
+    Compile words into one regex that walks a character trie, so shared prefixes are tested once
+    instead of once per alternative. Metacharacters in the words are escaped; longer words win
+    over their prefixes at the same position.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        terminal = '' in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 and len(branches[0]) == 1 else f"(?:{'|'.join(branches)})"
+        return f"{body}?" if terminal else body
+
+    return build(trie)
+
+class KeywordMatcher:
+    """
+    Case-insensitive substring matcher for many keywords at once, applied to a whole pandas Series.
+
+    :param keywords: Keywords as configured; matches are reported with this spelling.
+    """
+    def __init__(self, keywords):
+        self.canonical = {}
+        for keyword in keywords:
+            if keyword:
+                self.canonical.setdefault(keyword.lower(), keyword)
+        self.pattern = trie_pattern(self.canonical)
+        self.regex = re.compile(f"({self.pattern})", re.IGNORECASE) if self.canonical else None
+
+    def first_match(self, series):
+        """
+        :return: A Series with the keyword found earliest in each value (NaN where none matched or the value is missing).
+        """
+        if self.regex is None:
+            return pd.Series(None, index=series.index, dtype=object)
+        matched = series.str.extract(self.regex, expand=False)
+        return matched.str.lower().map(self.canonical)
+
+    def mask(self, series):
+        """
+        :return: A boolean Series, True where any keyword occurs.
+        """
+        return self.first_match(series).notna()
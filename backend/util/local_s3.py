@@ -0,0 +1,55 @@
+# util/local_s3.py
+
+import io
+import os
+import hashlib
+from datetime import datetime, timezone
+from botocore.response import StreamingBody
+
+class LocalS3Client:
+    """
+    Directory-backed stand-in for the parts of the boto3 S3 client the scripts use.
+
+    Objects live at <root>/<bucket>/<key>. Set S3_LOCAL_DIR to run the data scripts against it offline.
+    """
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, bucket, key):
+        return os.path.join(self.root, bucket, key)
+
+    def head_object(self, Bucket, Key):
+        path = self._path(Bucket, Key)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"s3://{Bucket}/{Key} not found under {self.root}")
+        stat = os.stat(path)
+        with open(path, 'rb') as f:
+            etag = hashlib.md5(f.read()).hexdigest()
+        return {
+            'ContentLength': stat.st_size,
+            'ETag': f'"{etag}"',
+            'LastModified': datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+        }
+
+    def get_object(self, Bucket, Key, Range=None, IfMatch=None):
+        head = self.head_object(Bucket, Key)
+        if IfMatch is not None and IfMatch != head['ETag']:
+            raise ValueError(f"s3://{Bucket}/{Key} changed (PreconditionFailed)")
+        length = head['ContentLength']
+        if Range:
+            start, end = Range.replace('bytes=', '').split('-')
+            start, end = int(start), min(int(end), length - 1)
+            length = end - start + 1
+            with open(self._path(Bucket, Key), 'rb') as f:
+                f.seek(start)
+                raw = io.BytesIO(f.read(length))
+        else:
+            raw = open(self._path(Bucket, Key), 'rb')
+        return {**head, 'ContentLength': length, 'Body': StreamingBody(raw, length)}
+
+    def put_object(self, Bucket, Key, Body):
+        path = self._path(Bucket, Key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(Body.encode('utf-8') if isinstance(Body, str) else Body)
+        return self.head_object(Bucket, Key)
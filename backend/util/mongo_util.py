@@ -1,7 +1,11 @@
 # util/mongo_util.py
 
 import os
-from pymongo import MongoClient
+import json
+import time
+import hashlib
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError
 from datetime import datetime, timedelta
 import certifi
 from dotenv import load_dotenv
@@ -9,6 +13,63 @@ import pytz
 
 load_dotenv()
 
+DEFAULT_WRITE_BATCH_SIZE = int(os.getenv('MONGO_WRITE_BATCH_SIZE', 500))
+CONTENT_HASH_FIELD = "content_hash"
+DUPLICATE_KEY_ERROR = 11000
+
+def content_hash(document):
+    """
+    Stable sha256 of a document's fields, ignoring _id and any existing content hash.
+    """
+    fields = {k: v for k, v in document.items() if k not in ("_id", CONTENT_HASH_FIELD)}
+    return hashlib.sha256(json.dumps(fields, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def bulk_upsert(collection, documents, batch_size=DEFAULT_WRITE_BATCH_SIZE):
+    """
+    Write documents in unordered bulk batches, upserting on their content hash so repeated uploads
+    of the same records do not create duplicates.
+
+    :param documents: Any iterable of dicts; it is consumed one batch at a time.
+    :return: A dict with inserted, existing, failed and seconds.
+    """
+    collection.create_index(CONTENT_HASH_FIELD, unique=True, sparse=True)
+    stats = {"inserted": 0, "existing": 0, "failed": 0, "seconds": 0.0}
+    batch = []
+    batch_number = 0
+
+    def flush():
+        start = time.time()
+        try:
+            result = collection.bulk_write(batch, ordered=False)
+            inserted, existing, failed = result.upserted_count, result.matched_count, 0
+        except BulkWriteError as e:
+            # concurrent uploads of the same record lose the upsert race with a duplicate key error
+            duplicates = sum(1 for error in e.details["writeErrors"] if error["code"] == DUPLICATE_KEY_ERROR)
+            inserted, existing = e.details["nUpserted"], e.details["nMatched"] + duplicates
+            failed = len(e.details["writeErrors"]) - duplicates
+            if failed:
+                print(f"Error writing batch {batch_number}: {e.details['writeErrors'][0].get('errmsg')}")
+        elapsed = time.time() - start
+        stats["inserted"] += inserted
+        stats["existing"] += existing
+        stats["failed"] += failed
+        stats["seconds"] += elapsed
+        print(f"Batch {batch_number}: {len(batch)} documents in {elapsed:.2f}s "
+              f"({len(batch) / elapsed if elapsed else float('inf'):.0f} docs/s), {inserted} new, {existing} already present")
+
+    for document in documents:
+        digest = content_hash(document)
+        fields = {k: v for k, v in document.items() if k not in ("_id", CONTENT_HASH_FIELD)}
+        batch.append(UpdateOne({CONTENT_HASH_FIELD: digest}, {"$setOnInsert": fields}, upsert=True))
+        if len(batch) >= batch_size:
+            batch_number += 1
+            flush()
+            batch = []
+    if batch:
+        batch_number += 1
+        flush()
+    return stats
+
 class MongoUtil:
     def __init__(self):   
         self.mongo_uri = f"mongodb+srv://{os.getenv('MONGO_USERNAME')}:{os.getenv('MONGO_PASSWORD')}@{os.getenv('MONGO_URI')}"
@@ -31,11 +92,14 @@ class MongoUtil:
             print(f"Creating collection: {collection_name}")
         return self.db[collection_name]
 
-    def fetch_documents(self, collection):
-        return list(collection.find({}))
+    def fetch_documents(self, collection, query=None):
+        return list(collection.find(query or {}))
 
     def insert_document(self, collection, document):
         collection.insert_one(document)
 
+    def insert_documents(self, collection, documents, batch_size=DEFAULT_WRITE_BATCH_SIZE):
+        return bulk_upsert(collection, documents, batch_size)
+
     def close_connection(self):
         self.client.close()
\ No newline at end of file
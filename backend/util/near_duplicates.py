@@ -0,0 +1,152 @@
+# util/near_duplicates.py
+
+import string
+from collections import OrderedDict, defaultdict
+import numpy as np
+import pandas as pd
+
+# punctuation splits words like whitespace (str.translate is much cheaper than a \w+ regex)
+PUNCTUATION_TO_SPACE = str.maketrans({char: ' ' for char in string.punctuation})
+# odd multipliers that mix the hashes of consecutive words into one shingle hash
+SHINGLE_MIXERS = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0x27D4EB2F165667C5], dtype=np.uint64)
+# shingles per matrix product; bounds memory at num_perm * 8 bytes per shingle
+SHINGLES_PER_BLOCK = 200_000
+
+def shingle_hashes(texts, size=3):
+    """
+    Hash the size-word shingles of each text (lowercased) without building the shingle strings.
+    Texts shorter than size words hash to a single shingle of all their words.
+
+    :return: A list with one uint64 array of shingle hashes per text.
+    """
+    if size > len(SHINGLE_MIXERS):
+        raise ValueError(f"shingle size must be at most {len(SHINGLE_MIXERS)}")
+    words = [text.lower().translate(PUNCTUATION_TO_SPACE).split() if isinstance(text, str) else [] for text in texts]
+    counts = np.array([len(doc) for doc in words], dtype=np.int64)
+    flat = pd.util.hash_array(np.array([word for doc in words for word in doc], dtype=object)) if counts.sum() else np.zeros(0, np.uint64)
+    ends = np.cumsum(counts)
+    starts = ends - counts
+    # combined[i] mixes words i .. i + size - 1 of the flat array; only windows inside one text are used
+    padded = np.concatenate([flat, np.zeros(size, dtype=np.uint64)])
+    with np.errstate(over='ignore'):
+        combined = sum(padded[offset:offset + len(flat)] * SHINGLE_MIXERS[offset] for offset in range(size)) if len(flat) else flat
+    hashes = []
+    for start, end, count in zip(starts, ends, counts):
+        if count > size:
+            hashes.append(combined[start:end - size + 1])
+        else:
+            with np.errstate(over='ignore'):
+                hashes.append(np.array([sum(flat[start + i] * SHINGLE_MIXERS[i] for i in range(count)) + np.uint64(count)], dtype=np.uint64))
+    return hashes
+
+class NearDuplicateFilter:
+    """
+    Online near-duplicate filter over MinHash signatures with LSH banding.
+
+    Texts are fed in order; the first text of each cluster becomes its representative and every later
+    text whose estimated Jaccard similarity to a representative reaches threshold is dropped. Only
+    representatives are indexed, so each lookup costs a few bucket probes instead of a comparison with
+    every text seen, and the result depends only on input order, not on how it is chunked.
+
+    The index holds about 4 KB per representative. Unbounded, memory therefore grows with the number of
+    distinct texts; with max_representatives the least recently matched representatives are evicted,
+    so a repost is only caught while its cluster is among the last max_representatives seen or matched.
+
+    :param threshold: Estimated Jaccard similarity at which two texts count as duplicates.
+    :param num_perm: MinHash permutations (signature length).
+    :param bands: LSH bands; num_perm must be divisible by it. More bands find lower-similarity candidates.
+    :param shingle_size: Words per shingle.
+    :param seed: Seed for the hash permutations.
+    :param max_representatives: Cap on indexed representatives, or None for no cap.
+    """
+    def __init__(self, threshold=0.8, num_perm=128, bands=16, shingle_size=3, seed=1, max_representatives=None):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.max_representatives = max_representatives
+        rng = np.random.default_rng(seed)
+        # multiply-add-shift hash family on 32-bit keys: h(x) = ((a * x + b) mod 2**64) >> 32
+        self.a = rng.integers(1, 2 ** 63, size=(num_perm, 1), dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.b = rng.integers(0, 2 ** 63, size=(num_perm, 1), dtype=np.uint64)
+        self.tables = [defaultdict(list) for _ in range(bands)]
+        # representative id -> signature, least recently matched first
+        self.signatures = OrderedDict()
+        self.next_rep = 0
+        self.seen = 0
+        self.duplicates = 0
+        self.evicted = 0
+
+    def signatures_of(self, texts):
+        """
+        :return: A (len(texts), num_perm) array of MinHash signatures (32-bit, the width of the hash family).
+        """
+        hashed = [h >> np.uint64(32) for h in shingle_hashes(texts, self.shingle_size)]
+        result = np.empty((len(hashed), self.num_perm), dtype=np.uint32)
+        start = 0
+        while start < len(hashed):
+            end, total = start, 0
+            while end < len(hashed) and (end == start or total + len(hashed[end]) <= SHINGLES_PER_BLOCK):
+                total += len(hashed[end])
+                end += 1
+            block = np.concatenate(hashed[start:end])
+            offsets = np.cumsum([0] + [len(h) for h in hashed[start:end - 1]])
+            with np.errstate(over='ignore'):
+                permuted = (self.a * block + self.b) >> np.uint64(32)
+            result[start:end] = np.minimum.reduceat(permuted, offsets, axis=1).T
+            start = end
+        return result
+
+    def _band_keys(self, signature):
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def add(self, signature):
+        """
+        Index signature unless it duplicates a representative.
+
+        :return: The id of the matching representative, or None if signature starts a new cluster.
+        """
+        self.seen += 1
+        keys = self._band_keys(signature)
+        candidates = {rep for table, key in zip(self.tables, keys) for rep in table.get(key, ())}
+        for rep in sorted(candidates):
+            if np.mean(self.signatures[rep] == signature) >= self.threshold:
+                self.duplicates += 1
+                self.signatures.move_to_end(rep)
+                return rep
+        rep = self.next_rep
+        self.next_rep += 1
+        # a copy, so the chunk's whole signature array is not kept alive by one row
+        self.signatures[rep] = signature.copy()
+        for table, key in zip(self.tables, keys):
+            table[key].append(rep)
+        if self.max_representatives is not None and len(self.signatures) > self.max_representatives:
+            self._evict()
+        return None
+
+    def _evict(self):
+        rep, signature = self.signatures.popitem(last=False)
+        for table, key in zip(self.tables, self._band_keys(signature)):
+            bucket = table[key]
+            bucket.remove(rep)
+            if not bucket:
+                del table[key]
+        self.evicted += 1
+
+    def keep_mask(self, texts):
+        """
+        :return: A boolean array, True for texts that start a new cluster (in order, updating the index).
+        """
+        texts = list(texts)
+        if not texts:
+            return np.zeros(0, dtype=bool)
+        return np.array([self.add(signature) is None for signature in self.signatures_of(texts)])
+
+    def filter(self, df, column):
+        """
+        :return: The rows of df whose column text is not a near-duplicate of an earlier text.
+        """
+        return df[self.keep_mask(df[column].tolist())]
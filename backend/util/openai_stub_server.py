@@ -0,0 +1,143 @@
+# util/openai_stub_server.py
+
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+CANNED_LATEX = (
+    "\\documentclass[11pt,a4paper]{article}\n"
+    "\\usepackage[margin=1in]{geometry}\n"
+    "\\usepackage{titlesec}\n"
+    "\\usepackage{enumitem}\n"
+    "\\begin{document}\n"
+    "\\section{Education}\n"
+    "B.S. in Computer Science\n"
+    "\\section{Work Experience}\n"
+    "\\begin{itemize}\n"
+    "  \\item Built data pipelines processing 1M+ records per day\n"
+    "  \\item Reduced API latency by 40\\%% through caching\n"
+    "\\end{itemize}\n"
+    "\\section{Skills}\n"
+    "%s\n"
+    "\\end{document}"
+)
+
+class StubConfig:
+    """
+    Behaviour of the stub server.
+
+    :param latency_ms: Median response latency; latencies are lognormal around it.
+    :param latency_sigma: Lognormal sigma (0 gives a constant latency).
+    :param rate_limit_rate: Fraction of requests answered with 429.
+    :param error_rate: Fraction of requests answered with 500.
+    :param seed: Seed for reproducible latency and failure sequences.
+    """
+    def __init__(self, latency_ms=800, latency_sigma=0.5, rate_limit_rate=0.0, error_rate=0.0, seed=None):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {"requests": 0, "rate_limited": 0, "errors": 0, "completed": 0}
+
+    def draw(self):
+        """
+        :return: (latency in seconds, outcome) where outcome is 'ok', 'rate_limited' or 'error'.
+        """
+        with self.lock:
+            self.counts["requests"] += 1
+            latency = self.latency_ms / 1000 * self.random.lognormvariate(0, self.latency_sigma) if self.latency_sigma else self.latency_ms / 1000
+            roll = self.random.random()
+            if roll < self.rate_limit_rate:
+                outcome = "rate_limited"
+            elif roll < self.rate_limit_rate + self.error_rate:
+                outcome = "error"
+            else:
+                outcome = "ok"
+            self.counts[{"ok": "completed", "rate_limited": "rate_limited", "error": "errors"}[outcome]] += 1
+            return latency, outcome
+
+def build_completion(body):
+    prompt = body.get("messages", [{}])[-1].get("content", "")
+    # echo a slice of the job description so responses differ per request
+    content = CANNED_LATEX % prompt[-200:].replace("\n", " ").strip()
+    prompt_tokens = sum(len(message.get("content", "")) for message in body.get("messages", [])) // 4
+    completion_tokens = len(content) // 4
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length)
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self.send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+
+        latency, outcome = self.server.config.draw()
+        time.sleep(latency)
+        if outcome == "rate_limited":
+            return self.send_json(429, {"error": {"message": "Rate limit reached (stub)", "type": "requests", "code": "rate_limit_exceeded"}},
+                                  {"retry-after-ms": "500"})
+        if outcome == "error":
+            return self.send_json(500, {"error": {"message": "Internal server error (stub)", "type": "server_error"}})
+        self.send_json(200, build_completion(json.loads(raw or b"{}")))
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_server(host="127.0.0.1", port=0, config=None):
+    """
+    Serve the stub on a background thread.
+
+    :param port: 0 picks a free port.
+    :return: The server; its base URL is f"http://{host}:{server.server_port}/v1". Call shutdown() to stop it.
+    """
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.config = config or StubConfig()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible chat completions stub for load testing")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency_ms", type=float, default=800, help="Median response latency in milliseconds")
+    parser.add_argument("--latency_sigma", type=float, default=0.5, help="Lognormal spread of the latency (0 for constant)")
+    parser.add_argument("--rate_limit_rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--error_rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--seed", type=int, help="Seed for reproducible runs")
+    args = parser.parse_args()
+
+    config = StubConfig(args.latency_ms, args.latency_sigma, args.rate_limit_rate, args.error_rate, args.seed)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), StubHandler)
+    server.daemon_threads = True
+    server.config = config
+    print(f"Stub OpenAI server listening on http://127.0.0.1:{args.port}/v1 (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f"Request counts: {config.counts}")
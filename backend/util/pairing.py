@@ -0,0 +1,83 @@
+# util/pairing.py
+
+import os
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from util.table_io import iter_batches, read_table
+
+# hashed feature space: no vocabulary to hold in memory, and resumes can be vectorized block by block
+N_FEATURES = 2 ** 20
+# resumes scored per sparse product; bounds the similarity block at block_size x jobs
+PAIRING_BLOCK_SIZE = int(os.getenv('PAIRING_BLOCK_SIZE', 512))
+
+class JobIndex:
+    """
+    Sparse TF-IDF index over job descriptions for finding each resume's most similar jobs.
+
+    Texts are hashed word uni- and bigrams; IDF weights come from the jobs. Rows are L2-normalized, so a
+    sparse product gives cosine similarities, and only one block of resumes is scored at a time.
+    """
+    def __init__(self, job_texts, n_features=N_FEATURES):
+        self.vectorizer = HashingVectorizer(n_features=n_features, alternate_sign=False, norm=None, stop_words='english',
+                                            ngram_range=(1, 2), token_pattern=r'(?u)\b[a-zA-Z][a-zA-Z+#.]{1,}\b', dtype=np.float32)
+        counts = self.vectorizer.transform(job_texts)
+        self.tfidf = TfidfTransformer(sublinear_tf=True).fit(counts)
+        # features x jobs, so a block of resume rows multiplies straight into resume x job similarities
+        self.jobs_t = self.tfidf.transform(counts).T.tocsr()
+        self.num_jobs = counts.shape[0]
+
+    def transform(self, texts):
+        return self.tfidf.transform(self.vectorizer.transform(texts))
+
+    def top_k(self, resume_texts, k=1, block_size=PAIRING_BLOCK_SIZE):
+        """
+        :return: (jobs, scores), two (len(resume_texts), k) arrays with each resume's best jobs in
+            descending similarity; -1 and 0.0 fill the slots of resumes sharing no term with enough jobs.
+        """
+        resume_texts = list(resume_texts)
+        jobs = np.full((len(resume_texts), k), -1, dtype=np.int64)
+        scores = np.zeros((len(resume_texts), k), dtype=np.float32)
+        for start in range(0, len(resume_texts), block_size):
+            similarities = (self.transform(resume_texts[start:start + block_size]) @ self.jobs_t).tocsr()
+            for row in range(similarities.shape[0]):
+                begin, end = similarities.indptr[row], similarities.indptr[row + 1]
+                data, columns = similarities.data[begin:end], similarities.indices[begin:end]
+                if len(data) > k:
+                    # keep every candidate tied with the k-th score, so the tie-break below sees all of them
+                    kth = -np.partition(-data, k - 1)[k - 1]
+                    keep = data >= kth
+                    data, columns = data[keep], columns[keep]
+                # ties go to the lower job index so the result does not depend on block size
+                order = np.lexsort((columns, -data))[:k]
+                jobs[start + row, :len(order)] = columns[order]
+                scores[start + row, :len(order)] = data[order]
+        return jobs, scores
+
+def iter_similar_pairs(resume_path, job_path, top_k=1, limit=None, chunksize=PAIRING_BLOCK_SIZE, min_score=0.0):
+    """
+    Yield (resume_text, job_description) pairs matching each resume with its top_k most similar jobs.
+
+    Job descriptions are indexed in memory; resumes are read and scored chunksize rows at a time.
+
+    :param limit: Number of resumes to pair (default all), so up to limit * top_k pairs.
+    """
+    job_texts = read_table(job_path, ['job_description'])['job_description'].fillna('').tolist()
+    print(f"Indexing {len(job_texts)} job descriptions for similarity pairing...")
+    index = JobIndex(job_texts)
+
+    def pairs():
+        remaining = limit
+        for batch in iter_batches(resume_path, ['resume_text'], chunksize):
+            resumes = batch['resume_text'].fillna('').tolist()
+            if remaining is not None:
+                resumes = resumes[:remaining]
+                remaining -= len(resumes)
+            jobs, scores = index.top_k(resumes, top_k, chunksize)
+            for resume_text, row_jobs, row_scores in zip(resumes, jobs, scores):
+                for job, score in zip(row_jobs, row_scores):
+                    if job >= 0 and score > min_score:
+                        yield resume_text, job_texts[job]
+            if remaining == 0:
+                return
+
+    return pairs()
@@ -0,0 +1,49 @@
+# util/pipeline_runs.py
+
+from datetime import datetime
+from util.internal_collections import RUNS_COLLECTION
+
+def run_id(script, target_collection):
+    return f"{script}:{target_collection}"
+
+def start_run(db, script, source_collection, target_collection, **fields):
+    """
+    Create or reopen the run-state document for a script writing into target_collection.
+
+    A restarted run reuses the same document, so fields such as an in-flight batch_id survive a crash.
+
+    :return: The run-state document as stored before this start (empty dict for a fresh run) and its id.
+    """
+    runs = db[RUNS_COLLECTION]
+    _id = run_id(script, target_collection)
+    previous = runs.find_one({"_id": _id}) or {}
+    now = datetime.utcnow()
+    runs.update_one(
+        {"_id": _id},
+        {
+            "$set": {"script": script, "source": source_collection, "target": target_collection,
+                     "status": "running", "updated_at": now, **fields},
+            "$setOnInsert": {"started_at": now, "stored": 0, "failed": 0},
+            "$inc": {"attempts": 1},
+            # an error left by a failed attempt no longer describes this one
+            "$unset": {"error": "", "finished_at": ""},
+        },
+        upsert=True
+    )
+    return previous, _id
+
+def record_progress(db, _id, stored=0, failed=0, **fields):
+    db[RUNS_COLLECTION].update_one(
+        {"_id": _id},
+        {"$inc": {"stored": stored, "failed": failed}, "$set": {"updated_at": datetime.utcnow(), **fields}}
+    )
+
+def clear_fields(db, _id, *names):
+    db[RUNS_COLLECTION].update_one({"_id": _id}, {"$unset": {name: "" for name in names}})
+
+def finish_run(db, _id, status="completed", **fields):
+    now = datetime.utcnow()
+    db[RUNS_COLLECTION].update_one(
+        {"_id": _id},
+        {"$set": {"status": status, "updated_at": now, "finished_at": now, **fields}}
+    )
@@ -0,0 +1,131 @@
+# util/prompt_budget.py
+
+import os
+import re
+from functools import lru_cache
+from util.generation_engine import CHARS_PER_TOKEN
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+DEFAULT_INPUT_TOKEN_BUDGET = int(os.getenv('PROMPT_INPUT_TOKEN_BUDGET', 3000))
+
+# sentences that job postings append verbatim and that carry nothing for the resume
+BOILERPLATE_PATTERNS = [
+    r"equal (employment )?opportunity",
+    r"\bEEO\b",
+    r"affirmative action",
+    r"without regard to",
+    r"regardless of (race|color|religion|sex|gender|age|national origin|disability|veteran)",
+    r"protected (veteran|class|characteristic)",
+    r"reasonable accommodation",
+    r"E-Verify",
+    r"drug[- ]free workplace",
+    r"background check",
+    r"pay transparency",
+    r"know your rights",
+    r"we are an? .{0,40}employer",
+]
+BOILERPLATE_RE = re.compile("|".join(f"(?:{pattern})" for pattern in BOILERPLATE_PATTERNS), re.IGNORECASE)
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
+
+@lru_cache(maxsize=None)
+def _encoding(model):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+def count_tokens(text, model):
+    """
+    Token count for text under model's tokenizer, or a len/4 estimate when tiktoken is not installed.
+    """
+    if not text:
+        return 0
+    if tiktoken is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(_encoding(model).encode(text, disallowed_special=()))
+
+def strip_boilerplate(text):
+    """
+    Drop EEO/legal boilerplate sentences and repeated sentences, keeping line structure.
+
+    :return: (compacted text, number of sentences removed)
+    """
+    if not text:
+        return text, 0
+    seen = set()
+    removed = 0
+    lines = []
+    for line in text.splitlines():
+        kept = []
+        for sentence in SENTENCE_SPLIT_RE.split(line.strip()):
+            key = " ".join(sentence.lower().split())
+            if not key:
+                continue
+            if key in seen or BOILERPLATE_RE.search(sentence):
+                removed += 1
+                continue
+            seen.add(key)
+            kept.append(sentence)
+        if kept:
+            lines.append(" ".join(kept))
+    return "\n".join(lines), removed
+
+def trim_to_tokens(text, max_tokens, model):
+    """
+    Cut text to at most max_tokens tokens, backing off to the last whitespace so words stay whole.
+    """
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    if tiktoken is None:
+        trimmed = text[:max_tokens * CHARS_PER_TOKEN]
+    else:
+        encoding = _encoding(model)
+        trimmed = encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+    cut = trimmed.rfind(" ")
+    return trimmed[:cut] if cut > len(trimmed) // 2 else trimmed
+
+def budget_inputs(resume_text, job_description, model, budget=DEFAULT_INPUT_TOKEN_BUDGET):
+    """
+    Compact the job description and fit both inputs into budget tokens.
+
+    Each input is guaranteed half of the budget; whatever the shorter one leaves unused goes to the other.
+
+    :return: (resume_text, job_description, stats) where stats holds token counts before and after.
+    """
+    job_description, removed = strip_boilerplate(job_description)
+    resume_tokens = count_tokens(resume_text, model)
+    job_tokens = count_tokens(job_description, model)
+    stats = {"resume_tokens": resume_tokens, "job_tokens": job_tokens, "removed_sentences": removed, "trimmed": False}
+
+    if resume_tokens + job_tokens > budget:
+        half = budget // 2
+        resume_budget = max(half, budget - min(job_tokens, half))
+        job_budget = budget - min(resume_tokens, resume_budget)
+        resume_text = trim_to_tokens(resume_text, resume_budget, model)
+        job_description = trim_to_tokens(job_description, job_budget, model)
+        stats["trimmed"] = True
+    stats["input_tokens"] = count_tokens(resume_text, model) + count_tokens(job_description, model)
+    return resume_text, job_description, stats
+
+def token_usage(entry, prompt_tokens, model, budget_stats=None):
+    """
+    Per-document token counts, taken from the API's usage when present and counted locally otherwise.
+
+    :param entry: A completion entry (content, usage, finish_reason).
+    :param prompt_tokens: Locally counted prompt tokens, used when the entry has no usage.
+    :param budget_stats: Stats from budget_inputs, if the inputs were budgeted.
+    """
+    usage = entry.get("usage") or {}
+    record = {
+        "input_tokens": usage.get("prompt_tokens", prompt_tokens),
+        "output_tokens": usage.get("completion_tokens", count_tokens(entry.get("content"), model)),
+        "truncated": entry.get("finish_reason") == "length",
+    }
+    if budget_stats:
+        record["job_sentences_removed"] = budget_stats["removed_sentences"]
+        record["inputs_trimmed"] = budget_stats["trimmed"]
+    return record
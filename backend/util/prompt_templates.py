@@ -0,0 +1,52 @@
+# util/prompt_templates.py
+
+# Generated documents store a template id plus the ids of its texts instead of the rendered prompt
+# (see util/text_store.py). Never change a registered template in place: add a new id instead, so
+# stored documents keep rendering the prompt they were generated from.
+
+def latex_resume_prompt(resume_text, job_description):
+    return (
+        "You are an AI resume optimizer. Your task is to create a highly optimized, ATS-friendly resume in LaTeX format based on the given original resume and job description. "
+        "Follow these strict guidelines:\n\n"
+        "1. Output ONLY the LaTeX code for the resume. Do not include any explanations, comments, or additional text.\n"
+        "2. Use the following LaTeX structure:\n"
+        "   \\documentclass[11pt,a4paper]{article}\n"
+        "   \\usepackage[margin=1in]{geometry}\n"
+        "   \\usepackage{titlesec}\n"
+        "   \\usepackage{enumitem}\n"
+        "   \\begin{document}\n"
+        "   ... (resume content) ...\n"
+        "   \\end{document}\n"
+        "3. Include these sections in order: Education, Work Experience, Skills, and Certifications (if applicable).\n"
+        "4. Use \\section{} for main headings and \\subsection{} for subheadings.\n"
+        "5. Use itemize environments for bullet points.\n"
+        "6. Incorporate relevant keywords from the job description naturally throughout the resume.\n"
+        "7. Quantify achievements and responsibilities where possible.\n"
+        "8. Ensure all information is truthful and accurately represents the original resume.\n"
+        "9. Optimize the content for high ATS scores while maintaining readability.\n"
+        "10. Do not include any personal contact information.\n\n"
+        "Original Resume:\n"
+        f"{resume_text}\n\n"
+        "Job Description:\n"
+        f"{job_description}\n\n"
+        "Generate the LaTeX resume now, starting with \\documentclass and ending with \\end{document}. Include ONLY the LaTeX code."
+    )
+
+def optimized_resume_prompt(resume_text, job_description):
+    return (
+        f"Given the following resume:\n\n{resume_text}\n\n"
+        f"and the job description:\n\n{job_description}\n\n"
+        "Generate an optimized resume to better fit the job description."
+    )
+
+PROMPT_TEMPLATES = {
+    "latex_resume_v1": latex_resume_prompt,
+    "optimized_resume_v1": optimized_resume_prompt,
+}
+
+def render_prompt(template_id, params):
+    """
+    :param params: Template arguments by name (resume_text, job_description).
+    :raises KeyError: If template_id is not registered.
+    """
+    return PROMPT_TEMPLATES[template_id](**params)
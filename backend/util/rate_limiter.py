@@ -0,0 +1,51 @@
+# util/rate_limiter.py
+
+import time
+import threading
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at rate_per_minute, holding at most capacity tokens.
+    """
+    def __init__(self, rate_per_minute, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount=1):
+        """
+        Block until amount tokens are available and take them.
+
+        A request larger than the whole bucket is let through once the bucket is full, leaving it in
+        debt, so oversized prompts slow the stream down instead of blocking forever.
+        """
+        while True:
+            with self.lock:
+                self._refill()
+                needed = min(amount, self.capacity)
+                if self.tokens >= needed:
+                    self.tokens -= amount
+                    return
+                wait = (needed - self.tokens) / self.rate
+            self.sleep(wait)
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits applied together, as the OpenAI API enforces them.
+    """
+    def __init__(self, requests_per_minute, tokens_per_minute, clock=time.monotonic, sleep=time.sleep):
+        self.requests = TokenBucket(requests_per_minute, clock=clock, sleep=sleep)
+        self.tokens = TokenBucket(tokens_per_minute, clock=clock, sleep=sleep)
+
+    def acquire(self, tokens):
+        self.requests.acquire(1)
+        self.tokens.acquire(tokens)
@@ -1,17 +1,20 @@
-import pandas as pd
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from util.table_io import iter_batches, resolve_path, write_table
 
 def reduce_csv_to_first_10_rows(input_file_path, output_file_path):
-    df = pd.read_csv(input_file_path)    
-    df_first_10_rows = df.head(10)
+    # only the first batch is decoded, so large inputs are not read in full
+    df_first_10_rows = next(iter_batches(input_file_path, batch_size=10))
 
-    df_first_10_rows.to_csv(output_file_path, index=False)
+    write_table(df_first_10_rows, output_file_path)
     print(f"Reduced file saved to {output_file_path}")
 
 if __name__ == "__main__":
-    resumes_input_file = 'data/input/resumes.csv'
-    postings_input_file = 'data/input/postings.csv'
+    resumes_input_file = resolve_path('data/input', 'resumes')
+    postings_input_file = resolve_path('data/input', 'postings')
 
-    resumes_post_edit_input_file = 'data/output/resumes_post_edit.csv'
+    resumes_post_edit_input_file = resolve_path('data/output', 'resumes_post_edit')
     resumes_post_edit_output_file = 'data/output/reduced_resumes_post_edit.csv'
 
     resumes_output_file = 'data/output/reduced_resumes.csv'
@@ -0,0 +1,39 @@
+# util/reservoir.py
+
+import numpy as np
+import pandas as pd
+
+class ReservoirSampler:
+    """
+    Seeded uniform sample of k rows from a stream of unknown length (Algorithm R), fed a DataFrame chunk at a time.
+
+    The random draws depend only on each row's position in the stream, so the same input and seed
+    give the same sample whatever the chunk size.
+    """
+    def __init__(self, k, seed=1):
+        self.k = k
+        self.rng = np.random.default_rng(seed)
+        self.seen = 0
+        self.sample = []
+        self.columns = None
+
+    def add(self, chunk):
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+        n = len(chunk)
+        if not n:
+            return
+        fill = min(max(self.k - len(self.sample), 0), n)
+        if fill:
+            self.sample.extend(chunk.iloc[:fill].to_dict('records'))
+        if fill < n:
+            positions = self.seen + np.arange(fill, n)
+            slots = self.rng.integers(0, positions + 1)
+            replaced = np.nonzero(slots < self.k)[0]
+            rows = chunk.iloc[fill + replaced].to_dict('records')
+            for slot, row in zip(slots[replaced], rows):
+                self.sample[slot] = row
+        self.seen += n
+
+    def to_frame(self):
+        return pd.DataFrame(self.sample, columns=self.columns)
@@ -0,0 +1,111 @@
+# util/s3_access.py
+
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import boto3
+from botocore.config import Config
+from dotenv import load_dotenv
+from util.local_s3 import LocalS3Client
+
+load_dotenv()
+
+DEFAULT_CACHE_DIR = 'data/cache/s3'
+PART_SIZE = int(os.getenv('S3_PART_SIZE_MB', 16)) * 1024 * 1024
+MAX_WORKERS = int(os.getenv('S3_DOWNLOAD_WORKERS', 8))
+META_SUFFIX = '.meta.json'
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """
+    The process-wide S3 client (boto3 clients are thread-safe), or a LocalS3Client when S3_LOCAL_DIR is set.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            if os.getenv('S3_LOCAL_DIR'):
+                print(f"Using local S3 stand-in at {os.getenv('S3_LOCAL_DIR')}...")
+                _client = LocalS3Client(os.getenv('S3_LOCAL_DIR'))
+            else:
+                print("Initializing S3 client...")
+                # one pooled connection per download worker
+                _client = boto3.client('s3',
+                                       aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+                                       aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+                                       config=Config(max_pool_connections=max(MAX_WORKERS, 10)))
+        return _client
+
+def cache_enabled():
+    return os.getenv('S3_CACHE', 'on').lower() not in ('off', '0', 'false')
+
+def object_version(head):
+    """
+    The fields that identify one version of an object, as stored in the cache's sidecar file.
+    """
+    return {
+        'etag': head['ETag'],
+        'last_modified': head['LastModified'].isoformat(),
+        'size': head['ContentLength'],
+    }
+
+def _read_meta(path):
+    try:
+        with open(path + META_SUFFIX) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _download_range(client, bucket, key, etag, start, end, path):
+    # IfMatch makes a part fail rather than mix in bytes of an object replaced mid-download
+    body = client.get_object(Bucket=bucket, Key=key, Range=f'bytes={start}-{end}', IfMatch=etag)['Body']
+    with open(path, 'r+b') as f:
+        f.seek(start)
+        for block in iter(lambda: body.read(1024 * 1024), b''):
+            f.write(block)
+    body.close()
+    return end - start + 1
+
+def download(bucket, key, cache_dir=None, client=None, part_size=PART_SIZE, max_workers=MAX_WORKERS):
+    """
+    Make a local copy of s3://bucket/key, reusing the cached copy when the object is unchanged.
+
+    The cached copy is valid while its sidecar's ETag, Last-Modified and size match a HEAD of the
+    object. Otherwise the object is fetched in part_size byte ranges on max_workers threads into a
+    temporary file that only replaces the cached copy once complete.
+
+    :param cache_dir: Defaults to S3_CACHE_DIR, or data/cache/s3.
+    :return: (local path, bytes transferred)
+    """
+    client = client or get_client()
+    cache_dir = cache_dir or os.getenv('S3_CACHE_DIR', DEFAULT_CACHE_DIR)
+    path = os.path.join(cache_dir, bucket, key)
+    version = object_version(client.head_object(Bucket=bucket, Key=key))
+    if _read_meta(path) == version and os.path.exists(path) and os.path.getsize(path) == version['size']:
+        print(f"s3://{bucket}/{key} unchanged, using cached copy {path}")
+        return path, 0
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = path + '.part'
+    size = version['size']
+    with open(partial, 'wb') as f:
+        f.truncate(size)
+    ranges = [(start, min(start + part_size, size) - 1) for start in range(0, size, part_size)]
+    print(f"Downloading s3://{bucket}/{key} ({size / 1024 / 1024:.1f} MB) in {len(ranges)} parts...")
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(ranges)))) as pool:
+        transferred = sum(pool.map(lambda r: _download_range(client, bucket, key, version['etag'], r[0], r[1], partial), ranges))
+    os.replace(partial, path)
+    with open(path + META_SUFFIX, 'w') as f:
+        json.dump(version, f)
+    return path, transferred
+
+def open_object(bucket, key, client=None):
+    """
+    A readable binary file for s3://bucket/key: the validated cached copy, or the streaming body when S3_CACHE=off.
+    """
+    if not cache_enabled():
+        return (client or get_client()).get_object(Bucket=bucket, Key=key)['Body']
+    path, _ = download(bucket, key, client=client)
+    return open(path, 'rb')
@@ -1,51 +1,135 @@
-import pandas as pd
+import os
 import sys
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import pyarrow as pa
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from util.table_io import iter_batches, read_table, TableChunkWriter
 
-def clean_csv_files(dataset_entities_path, postings_path, output_dataset_entities_path, output_postings_path):
-    
-    dataset_entities = pd.read_csv(dataset_entities_path)
-    postings = pd.read_csv(postings_path)
-
-    
-    dataset_entities_columns = set(dataset_entities.columns)
-    postings_columns = set(postings.columns)
-
-    
-    extra_in_dataset_entities = dataset_entities_columns - postings_columns
-    extra_in_postings = postings_columns - dataset_entities_columns
-
-    
-    for col in extra_in_postings:
-        if col in postings.columns:
-            postings_dtype = postings[col].dtype
-            if pd.api.types.is_numeric_dtype(postings_dtype):
-                dataset_entities[col] = 0
-            else:
-                dataset_entities[col] = ""
-        else:
-            dataset_entities[col] = ""
-
-    
-    for col in extra_in_dataset_entities:
-        if col in dataset_entities.columns:
-            dataset_entities_dtype = dataset_entities[col].dtype
-            if pd.api.types.is_numeric_dtype(dataset_entities_dtype):
-                postings[col] = 0
-            else:
-                postings[col] = ""
+CHUNK_ROWS = 50000
+# rows of each file read up front to infer its column types
+SAMPLE_ROWS = 10000
+
+ARROW_TYPES = {'int': pa.int64(), 'float': pa.float64(), 'bool': pa.bool_(), 'text': pa.string()}
+PANDAS_TYPES = {'int': 'Int64', 'float': 'float64', 'bool': 'boolean', 'text': 'string'}
+# a column a file does not have is filled as before: integer 0 for numbers (and bools), "" otherwise
+FILL_KINDS = {'int': 'int', 'float': 'int', 'bool': 'int', 'text': 'text'}
+FILL_VALUES = {'int': 0, 'text': ""}
+
+def column_kind(values):
+    if values.isna().all():
+        # nothing to infer from in the sample; text accepts whatever the rest of the file holds
+        return 'text'
+    if pd.api.types.is_bool_dtype(values.dtype):
+        return 'bool'
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return 'int'
+    if pd.api.types.is_float_dtype(values.dtype):
+        return 'float'
+    return 'text'
+
+def infer_kinds(path, sample_rows=SAMPLE_ROWS):
+    """
+    :return: A dict of column -> 'int', 'float', 'bool' or 'text', inferred from the first sample_rows rows.
+    """
+    sample = next(iter_batches(path, batch_size=sample_rows), None)
+    if sample is None:
+        sample = read_table(path)
+    return {column: column_kind(sample[column]) for column in sample.columns}
+
+def unify_kinds(first, second):
+    """
+    Merge the column types of two files: shared columns take a type that holds both (int and float
+    give float, any other mix gives text); other columns keep the type of the file that has them.
+    file_kinds turns this into each file's output types.
+    """
+    unified = {}
+    for column in sorted(set(first) | set(second)):
+        kinds = {kind for kind in (first.get(column), second.get(column)) if kind}
+        if len(kinds) == 1:
+            unified[column] = kinds.pop()
+        elif kinds == {'int', 'float'}:
+            unified[column] = 'float'
         else:
-            postings[col] = ""
+            unified[column] = 'text'
+    return unified
 
-    
-    dataset_entities = dataset_entities[sorted(dataset_entities.columns)]
-    postings = postings[sorted(postings.columns)]
+def file_kinds(kinds, own_kinds):
+    """
+    The output types of one file: its own columns keep their sampled type unless the unified type is
+    text (then both files write text), and the columns it lacks take their fill type.
+    """
+    return {column: (own_kinds[column] if kind != 'text' else 'text') if column in own_kinds else FILL_KINDS[kind]
+            for column, kind in kinds.items()}
 
-    
-    dataset_entities.to_csv(output_dataset_entities_path, index=False)
-    postings.to_csv(output_postings_path, index=False)
+def cast_and_fill(chunk, kinds, own_kinds, path=None):
+    """
+    Give chunk every column of kinds (see file_kinds), in order: its own columns cast, the others filled.
+    """
+    aligned = {}
+    for column, kind in kinds.items():
+        if column not in own_kinds:
+            aligned[column] = pd.Series(FILL_VALUES[kind], index=chunk.index, dtype=PANDAS_TYPES[kind])
+            continue
+        values = chunk[column]
+        try:
+            if kind in ('int', 'float'):
+                values = pd.to_numeric(values)
+            if own_kinds[column] == 'int':
+                # a chunk with missing values reads as float; Int64 keeps 3 from being written as "3.0"
+                values = pd.to_numeric(values).astype('Int64')
+            aligned[column] = values.astype(PANDAS_TYPES[kind])
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Column '{column}' of {path} does not fit the sampled type {kind}; "
+                             f"increase the sample size (--sample_rows): {e}") from e
+    return pd.DataFrame(aligned, index=chunk.index)
+
+def align_file(input_path, output_path, kinds, own_kinds, chunksize=CHUNK_ROWS):
+    """
+    Stream input_path through cast_and_fill into output_path, one chunk in memory at a time.
+
+    :return: The number of rows written.
+    """
+    kinds = file_kinds(kinds, own_kinds)
+    schema = pa.schema([(column, ARROW_TYPES[kind]) for column, kind in kinds.items()])
+    with TableChunkWriter(output_path, schema) as writer:
+        for chunk in iter_batches(input_path, batch_size=chunksize):
+            writer.write(cast_and_fill(chunk, kinds, own_kinds, input_path))
+    print(f"Wrote {writer.rows} aligned rows from {input_path} to {output_path}")
+    return writer.rows
+
+def clean_csv_files(dataset_entities_path, postings_path, output_dataset_entities_path, output_postings_path,
+                    chunksize=CHUNK_ROWS, sample_rows=SAMPLE_ROWS):
+    """
+    Write both files with the union of their columns, sorted, filling columns a file lacks with 0 or "".
+
+    Column types come from a sample of each file; both files are then streamed in chunks, in
+    parallel processes, so memory stays bounded by the chunk size whatever the file size.
+
+    :return: (rows written for dataset_entities, rows written for postings)
+    """
+    dataset_entities_kinds = infer_kinds(dataset_entities_path, sample_rows)
+    postings_kinds = infer_kinds(postings_path, sample_rows)
+    kinds = unify_kinds(dataset_entities_kinds, postings_kinds)
+    print(f"Unified schema of {len(kinds)} columns: {kinds}")
+
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        dataset_entities_rows = pool.submit(align_file, dataset_entities_path, output_dataset_entities_path, kinds,
+                                            dataset_entities_kinds, chunksize)
+        postings_rows = pool.submit(align_file, postings_path, output_postings_path, kinds, postings_kinds, chunksize)
+        return dataset_entities_rows.result(), postings_rows.result()
 
 if __name__ == "__main__":
-    if len(sys.argv) != 5:
-        print("Usage: python sagemaker.py <dataset_entities.csv> <postings.csv> <output_dataset_entities_cleaned.csv> <output_postings_cleaned.csv>")
-    else:
-        clean_csv_files(sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4])
+    parser = argparse.ArgumentParser(description="Align the columns of two datasets for SageMaker. "
+                                                 "Each path may be .csv, .parquet or .arrow; the extension picks the format.")
+    parser.add_argument("dataset_entities")
+    parser.add_argument("postings")
+    parser.add_argument("output_dataset_entities")
+    parser.add_argument("output_postings")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_ROWS, help="Rows per chunk (default: 50000)")
+    parser.add_argument("--sample_rows", type=int, default=SAMPLE_ROWS, help="Rows read to infer column types (default: 10000)")
+    args = parser.parse_args()
+
+    clean_csv_files(args.dataset_entities, args.postings, args.output_dataset_entities, args.output_postings,
+                    chunksize=args.chunksize, sample_rows=args.sample_rows)
@@ -0,0 +1,133 @@
+# util/score_stats.py
+
+import math
+from bisect import bisect_right
+from numbers import Number
+
+DEFAULT_BIN_SIZE = 10
+MAX_SCORE = 100
+
+def histogram_boundaries(bin_size=DEFAULT_BIN_SIZE):
+    # $bucket boundaries are [lower, upper), so the last edge sits one past MAX_SCORE to keep 100 in the top bin
+    boundaries = list(range(0, MAX_SCORE, bin_size))
+    boundaries.append(MAX_SCORE + 1)
+    return boundaries
+
+def histogram_bin(score, bin_size=DEFAULT_BIN_SIZE):
+    """
+    :return: The index of score's histogram bin, or None if it is out of range.
+    """
+    boundaries = histogram_boundaries(bin_size)
+    if not boundaries[0] <= score < boundaries[-1]:
+        return None
+    return bisect_right(boundaries, score) - 1
+
+def is_score(value):
+    return isinstance(value, Number) and not isinstance(value, bool)
+
+def effective_score(document):
+    """
+    The score a document counts with in the stats: its human score, else its auto_score, else None.
+    """
+    if is_score(document.get("score")):
+        return document["score"]
+    return document["auto_score"] if is_score(document.get("auto_score")) else None
+
+def truthfulness_key(value):
+    return "true" if value is True else "false" if value is False else "unlabeled"
+
+def build_stats_pipeline(bin_size=DEFAULT_BIN_SIZE):
+    """
+    Build a single aggregation pipeline that summarises a daily resumes collection.
+
+    Documents the auto-scorer was confident about are never offered for review, so a document without a
+    human score counts with its auto_score; otherwise the scores would only cover the borderline band.
+
+    :param bin_size: Width of each score histogram bin.
+    :return: A pipeline producing one document with 'total', 'scores', 'histogram' and 'truthfulness' facets.
+    """
+    scored = {"$match": {"effective_score": {"$type": "number"}}}
+    return [
+        {"$addFields": {"effective_score": {"$cond": [{"$isNumber": "$score"}, "$score", "$auto_score"]}}},
+        {"$facet": {
+            "total": [{"$count": "count"}],
+            "scores": [
+                scored,
+                {"$group": {
+                    "_id": None,
+                    "count": {"$sum": 1},
+                    "labeled": {"$sum": {"$cond": [{"$isNumber": "$score"}, 1, 0]}},
+                    "sum": {"$sum": "$effective_score"},
+                    "sum_sq": {"$sum": {"$multiply": ["$effective_score", "$effective_score"]}},
+                    "min": {"$min": "$effective_score"},
+                    "max": {"$max": "$effective_score"},
+                }},
+            ],
+            "histogram": [
+                scored,
+                {"$bucket": {
+                    "groupBy": "$effective_score",
+                    "boundaries": histogram_boundaries(bin_size),
+                    "default": "out_of_range",
+                    "output": {"count": {"$sum": 1}},
+                }},
+            ],
+            "truthfulness": [
+                {"$group": {"_id": "$truthfulness", "count": {"$sum": 1}}},
+            ],
+        }}
+    ]
+
+def mean_and_std(count, total, total_sq):
+    # population std from running sums, so summaries can also be merged without revisiting documents
+    if not count:
+        return None, None
+    mean = total / count
+    variance = max(total_sq / count - mean * mean, 0.0)
+    return mean, math.sqrt(variance)
+
+def shape_stats(facets, bin_size=DEFAULT_BIN_SIZE):
+    """
+    Turn the raw $facet output of build_stats_pipeline into a compact summary dict.
+    """
+    total = facets["total"][0]["count"] if facets.get("total") else 0
+    scores = facets["scores"][0] if facets.get("scores") else {}
+    mean, std = mean_and_std(scores.get("count", 0), scores.get("sum", 0), scores.get("sum_sq", 0))
+
+    boundaries = histogram_boundaries(bin_size)
+    counts = {bucket["_id"]: bucket["count"] for bucket in facets.get("histogram", [])}
+    # bins are [min, max) except the last one, which also includes MAX_SCORE
+    histogram = [
+        {"min": lower, "max": min(upper, MAX_SCORE), "count": counts.get(lower, 0)}
+        for lower, upper in zip(boundaries, boundaries[1:])
+    ]
+
+    truthfulness = {"true": 0, "false": 0, "unlabeled": 0}
+    for group in facets.get("truthfulness", []):
+        truthfulness[truthfulness_key(group["_id"])] += group["count"]
+
+    return {
+        "count": total,
+        # scored = labeled (human score) + auto_scored (auto_score only); the score summary covers all of them
+        "scored": scores.get("count", 0),
+        "labeled": scores.get("labeled", 0),
+        "auto_scored": scores.get("count", 0) - scores.get("labeled", 0),
+        "score": {
+            "mean": mean,
+            "std": std,
+            "min": scores.get("min"),
+            "max": scores.get("max"),
+            "sum": scores.get("sum", 0),
+            "sum_sq": scores.get("sum_sq", 0),
+        },
+        "histogram": histogram,
+        "out_of_range": counts.get("out_of_range", 0),
+        "truthfulness": truthfulness,
+    }
+
+def collection_stats(collection, bin_size=DEFAULT_BIN_SIZE):
+    """
+    Compute score and truthfulness statistics for a collection with one aggregation round trip.
+    """
+    facets = next(collection.aggregate(build_stats_pipeline(bin_size)), {})
+    return shape_stats(facets, bin_size)
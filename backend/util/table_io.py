@@ -0,0 +1,207 @@
+# util/table_io.py
+
+import os
+import glob
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# format of the files passed between pipeline stages; csv stays available for export
+DATA_FORMAT = os.getenv('DATA_FORMAT', 'parquet')
+PARQUET_COMPRESSION = os.getenv('PARQUET_COMPRESSION', 'zstd')
+# Arrow IPC only supports zstd and lz4_frame
+ARROW_COMPRESSION = 'zstd'
+# rows per part file of incremental Parquet output; one row group each, so parts should not be tiny
+PARQUET_PART_ROWS = int(os.getenv('PARQUET_PART_ROWS', 10000))
+EXTENSIONS = {'parquet': '.parquet', 'arrow': '.arrow', 'csv': '.csv'}
+# breaks mtime ties when a stage's input exists in several formats
+READ_PREFERENCE = ('parquet', 'arrow', 'csv')
+
+def table_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.feather':
+        return 'arrow'
+    for fmt, extension in EXTENSIONS.items():
+        if ext == extension:
+            return fmt
+    raise ValueError(f"Unsupported table format for {path} (expected one of {', '.join(EXTENSIONS.values())})")
+
+def stage_path(directory, name, fmt=None):
+    """
+    :return: The path of stage file name (without extension) in directory for fmt (default DATA_FORMAT).
+    """
+    return os.path.join(directory, name + EXTENSIONS[fmt or DATA_FORMAT])
+
+def resolve_path(directory, name):
+    """
+    Find a stage file regardless of the format it was written in. When several formats exist (e.g. an
+    older .parquet next to the .csv of a --format csv run), the most recently written one is used.
+    """
+    candidates = [stage_path(directory, name, fmt) for fmt in READ_PREFERENCE]
+    existing = [(os.stat(path).st_mtime_ns, -rank, path) for rank, path in enumerate(candidates) if os.path.exists(path)]
+    if not existing:
+        raise FileNotFoundError(f"No {name} file ({', '.join(EXTENSIONS.values())}) in {directory}")
+    return max(existing)[2]
+
+def parquet_parts(path):
+    """
+    The files of a Parquet stage: path itself, or the numbered part files of a directory written by IncrementalParquetWriter.
+    """
+    return sorted(glob.glob(os.path.join(path, 'part-*.parquet'))) if os.path.isdir(path) else [path]
+
+def _arrow_reader(path):
+    return pa.ipc.open_file(pa.memory_map(path, 'r'))
+
+def read_table(path, columns=None):
+    """
+    Read a Parquet, Arrow IPC or CSV file into a DataFrame. Columnar files are memory-mapped and only
+    the requested columns are decoded.
+    """
+    fmt = table_format(path)
+    if fmt == 'parquet':
+        return pa.concat_tables([pq.read_table(part, columns=columns, memory_map=True) for part in parquet_parts(path)]).to_pandas()
+    if fmt == 'arrow':
+        table = _arrow_reader(path).read_all()
+        return (table.select(columns) if columns else table).to_pandas()
+    return pd.read_csv(path, usecols=columns)
+
+def iter_batches(path, columns=None, batch_size=500):
+    """
+    Yield DataFrames of up to batch_size rows, holding only the requested columns.
+    """
+    fmt = table_format(path)
+    if fmt == 'parquet':
+        for part in parquet_parts(path):
+            for batch in pq.ParquetFile(part, memory_map=True).iter_batches(batch_size=batch_size, columns=columns):
+                yield batch.to_pandas()
+    elif fmt == 'arrow':
+        reader = _arrow_reader(path)
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+            batch = batch.select(columns) if columns else batch
+            for start in range(0, batch.num_rows, batch_size):
+                yield batch.slice(start, batch_size).to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=columns, chunksize=batch_size)
+
+# pandas' infer_dtype results for object columns holding more than one kind of value
+MIXED_TYPES = ('mixed', 'mixed-integer', 'mixed-integer-float')
+
+def columnar_safe(df):
+    """
+    Cast object columns that mix value types (e.g. ints and strings in one zip code column) to strings,
+    which Arrow needs to give each column a single type.
+    """
+    mixed = [column for column in df.columns
+             if df[column].dtype == object and pd.api.types.infer_dtype(df[column], skipna=True) in MIXED_TYPES]
+    return df.astype({column: 'string' for column in mixed}) if mixed else df
+
+def write_table(df, path):
+    """
+    Write df in the format given by path's extension (Parquet and Arrow IPC files are compressed).
+    """
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    fmt = table_format(path)
+    if fmt != 'csv':
+        df = columnar_safe(df)
+    if fmt == 'parquet':
+        df.to_parquet(path, index=False, compression=PARQUET_COMPRESSION)
+    elif fmt == 'arrow':
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with pa.ipc.new_file(path, table.schema, options=pa.ipc.IpcWriteOptions(compression=ARROW_COMPRESSION)) as writer:
+            writer.write_table(table)
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+class IncrementalParquetWriter:
+    """
+    Parquet counterpart of IncrementalCSVWriter: every part_rows rows are written as a numbered part
+    file in the directory path. Each part is complete on its own (written under a temporary name, then
+    renamed), so a killed run keeps every finished part; the rows of the unfinished one are lost.
+    """
+    def __init__(self, path, columns, part_rows=PARQUET_PART_ROWS):
+        if os.path.isdir(path):
+            # parts of an earlier run, including temporaries left behind by a killed one
+            for part in glob.glob(os.path.join(path, 'part-*.parquet')) + glob.glob(os.path.join(path, '.part-*.parquet.tmp')):
+                os.remove(part)
+        elif os.path.exists(path):
+            os.remove(path)
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.columns = columns
+        self.part_rows = part_rows
+        self.rows = 0
+        self.parts = 0
+        self.buffer = []
+        self.schema = None
+
+    def write(self, row):
+        self.buffer.append({column: row.get(column) for column in self.columns})
+        self.rows += 1
+        if len(self.buffer) >= self.part_rows:
+            self.flush()
+
+    def _write_part(self, table):
+        part = os.path.join(self.path, f"part-{self.parts:05d}.parquet")
+        # dot-prefixed until complete, so readers never see a partial part
+        temporary = os.path.join(self.path, f".part-{self.parts:05d}.parquet.tmp")
+        pq.write_table(table, temporary, compression=PARQUET_COMPRESSION)
+        os.replace(temporary, part)
+        self.parts += 1
+
+    def flush(self):
+        if not self.buffer:
+            return
+        table = pa.Table.from_pylist(self.buffer, schema=self.schema)
+        self.schema = table.schema
+        self._write_part(table)
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+        if not self.parts:
+            # no rows: still leave a readable output with the expected columns
+            self._write_part(pa.table({column: pa.array([], pa.string()) for column in self.columns}))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class TableChunkWriter:
+    """
+    Append DataFrame chunks that share one Arrow schema to a Parquet, Arrow IPC or CSV file.
+    """
+    def __init__(self, path, schema):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.schema = schema
+        self.format = table_format(path)
+        self.rows = 0
+        if self.format == 'parquet':
+            self.writer = pq.ParquetWriter(path, schema, compression=PARQUET_COMPRESSION)
+        elif self.format == 'arrow':
+            self.writer = pa.ipc.new_file(path, schema, options=pa.ipc.IpcWriteOptions(compression=ARROW_COMPRESSION))
+        else:
+            self.writer = open(path, 'w', newline='', encoding='utf-8')
+            pd.DataFrame(columns=schema.names).to_csv(self.writer, index=False)
+
+    def write(self, df):
+        if self.format == 'csv':
+            df.to_csv(self.writer, header=False, index=False)
+        else:
+            self.writer.write_table(pa.Table.from_pandas(df, schema=self.schema, preserve_index=False))
+        self.rows += len(df)
+
+    def close(self):
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
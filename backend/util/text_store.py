@@ -0,0 +1,173 @@
+# util/text_store.py
+
+import os
+import sys
+import hashlib
+import threading
+from collections import OrderedDict
+from pymongo.errors import BulkWriteError
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from util.internal_collections import TEXTS_COLLECTION
+from util.prompt_templates import render_prompt
+
+# fields kept in the texts collection; documents hold '<field>_ref' (the text's sha256) instead
+TEXT_FIELDS = ('resume_text', 'job_description', 'prompt')
+REF_SUFFIX = '_ref'
+DUPLICATE_KEY_ERROR = 11000
+
+def text_id(text):
+    return hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+
+def store_texts(db, texts):
+    """
+    Make sure every text is in the texts collection, sending only the ones not stored yet.
+
+    :return: The list of text ids, in the order of texts.
+    """
+    by_id = {text_id(text): text or '' for text in texts}
+    existing = {doc['_id'] for doc in db[TEXTS_COLLECTION].find({'_id': {'$in': list(by_id)}}, {'_id': 1})}
+    missing = [{'_id': _id, 'text': text} for _id, text in by_id.items() if _id not in existing]
+    if missing:
+        try:
+            db[TEXTS_COLLECTION].insert_many(missing, ordered=False)
+        except BulkWriteError as e:
+            # another writer stored the same text first; content addressing makes that harmless
+            if any(error['code'] != DUPLICATE_KEY_ERROR for error in e.details['writeErrors']):
+                raise
+    return [text_id(text) for text in texts]
+
+def expand_projection(projection):
+    """
+    Map a projection on resolved field names to the stored fields that produce them.
+    """
+    if not projection:
+        return projection
+    expanded = dict(projection)
+    for field in TEXT_FIELDS:
+        if field in projection:
+            expanded[field + REF_SUFFIX] = projection[field]
+    if 'prompt' in projection:
+        expanded['prompt_template'] = projection['prompt']
+        expanded['prompt_params'] = projection['prompt']
+    return expanded
+
+class TextResolver:
+    """
+    Replaces text references in documents with the texts, fetching cache misses in one query per call.
+
+    Texts are immutable (their id is their hash), so cached entries never go stale; the cache is
+    bounded by total text size and evicts least recently used texts.
+    """
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self, ids):
+        found = {}
+        with self.lock:
+            for _id in ids:
+                text = self.entries.get(_id)
+                if text is None:
+                    self.misses += 1
+                else:
+                    self.entries.move_to_end(_id)
+                    self.hits += 1
+                    found[_id] = text
+        return found
+
+    def _remember(self, _id, text):
+        size = len(text)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if _id in self.entries:
+                return
+            self.entries[_id] = text
+            self.size += size
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def resolve(self, db, ids):
+        """
+        :return: A dict of text id -> text for every id found.
+        """
+        ids = set(ids)
+        texts = self._cached(ids)
+        missing = ids - texts.keys()
+        if missing:
+            for doc in db[TEXTS_COLLECTION].find({'_id': {'$in': list(missing)}}):
+                texts[doc['_id']] = doc['text']
+                self._remember(doc['_id'], doc['text'])
+        return texts
+
+    def resolve_documents(self, db, documents):
+        """
+        Inline the texts of documents in place. Documents that still carry inline texts are left as they are.
+
+        :return: documents, for chaining.
+        """
+        ids = set()
+        for doc in documents:
+            ids.update(doc[field + REF_SUFFIX] for field in TEXT_FIELDS if field + REF_SUFFIX in doc)
+            ids.update((doc.get('prompt_params') or {}).values())
+        if not ids:
+            return documents
+        texts = self.resolve(db, ids)
+        for doc in documents:
+            for field in TEXT_FIELDS:
+                ref = doc.pop(field + REF_SUFFIX, None)
+                if ref is not None:
+                    doc[field] = texts.get(ref)
+            if 'prompt_template' in doc:
+                template = doc.pop('prompt_template')
+                params = doc.pop('prompt_params', None) or {}
+                try:
+                    doc['prompt'] = render_prompt(template, {name: texts.get(ref, '') for name, ref in params.items()})
+                except (KeyError, TypeError):
+                    doc['prompt'] = None
+        return documents
+
+text_resolver = TextResolver(int(os.getenv('TEXT_CACHE_MAX_BYTES', 32 * 1024 * 1024)))
+
+def dedupe_collection(db, collection_name):
+    """
+    Move inline texts of an existing collection into the texts store, replacing them with references.
+
+    :return: The number of documents rewritten.
+    """
+    collection = db[collection_name]
+    rewritten = 0
+    inline = {'$or': [{field: {'$exists': True}} for field in TEXT_FIELDS]}
+    for doc in collection.find(inline, {field: 1 for field in TEXT_FIELDS}):
+        fields = [field for field in TEXT_FIELDS if field in doc]
+        refs = store_texts(db, [doc[field] for field in fields])
+        collection.update_one(
+            {'_id': doc['_id']},
+            {'$set': {field + REF_SUFFIX: ref for field, ref in zip(fields, refs)}, '$unset': {field: '' for field in fields}}
+        )
+        rewritten += 1
+    return rewritten
+
+if __name__ == "__main__":
+    from util.mongo_util import MongoUtil
+    from util.trend_rollup import is_daily_collection
+    from util.collection_versions import bump_collection_version
+
+    mongo_util = MongoUtil()
+    for name in sorted(mongo_util.db.list_collection_names()):
+        if is_daily_collection(name):
+            rewritten = dedupe_collection(mongo_util.db, name)
+            if rewritten:
+                bump_collection_version(mongo_util.db, name)
+            print(f"{name}: moved texts of {rewritten} documents into '{TEXTS_COLLECTION}'")
+    mongo_util.close_connection()
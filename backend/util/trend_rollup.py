@@ -0,0 +1,153 @@
+# util/trend_rollup.py
+
+import os
+import sys
+from datetime import datetime
+from pymongo import ReturnDocument
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from util.internal_collections import TRENDS_COLLECTION
+from util.collection_versions import bump_collection_version, collection_fingerprint
+from util.score_stats import collection_stats, mean_and_std, effective_score, histogram_bin, is_score, truthfulness_key
+
+DAILY_SUFFIX = '-resumes'
+
+def is_daily_collection(collection_name):
+    return collection_name.endswith(DAILY_SUFFIX)
+
+def collection_date(collection, collection_name):
+    # names carry month and day only; the year comes from when the first document was written
+    first = next(collection.find({}, {"_id": 1}).sort("_id", 1).limit(1), None)
+    year = first["_id"].generation_time.year if first else datetime.utcnow().year
+    try:
+        return datetime.strptime(f"{year}-{collection_name[:-len(DAILY_SUFFIX)]}", '%Y-%B-%d')
+    except ValueError:
+        return None
+
+def refresh_collection_summary(db, collection_name, force=False):
+    """
+    Recompute the trend summary of one daily collection if it changed since it was last rolled up.
+
+    :param db: The MongoDB database.
+    :param collection_name: The daily collection to summarise.
+    :param force: Recompute even if the collection fingerprint is unchanged.
+    :return: True if the summary was rewritten.
+    """
+    fingerprint = collection_fingerprint(db, collection_name)
+    trends = db[TRENDS_COLLECTION]
+    if not force and trends.find_one({"_id": collection_name, "fingerprint": fingerprint}, {"_id": 1}):
+        return False
+
+    collection = db[collection_name]
+    stats = collection_stats(collection)
+    judged = stats["truthfulness"]["true"] + stats["truthfulness"]["false"]
+    summary = {
+        "date": collection_date(collection, collection_name),
+        "count": stats["count"],
+        "scored": stats["scored"],
+        "labeled": stats["labeled"],
+        "auto_scored": stats["auto_scored"],
+        "mean": stats["score"]["mean"],
+        "std": stats["score"]["std"],
+        "sum": stats["score"]["sum"],
+        "sum_sq": stats["score"]["sum_sq"],
+        "truthful_ratio": stats["truthfulness"]["true"] / judged if judged else None,
+        "truthfulness": stats["truthfulness"],
+        "histogram": stats["histogram"],
+        "fingerprint": fingerprint,
+        "updated_at": datetime.utcnow(),
+    }
+    trends.update_one({"_id": collection_name}, {"$set": summary}, upsert=True)
+    bump_collection_version(db, TRENDS_COLLECTION)
+    return True
+
+def summary_increments(document, sign):
+    """
+    The $inc that adds (sign=1) or removes (sign=-1) one document's contribution to a trend summary.
+    """
+    inc = {f"truthfulness.{truthfulness_key(document.get('truthfulness'))}": sign}
+    score = effective_score(document)
+    if score is not None:
+        inc.update({"scored": sign, "sum": sign * score, "sum_sq": sign * score * score,
+                    "labeled" if is_score(document.get("score")) else "auto_scored": sign})
+        index = histogram_bin(score)
+        if index is not None:
+            inc[f"histogram.{index}.count"] = sign
+    return inc
+
+def record_document_change(db, collection_name, before, after):
+    """
+    Update a collection's trend summary for one document edited from before to after (e.g. a saved
+    label) with $inc, instead of re-aggregating the whole collection. Call it after bumping the
+    collection's version, so the stored fingerprint marks the summary as current.
+
+    Falls back to a full refresh when the collection has no summary yet.
+    """
+    inc = summary_increments(before, -1)
+    for field, value in summary_increments(after, 1).items():
+        inc[field] = inc.get(field, 0) + value
+    inc = {field: value for field, value in inc.items() if value}
+    trends = db[TRENDS_COLLECTION]
+    summary = trends.find_one_and_update(
+        # summaries written before auto scores were counted have no 'scored' and are rebuilt instead
+        {"_id": collection_name, "scored": {"$exists": True}},
+        {"$inc": inc, "$set": {"fingerprint": collection_fingerprint(db, collection_name), "updated_at": datetime.utcnow()}},
+        return_document=ReturnDocument.AFTER
+    ) if inc else trends.find_one({"_id": collection_name, "scored": {"$exists": True}})
+    if summary is None:
+        return refresh_collection_summary(db, collection_name, force=True)
+
+    mean, std = mean_and_std(summary["scored"], summary["sum"], summary["sum_sq"])
+    judged = summary["truthfulness"]["true"] + summary["truthfulness"]["false"]
+    trends.update_one({"_id": collection_name}, {"$set": {
+        "mean": mean,
+        "std": std,
+        "truthful_ratio": summary["truthfulness"]["true"] / judged if judged else None,
+    }})
+    bump_collection_version(db, TRENDS_COLLECTION)
+    return True
+
+def refresh_trends(db):
+    """
+    Bring the rollup up to date for every daily collection, skipping ones whose fingerprint is unchanged.
+
+    :return: The names of the collections whose summaries were rewritten.
+    """
+    daily = sorted(name for name in db.list_collection_names() if is_daily_collection(name))
+    refreshed = [name for name in daily if refresh_collection_summary(db, name)]
+    # drop summaries of collections that no longer exist
+    db[TRENDS_COLLECTION].delete_many({"_id": {"$nin": daily}})
+    return refreshed
+
+def fetch_trends(db):
+    """
+    Read the whole trend series in one query, plus an overall summary merged from the per-day sums.
+    """
+    series = list(db[TRENDS_COLLECTION].find({}, {"fingerprint": 0}).sort("date", 1))
+    totals = {"count": 0, "scored": 0, "labeled": 0, "auto_scored": 0, "sum": 0, "sum_sq": 0}
+    for summary in series:
+        totals["count"] += summary.get("count", 0)
+        # summaries rolled up before auto scores were counted only have labeled
+        totals["scored"] += summary.get("scored", summary.get("labeled", 0))
+        totals["labeled"] += summary.get("labeled", 0)
+        totals["auto_scored"] += summary.get("auto_scored", 0)
+        totals["sum"] += summary.pop("sum", 0)
+        totals["sum_sq"] += summary.pop("sum_sq", 0)
+        summary["collection"] = summary.pop("_id")
+    mean, std = mean_and_std(totals["scored"], totals["sum"], totals["sum_sq"])
+    return {
+        "series": series,
+        "overall": {"count": totals["count"], "scored": totals["scored"], "labeled": totals["labeled"],
+                    "auto_scored": totals["auto_scored"], "mean": mean, "std": std},
+    }
+
+if __name__ == "__main__":
+    from pymongo import MongoClient
+    import certifi
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    mongo_uri = f"mongodb+srv://{os.getenv('MONGO_USERNAME')}:{os.getenv('MONGO_PASSWORD')}@{os.getenv('MONGO_URI')}"
+    client = MongoClient(mongo_uri, tlsCAFile=certifi.where())
+    refreshed = refresh_trends(client[os.getenv('MONGO_DB_NAME')])
+    print(f"Refreshed trend summaries for {len(refreshed)} collections: {refreshed}")
+    client.close()